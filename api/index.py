@@ -5,7 +5,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 try:
-    from app import app
+    from app import create_app
+    app = create_app()
 except Exception as e:
     import traceback
     from flask import Flask, jsonify
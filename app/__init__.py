@@ -11,39 +11,91 @@ from flask_jwt_extended import JWTManager
 # Serve React App
 import os
 
-app = Flask(__name__, 
-            static_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), '../client/dist')))
-app.config.from_object(Config)
+STATIC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../client/dist'))
 
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
-mail = Mail(app)
-jwt = JWTManager(app)
-CORS(app) # Enable CORS for all routes
+# Extensions are created unbound and attached in create_app(), so importing
+# app.models or app.cost_model does not build a whole application.
+db = SQLAlchemy()
+bcrypt = Bcrypt()
+mail = Mail()
+jwt = JWTManager()
 
-login_manager = LoginManager(app)
+login_manager = LoginManager()
 login_manager.login_view = 'login'
 login_manager.login_message_category = 'info'
 
-@app.context_processor
-def inject_now():
-    from datetime import datetime
-    return {'now': datetime.utcnow()}
-
-# Avoid circular imports by importing inside function or after app is ready
-from .api.auth import auth_bp
-from .api.data import data_bp
-from .api.admin import admin_bp
-from .routes import main_bp
-
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(data_bp, url_prefix='/api/data')
-app.register_blueprint(admin_bp, url_prefix='/api/admin')
-app.register_blueprint(main_bp)
-
-# Ensure database exists
-try:
-    with app.app_context():
-        db.create_all()
-except Exception as e:
-    print(f"DB Creation Warning: {e}")
+def create_app(config_class=Config):
+    """
+    Application factory. Heavy optional modules (FPDF, Pillow) are imported
+    lazily by the code paths that need them, and schema creation only runs
+    once per database (see app/schema.py) instead of on every process start.
+    """
+    app = Flask(__name__, static_folder=STATIC_FOLDER)
+    app.config.from_object(config_class)
+
+    from .json_provider import init_json
+    init_json(app)
+
+    db.init_app(app)
+    bcrypt.init_app(app)
+    mail.init_app(app)
+    jwt.init_app(app)
+    CORS(app) # Enable CORS for all routes
+    login_manager.init_app(app)
+
+    @app.context_processor
+    def inject_now():
+        from datetime import datetime
+        return {'now': datetime.utcnow()}
+
+    # Avoid circular imports by importing inside function or after app is ready
+    from .api.auth import auth_bp
+    from .api.data import data_bp
+    from .api.admin import admin_bp
+    from .routes import main_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(data_bp, url_prefix='/api/data')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(main_bp)
+
+    from .instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from .profiling import init_profiling
+    init_profiling(app)
+
+    from .ratelimit import init_proxy_fix, init_ratelimit
+    init_proxy_fix(app)
+    init_ratelimit(app)
+
+    from .static_assets import init_static_manifest
+    init_static_manifest(app)
+
+    from .commands import register_commands
+    register_commands(app)
+
+    # Ensure database exists (guarded by a one-time marker)
+    if app.config.get('DB_AUTO_CREATE', True):
+        from .schema import ensure_schema
+        try:
+            ensure_schema(app)
+        except Exception as e:
+            print(f"DB Creation Warning: {e}")
+
+    from .preload import init_preload
+    init_preload(app)
+
+    return app
+
+_app = None
+
+def __getattr__(name):
+    # `from app import app` keeps working for run.py and the maintenance
+    # scripts; the default application is only built on first access.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,19 @@
-from flask import Blueprint, jsonify
+import io
+import os
+import tempfile
+from datetime import datetime
+from flask import Blueprint, jsonify, request, send_file, Response, stream_with_context, current_app
 from ..models import User, Prediction, Estimation
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from .. import db
+from .. import profiling
+from .. import export
+from .. import ingest
+from .. import archive
+from .. import result_cache
+from ..cost_model import load_unit_costs
+from ..estimation import default_features, parse_estimate_params
+from .data import get_data_models, get_data_unit_costs
 
 admin_bp = Blueprint('admin_api', __name__)
 
@@ -15,6 +27,7 @@ def stats():
 
     total_users = User.query.count()
     total_predictions = Prediction.query.count()
+    archived_predictions = archive.archived_count()
     total_estimations = Estimation.query.count()
     
     # Recent users
@@ -24,7 +37,9 @@ def stats():
     return jsonify({
         "total_users": total_users,
         "total_predictions": total_predictions,
+        "archived_predictions": archived_predictions,
         "total_estimations": total_estimations,
+        "result_cache": result_cache.stats(),
         "recent_users": recent_users_data
     }), 200
 
@@ -38,3 +53,140 @@ def get_users():
         
     users = User.query.all()
     return jsonify([{"id": u.id, "username": u.username, "email": u.email, "is_admin": u.is_admin} for u in users]), 200
+
+def _admin_user():
+    user = User.query.get(get_jwt_identity())
+    return user if user and user.is_admin else None
+
+@admin_bp.route('/profile/window', methods=['GET', 'POST'])
+@jwt_required()
+def profile_window():
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'cpu')
+        if mode not in profiling.MODES:
+            return jsonify({"msg": f"mode must be one of {', '.join(profiling.MODES)}"}), 400
+        try:
+            seconds = int(data.get('seconds', 30))
+        except (TypeError, ValueError):
+            return jsonify({"msg": "seconds must be an integer"}), 400
+        profiling.arm_window(seconds, mode)
+    return jsonify(profiling.window_status()), 200
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def list_profiles():
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    return jsonify(profiles=profiling.list_profiles(), window=profiling.window_status()), 200
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@jwt_required()
+def get_profile(name):
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    path = profiling.profile_path(name)
+    if not path:
+        return jsonify({"msg": "Profile not found"}), 404
+    if name.endswith('.prof') and request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in profiling.SORT_KEYS:
+            return jsonify({"msg": f"sort must be one of {', '.join(profiling.SORT_KEYS)}"}), 400
+        return Response(profiling.summarize_profile(path, sort=sort), mimetype='text/plain')
+    if name.endswith('.prof'):
+        return send_file(path, as_attachment=True, download_name=name)
+    return send_file(path, mimetype='text/plain', download_name=name)
+
+@admin_bp.route('/profile/memory', methods=['POST'])
+@jwt_required()
+def profile_memory():
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"msg": "Send the sample estimate as a JSON object"}), 400
+    try:
+        params = parse_estimate_params(data, default_features())
+    except (TypeError, ValueError) as e:
+        return jsonify({"msg": f"Invalid input: {e}"}), 400
+    q_model, t_model = get_data_models()
+    if not (q_model and t_model):
+        return jsonify({"msg": "Models not loaded. Please contact admin."}), 500
+    return jsonify(profiling.memory_hotspots(params, q_model, t_model, get_data_unit_costs(),
+                                             current_app.config.get('INFLATION_RATE', 0.07))), 200
+
+def _export_filters(args):
+    """Parses start/end/city/user_id; raises ValueError on bad values."""
+    user_id = args.get('user_id')
+    return {
+        "start": export.parse_date(args.get('start')),
+        "end": export.parse_date(args.get('end'), end=True),
+        "city": args.get('city') or None,
+        "user_id": int(user_id) if user_id else None,
+    }
+
+@admin_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_predictions():
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    fmt = request.args.get('format', 'csv')
+    if fmt not in export.FORMATS:
+        return jsonify({"msg": f"format must be one of {', '.join(export.FORMATS)}"}), 400
+    if fmt == 'parquet' and not export.parquet_available():
+        return jsonify({"msg": "Parquet export requires pyarrow"}), 501
+    try:
+        filters = _export_filters(request.args)
+    except ValueError:
+        return jsonify({"msg": "Invalid filter: use ISO dates for start/end and a numeric user_id"}), 400
+
+    filename = f"predictions-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    stats = export.ExportStats()
+    rows = export.iter_rows(stats=stats, **filters)
+
+    if fmt == 'parquet':
+        # Parquet needs the footer written last; spool to disk instead of memory
+        spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        export.write_parquet(rows, spool)
+        spool.seek(0)
+        current_app.logger.debug("Export (%s): %s", fmt, stats.summary())
+        return send_file(spool, mimetype=export.FORMATS[fmt], as_attachment=True, download_name=filename)
+
+    def generate():
+        yield from export.stream(fmt, rows)
+        current_app.logger.debug("Export (%s): %s", fmt, stats.summary())
+
+    response = Response(stream_with_context(generate()), mimetype=export.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@admin_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_history():
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    f = request.files.get('file')
+    if f is None or f.filename == '':
+        return jsonify({"msg": "Upload a CSV as the 'file' field"}), 400
+
+    text = io.TextIOWrapper(f.stream, encoding='utf-8-sig', newline='')
+    try:
+        stats, reject_path = ingest.import_csv(text, load_unit_costs(), source=f.filename)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"msg": f"Invalid CSV: {e}"}), 400
+    result = stats.as_dict()
+    result["rejects_file"] = os.path.basename(reject_path) if reject_path else None
+    current_app.logger.debug("Import (%s): %s", f.filename, result)
+    return jsonify(result), 201
+
+@admin_bp.route('/import/rejects/<name>', methods=['GET'])
+@jwt_required()
+def import_rejects(name):
+    if not _admin_user():
+        return jsonify({"msg": "Admin access required"}), 403
+    path = os.path.join(ingest.rejects_dir(), os.path.basename(name))
+    if not os.path.isfile(path):
+        return jsonify({"msg": "Reject file not found"}), 404
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name=os.path.basename(path))
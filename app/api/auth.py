@@ -3,10 +3,12 @@ from .. import db, bcrypt
 from ..models import User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from ..utils import send_email
+from ..ratelimit import rate_limit
 
 auth_bp = Blueprint('auth_api', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit
 def register():
     data = request.get_json()
     if not data:
@@ -40,6 +42,7 @@ def register():
     return jsonify(access_token=access_token, user={"id": user.id, "username": user.username, "email": user.email, "is_admin": user.is_admin}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit
 def login():
     data = request.get_json()
     email = data.get('email')
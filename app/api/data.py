@@ -1,10 +1,22 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, send_file, current_app, Response, stream_with_context
 from .. import db
 from ..models import User, Prediction
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..cost_model import load_models, compute_cost_breakdown, load_unit_costs
+from ..cost_model import load_models, load_unit_costs
 from ..blueprint_features import extract_blueprint_features
-from ..utils import send_email, generate_pdf
+from ..blueprint_tiles import tile_options
+from ..estimation import (default_features, parse_estimate_params, run_estimate, send_report,
+                          estimate_response, dashboard_predictions, dashboard_payload, result_payload,
+                          forecast_2026, reestimate, stored_result, render_report, invalidate_reports,
+                          EDITABLE)
+from ..instrumentation import span
+from ..uploads import read_upload, UploadError
+from ..idempotency import idempotent, upload_sha256
+from ..ratelimit import rate_limit
+from ..pricing import build_catalog, compile_pricing, expand, grid_size, label
+from .. import archive
+from .. import result_cache
+from werkzeug.exceptions import RequestEntityTooLarge
 import json
 import os
 import io
@@ -19,6 +31,13 @@ data_bp = Blueprint('data_api', __name__)
 _QTY_MODEL = None
 _TOTAL_COST_MODEL = None
 _UNIT_COSTS = None
+_PRICING = None
+_CATALOG = None  # (catalog dict, encoded body)
+
+@data_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    limit = current_app.config.get('MAX_CONTENT_LENGTH') or 0
+    return jsonify({"msg": f"Upload exceeds the {limit // (1024 * 1024)} MB request limit"}), 413
 
 def get_data_models():
     global _QTY_MODEL, _TOTAL_COST_MODEL
@@ -38,31 +57,37 @@ def get_data_unit_costs():
             _UNIT_COSTS = {}
     return _UNIT_COSTS
 
+def get_data_pricing():
+    global _PRICING
+    if _PRICING is None:
+        _, t_model = get_data_models()
+        _PRICING = compile_pricing(t_model, get_data_unit_costs())
+    return _PRICING
+
+def get_data_catalog():
+    global _CATALOG
+    if _CATALOG is None:
+        q_model, _ = get_data_models()
+        catalog = build_catalog(get_data_pricing(), get_data_unit_costs(), q_model,
+                                forecast_2026(1.0, current_app.config.get('INFLATION_RATE', 0.07)))
+        _CATALOG = (catalog, current_app.json.dumps(catalog).encode('utf-8'))
+    return _CATALOG
+
 @data_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def dashboard():
     user_id = get_jwt_identity()
-    predictions = Prediction.query.filter_by(user_id=user_id).order_by(Prediction.created_at.desc()).all()
-    
-    data = []
-    for p in predictions:
-        data.append({
-            "id": p.id,
-            "date": p.created_at.strftime('%Y-%m-%d'),
-            "city": json.loads(p.inputs).get('city', 'Unknown'),
-            "total_cost": p.total_cost,
-            "predicted_2026": p.predicted_2026_cost
-        })
-    
-    total_value = sum(p.total_cost for p in predictions)
-    return jsonify(estimations=data, total_value=total_value, count=len(data)), 200
+    predictions = dashboard_predictions(user_id)
+    return jsonify(**dashboard_payload(predictions)), 200
 
 @data_bp.route('/estimate', methods=['POST'])
 @jwt_required()
+@idempotent
+@rate_limit
 def estimate():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
-    print(f"DEBUG: Estimate call from user {user.username} ({user.email})")
+    current_app.logger.debug("Estimate call from user %s", user_id)
     
     # Robust data extraction from either JSON or Form
     if request.is_json:
@@ -73,108 +98,42 @@ def estimate():
     # Check if multipart (file upload)
     if 'blueprint' in request.files and request.files['blueprint'].filename != '':
         f = request.files['blueprint']
-        feats = extract_blueprint_features(f.read())
+        with span("blueprint"):
+            try:
+                upload = read_upload(f.stream, current_app.config['BLUEPRINT_MAX_BYTES'],
+                                     sha256=upload_sha256('blueprint'))
+            except UploadError as e:
+                return jsonify({"msg": str(e)}), e.status
+            feats = extract_blueprint_features(upload.stream, tiled=tile_options(current_app.config, current_app.logger))
     else:
-        # Defaults if no image
-        feats = {"area_sqft_estimate": 900, "rooms_estimate": 5, "wall_length_ft": 120}
-
-    # Extract fields
-    city = form_data.get('city', 'Chennai')
-    # quality names in train_models.py: ['economical', 'standard', 'premium', 'high-end']
-    # frontend sends: ['basic', 'standard', 'premium']
-    quality = form_data.get('quality', 'standard').lower()
-    if quality == 'basic': quality = 'economical' # Map basic to economical for model
-    
+        feats = default_features()
+
     try:
-        floors = int(form_data.get('floors', 2))
-        carpet_ratio = float(form_data.get('carpet_ratio', 0.72))
-        is_commercial = form_data.get('is_commercial', False)
-        
-        # Overrides - handle empty strings safely
-        area_override = form_data.get('area_sqft')
-        if area_override and area_override != '':
-            feats["area_sqft_estimate"] = float(area_override)
-            
-        rooms_override = form_data.get('rooms')
-        if rooms_override and rooms_override != '':
-            feats["rooms_estimate"] = int(rooms_override)
-
-        wall_override = form_data.get('wall_length')
-        if wall_override and wall_override != '':
-            feats["wall_length_ft"] = float(wall_override)
-        
-        input_data = {
-            "city": city,
-            "quality": quality,
-            "area_sqft": feats["area_sqft_estimate"],
-            "no_of_floors": floors,
-        }
+        params = parse_estimate_params(form_data, feats)
+    except (TypeError, ValueError) as e:
+        return jsonify({"msg": f"Invalid input: {e}"}), 400
 
+    try:
         q_model, t_model = get_data_models()
         u_costs = get_data_unit_costs()
 
         if q_model and t_model:
-            # Predict quantities
-            q = q_model.predict(input_data)[0]
-            qty_cols = ["bricks_count","cement_bags","steel_kg","paint_liters","worker_days"]
-            qty_pred = dict(zip(qty_cols, [int(round(max(0, v))) for v in q]))
-            
-            cost_res = compute_cost_breakdown(qty_pred, city, quality, u_costs)
-            total_predicted = max(0, t_model.predict_total_cost(input_data)[0])
-            
             inflation = current_app.config.get('INFLATION_RATE', 0.07)
-            years_diff = 2026 - datetime.now().year
-            predicted_2026 = total_predicted * ((1 + inflation) ** max(0, years_diff))
-
-            inputs = {
-                "city": city,
-                "quality": quality,
-                "floors": floors,
-                "carpet_ratio": carpet_ratio,
-                "is_commercial": is_commercial,
-                **feats
-            }
-
-            prediction = Prediction(
-                inputs=json.dumps(inputs),
-                quantities=json.dumps(qty_pred),
-                cost_breakdown=json.dumps(cost_res["breakdown"]),
-                total_cost=total_predicted,
-                predicted_2026_cost=predicted_2026,
-                author=user
-            )
+            result = run_estimate(params, q_model, t_model, u_costs, inflation, span=span)
+
+            compact = current_app.config.get('PREDICTION_STORAGE') == 'compact'
+            prediction = Prediction.from_result(result, compact=compact, author=user)
             db.session.add(prediction)
-            db.session.commit()
+            with span("db_commit"):
+                db.session.commit()
 
             # Generate PDF and Email API response
             try:
-                pdf_data = {
-                    'user': {'name': user.username, 'email': user.email},
-                    'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    'id': prediction.id,
-                    'inputs': inputs,
-                    'quantities': qty_pred,
-                    'breakdown': cost_res["breakdown"],
-                    'total': total_predicted,
-                    'predicted_2026': predicted_2026
-                }
-                pdf_bytes = generate_pdf(pdf_data)
-                
-                # Send Email
-                send_email("Your Estimation Report", user.email,
-                           body=f"Hi {user.username},\n\nPlease find attached the detailed cost estimation report.\n\nTotal: Rs. {total_predicted:,.2f}",
-                           pdf_bytes=pdf_bytes, pdf_name=f"estimate_{prediction.id}.pdf")
+                send_report(user, prediction.id, result, span=span)
             except Exception as e:
                 print(f"PDF/Email Error: {e}")
 
-            return jsonify({
-                "id": prediction.id,
-                "total_cost": total_predicted,
-                "predicted_2026": predicted_2026,
-                "quantities": qty_pred,
-                "breakdown": cost_res["breakdown"],
-                "pdf_generated": True
-            }), 201
+            return jsonify(estimate_response(prediction.id, result, get_data_catalog()[0]['version'])), 201
             
         return jsonify({"msg": f"Models not loaded. Error: {globals().get('MODEL_LOAD_ERROR', 'Unknown')}"}), 500
 
@@ -185,23 +144,248 @@ def estimate():
 @data_bp.route('/result/<int:pred_id>', methods=['GET'])
 @jwt_required()
 def result(pred_id):
+    """Served from the result LRU with a strong ETag; If-None-Match gets a 304 (app/result_cache.py)."""
+    user_id = int(get_jwt_identity())
+    entry = result_cache.get(pred_id, get_data_pricing().version, current_app.config.get('RESULT_CACHE_SIZE', 1024))
+
+    if not entry:
+        return jsonify({"msg": "Estimation not found"}), 404
+
+    if entry.owner_id != user_id:
+        # Check admin
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({"msg": "Unauthorized: You do not own this estimation"}), 403
+
+    response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = result_cache.CACHE_CONTROL
+    response.vary.add('Authorization')
+    return response.make_conditional(request)
+
+@data_bp.route('/result/<int:pred_id>', methods=['PATCH'])
+@jwt_required()
+def update_result(pred_id):
+    """
+    Edits an estimate in place. Only the stages downstream of the changed
+    inputs are recomputed (estimation.STAGES); the PDF is re-rendered on the
+    next /report request. Send `revision` to reject concurrent edits.
+    """
     user_id = int(get_jwt_identity())
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({"msg": "Send the fields to change as a JSON object"}), 400
+    unknown = sorted(set(changes) - set(EDITABLE) - {"revision"})
+    if unknown:
+        return jsonify({"msg": f"Cannot edit {', '.join(unknown)}; editable: {', '.join(EDITABLE)}"}), 400
+
     pred = Prediction.query.filter_by(id=pred_id).first()
-    
     if not pred:
+        archived = archive.find(pred_id)
+        if archived and archived.user_id == user_id:
+            return jsonify({"msg": "Archived estimations are read-only"}), 409
         return jsonify({"msg": "Estimation not found"}), 404
-        
     if pred.user_id != user_id:
-        # Check admin
+        return jsonify({"msg": "Unauthorized: You do not own this estimation"}), 403
+
+    revision = pred.revision or 1
+    expected = changes.pop('revision', None)
+    if expected is not None and str(expected) != str(revision):
+        return jsonify({"msg": "Estimation was changed by another request", "revision": revision}), 409
+
+    q_model, t_model = get_data_models()
+    if not (q_model and t_model):
+        return jsonify({"msg": "Models not loaded. Please contact admin."}), 500
+    try:
+        with span("reestimate"):
+            new, stages = reestimate(pred.inputs_data, stored_result(pred), changes, q_model, t_model,
+                                     get_data_unit_costs(), current_app.config.get('INFLATION_RATE', 0.07),
+                                     span=span)
+    except (TypeError, ValueError) as e:
+        return jsonify({"msg": f"Invalid input: {e}"}), 400
+
+    if stages:
+        # Claim the next revision first so a concurrent edit cannot interleave
+        table = Prediction.__table__
+        claimed = db.session.execute(
+            table.update()
+            .where(table.c.id == pred_id, db.func.coalesce(table.c.revision, 1) == revision)
+            .values(revision=revision + 1, updated_at=datetime.utcnow())
+        ).rowcount
+        if claimed != 1:
+            db.session.rollback()
+            return jsonify({"msg": "Estimation was changed by another request"}), 409
+        pred.inputs_data = new["inputs"]
+        if "quantities" in stages:
+            pred.quantities_data = new["quantities"]
+        if "breakdown" in stages:
+            pred.breakdown_data = new["breakdown"]
+        pred.total_cost = new["total"]
+        pred.predicted_2026_cost = new["predicted_2026"]
+        pred.revision = revision + 1
+        with span("db_commit"):
+            db.session.commit()
+        invalidate_reports(pred_id)
+        result_cache.invalidate(pred_id)
+
+    return jsonify({"id": pred_id, **result_payload(pred), "recomputed": stages}), 200
+
+@data_bp.route('/result/<int:pred_id>/report', methods=['GET'])
+@jwt_required()
+def result_report(pred_id):
+    """PDF for the estimate's current revision, rendered on first request."""
+    user_id = int(get_jwt_identity())
+    pred = Prediction.query.filter_by(id=pred_id).first() or archive.find(pred_id)
+    if not pred:
+        return jsonify({"msg": "Estimation not found"}), 404
+    if pred.user_id != user_id:
+        user = User.query.get(user_id)
+        if not user or not user.is_admin:
+            return jsonify({"msg": "Unauthorized: You do not own this estimation"}), 403
+
+    owner = User.query.get(pred.user_id)
+    with span("pdf"):
+        path = render_report(owner, pred)
+    return send_file(path, mimetype='application/pdf', download_name=f"estimate_{pred_id}.pdf")
+
+@data_bp.route('/portfolio', methods=['GET'])
+@jwt_required()
+@rate_limit
+def portfolio():
+    """
+    One PDF with a page per estimate of the user (optionally only `ids`, or
+    a start/end date range) and summary pages, streamed as it is rendered.
+    """
+    from .. import export
+    from ..portfolio import PortfolioStats, iter_portfolio
+    user = User.query.get(int(get_jwt_identity()))
+    if not user:
+        return jsonify({"msg": "User not found"}), 404
+    try:
+        ids = {int(i) for i in request.args['ids'].split(',') if i} if request.args.get('ids') else None
+        start = export.parse_date(request.args.get('start'))
+        end = export.parse_date(request.args.get('end'), end=True)
+    except ValueError:
+        return jsonify({"msg": "ids must be comma-separated numbers and start/end ISO dates"}), 400
+
+    rows = export.iter_rows(start=start, end=end, user_id=user.id)
+    if ids is not None:
+        rows = (row for row in rows if row["id"] in ids)
+    stats = PortfolioStats()
+
+    def generate():
+        yield from iter_portfolio(rows, owner={"name": user.username, "email": user.email}, stats=stats)
+        current_app.logger.debug(f"Portfolio: {stats.summary()}")
+
+    response = Response(stream_with_context(generate()), mimetype='application/pdf')
+    response.headers['Content-Disposition'] = f'attachment; filename="portfolio-{datetime.utcnow():%Y%m%d}.pdf"'
+    return response
+
+@data_bp.route('/similar/<int:pred_id>', methods=['GET'])
+@jwt_required()
+def similar(pred_id):
+    from ..similarity import get_index, SOURCES, FEATURES, MAX_K
+    user_id = int(get_jwt_identity())
+    pred = Prediction.query.filter_by(id=pred_id).first()
+
+    if not pred:
+        return jsonify({"msg": "Estimation not found"}), 404
+
+    if pred.user_id != user_id:
         user = User.query.get(user_id)
         if not user or not user.is_admin:
             return jsonify({"msg": "Unauthorized: You do not own this estimation"}), 403
 
+    try:
+        k = max(1, min(int(request.args.get('k', 10)), MAX_K))
+    except ValueError:
+        return jsonify({"msg": "k must be an integer"}), 400
+    source = request.args.get('source') or None
+    if source and source not in SOURCES:
+        return jsonify({"msg": f"source must be one of {', '.join(SOURCES)}"}), 400
+
+    inputs = pred.inputs_data
+    with span("similar"):
+        hits = get_index().query(inputs.get('city'), inputs.get('quality'), inputs.get('floors', 1),
+                                 inputs.get('area_sqft_estimate', 0), inputs.get('rooms_estimate'),
+                                 k=k, exclude=("prediction", pred.id), source=source)
+
+    projects = []
+    for hit in hits:
+        # Other users' estimates are shown anonymously
+        visible = hit["source"] == "historical" or hit["owner_id"] == user_id
+        projects.append({
+            "source": hit["source"],
+            "id": hit["ref_id"] if visible else None,
+            **dict(zip(FEATURES, hit["features"])),
+            "total_cost": hit["total_cost"],
+            "distance": hit["distance"],
+        })
+    return jsonify({"city": inputs.get('city'), "quality": inputs.get('quality'), "similar": projects}), 200
+
+@data_bp.route('/catalog', methods=['GET'])
+def catalog():
+    """
+    Rates, multipliers and material factors for client-side previews (see
+    pricing.build_catalog). Public and cacheable: `?v=<version>` URLs are
+    immutable, the bare URL is cached for CATALOG_MAX_AGE and revalidated
+    with its strong ETag.
+    """
+    catalog, body = get_data_catalog()
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(catalog["version"])
+    if request.args.get('v') == catalog["version"]:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={current_app.config.get('CATALOG_MAX_AGE', 86400)}"
+    return response.make_conditional(request)
+
+@data_bp.route('/sweep', methods=['POST'])
+@jwt_required()
+@rate_limit
+def sweep():
+    """What-if grid over city x quality x floors x area. Nothing is stored or emailed."""
+    data = request.get_json(silent=True)
+    if data is None:
+        if request.get_data():
+            # A body that is not valid JSON; only an empty body means the default grid
+            return jsonify({"msg": "Invalid sweep: malformed JSON body"}), 400
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"msg": "Invalid sweep: expected a JSON object"}), 400
+    tables = get_data_pricing()
+    try:
+        cities = tables.cities if data.get('city', '*') == '*' else expand(data['city'], lambda c: label(c, 'city'), 'city')
+        qualities = expand(data.get('quality', ['basic', 'standard', 'premium']),
+                           lambda q: label(q, 'quality').lower(), 'quality')
+        floors = expand(data.get('floors', 2), int, 'floors')
+        areas = expand(data.get('area_sqft', 1000), float, 'area_sqft')
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"msg": f"Invalid sweep: {e}"}), 400
+
+    cells = grid_size(cities, qualities, floors, areas)
+    max_cells = current_app.config.get('SWEEP_MAX_CELLS', 250000)
+    if cells > max_cells:
+        return jsonify({"msg": f"Sweep has {cells} cells; the limit is {max_cells}"}), 400
+
+    with span("sweep"):
+        # Cells price like an estimate without a blueprint (non-linear models read rooms/walls)
+        feats = default_features()
+        totals = tables.evaluate(cities, qualities, floors, areas,
+                                 rooms=feats["rooms_estimate"], wall_length=feats["wall_length_ft"])
+        if hasattr(totals, 'round'):
+            totals = totals.round(2).tolist()
+        else:
+            totals = [round(t, 2) for t in totals]
+
     return jsonify({
-        "inputs": json.loads(pred.inputs),
-        "quantities": json.loads(pred.quantities),
-        "breakdown": json.loads(pred.cost_breakdown),
-        "total_cost": pred.total_cost,
-        "predicted_2026": pred.predicted_2026_cost,
-        "date": pred.created_at.strftime('%Y-%m-%d')
+        "order": ["city", "quality", "floors", "area_sqft"],
+        "city": cities,
+        "quality": qualities,
+        "floors": floors,
+        "area_sqft": areas,
+        "total_cost": totals,
+        "forecast_2026_factor": forecast_2026(1.0, current_app.config.get('INFLATION_RATE', 0.07)),
+        "cells": cells,
+        "pricing_version": tables.version,
     }), 200
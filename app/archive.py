@@ -0,0 +1,357 @@
+"""
+Archival of old predictions into per-month columnar files.
+
+`flask archive-predictions` moves predictions older than ARCHIVE_AFTER_DAYS
+out of the live table into instance/archive/predictions-YYYY-MM.npz (one
+file per creation month) and lists them in manifest.json. Each file is an
+ordinary NPZ that np.load can read, but its members are stored without
+zip compression so they can be memory-mapped in place: the scalar columns
+are typed arrays and the inputs/quantities/breakdown payload uses the
+compact encoding of app/compact.py (offsets + bytes), about 140 bytes a
+row against ~450 in the SQLite table.
+
+User history (dashboard), single results and exports union the live table
+with the archive. Reads only map the months they need and select rows with
+vectorized masks over the mapped columns. NumPy is required to archive and
+to read archived rows; without it the archive is skipped with a warning.
+"""
+import json
+import os
+import struct
+import zipfile
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only needed when an archive exists
+    np = None
+
+from .compact import decode_columns, pack_details, unpack_details
+
+MANIFEST = 'manifest.json'
+EPOCH = datetime(1970, 1, 1)
+CHUNK_ROWS = 5000
+DELETE_CHUNK = 500
+
+_months = {}  # path -> (mtime, {column: array})
+_warned = False
+
+class ArchiveError(RuntimeError):
+    pass
+
+def archive_dir(app=None):
+    from flask import current_app, has_app_context
+    if app is None and not has_app_context():
+        return os.environ.get('ARCHIVE_DIR')
+    app = app or current_app
+    return app.config.get('ARCHIVE_DIR') or os.path.join(app.instance_path, 'archive')
+
+def load_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError, TypeError):
+        return {"version": 1, "months": {}}
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, MANIFEST + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+def _to_us(dt):
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+def _from_us(us):
+    return EPOCH + timedelta(microseconds=int(us))
+
+def month_key(dt):
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+def _month_bounds(key):
+    year, month = map(int, key.split('-'))
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+class ArchivedPrediction:
+    """Read-only stand-in for a Prediction row that lives in the archive."""
+    __slots__ = ("id", "user_id", "created_at", "total_cost", "predicted_2026_cost", "details", "_decoded")
+    archived = True
+    inputs = quantities = cost_breakdown = None
+
+    def __init__(self, cols, i):
+        start, stop = cols["details_offsets"][i], cols["details_offsets"][i + 1]
+        self.id = int(cols["id"][i])
+        self.user_id = int(cols["user_id"][i])
+        self.created_at = _from_us(cols["created_at"][i])
+        self.total_cost = float(cols["total_cost"][i])
+        predicted = float(cols["predicted_2026_cost"][i])
+        self.predicted_2026_cost = None if predicted != predicted else predicted  # NaN marks NULL
+        self.details = cols["details"][start:stop].tobytes()
+        self._decoded = None
+
+    def _payload(self):
+        if self._decoded is None:
+            self._decoded = unpack_details(self.details)
+        return self._decoded
+
+    @property
+    def inputs_data(self):
+        return self._payload()[0]
+
+    @property
+    def quantities_data(self):
+        return self._payload()[1]
+
+    @property
+    def breakdown_data(self):
+        return self._payload()[2]
+
+# ------------------------------------------------------------ month files
+
+def _map_npz(path):
+    """Memory-maps every (uncompressed) member of an NPZ file."""
+    cols = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                cols[name] = np.load(path)[name]
+                continue
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            if not shape or shape[0] == 0:
+                cols[name] = np.empty(shape, dtype=dtype)
+            else:
+                cols[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape)
+    return cols
+
+def _month_columns(path):
+    mtime = os.path.getmtime(path)
+    cached = _months.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _months[path] = (mtime, _map_npz(path))
+    return cached[1]
+
+def _write_month(path, cols):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **cols)  # ZIP_STORED members, so readers can memory-map them
+    os.replace(tmp, path)
+    _months.pop(path, None)
+
+def _build_columns(rows):
+    """Column arrays (sorted by id) from (id, user_id, created_at, total, predicted, blob) tuples."""
+    rows.sort(key=lambda r: r[0])
+    blobs = [r[5] for r in rows]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return {
+        "id": np.array([r[0] for r in rows], dtype=np.int64),
+        "user_id": np.array([r[1] for r in rows], dtype=np.int64),
+        "created_at": np.array([_to_us(r[2]) for r in rows], dtype=np.int64),
+        "total_cost": np.array([r[3] for r in rows], dtype=np.float64),
+        "predicted_2026_cost": np.array([np.nan if r[4] is None else r[4] for r in rows], dtype=np.float64),
+        "details_offsets": offsets,
+        "details": np.frombuffer(b''.join(blobs), dtype=np.uint8),
+    }
+
+def _row(p):
+    return (p.id, p.user_id, p.created_at, p.total_cost, p.predicted_2026_cost, p.details)
+
+def _search(cols, pred_id):
+    i = int(np.searchsorted(cols["id"], pred_id))
+    if i < len(cols["id"]) and cols["id"][i] == pred_id:
+        return ArchivedPrediction(cols, i)
+    return None
+
+def _existing_rows(path):
+    """Rows already in a month file, as tuples for _build_columns (used when a month is appended to)."""
+    if not os.path.exists(path):
+        return []
+    cols = _month_columns(path)
+    return [_row(ArchivedPrediction(cols, i)) for i in range(len(cols["id"]))]
+
+def _archived_row(path, manifest, pred_id):
+    for meta in manifest["months"].values():
+        if meta["min_id"] <= pred_id <= meta["max_id"]:
+            found = _search(_month_columns(os.path.join(path, meta["file"])), pred_id)
+            if found:
+                return _row(found)
+    return None
+
+def _reuses_ids():
+    """
+    True for a SQLite prediction table created without AUTOINCREMENT: SQLite
+    then hands out max(id) + 1, so deleting the newest rows frees their ids.
+    """
+    from . import db
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    sql = db.session.execute(db.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'prediction'")).scalar()
+    return 'AUTOINCREMENT' not in (sql or '').upper()
+
+# ------------------------------------------------------------ archiving
+
+class ArchiveStats:
+    def __init__(self):
+        self.rows = 0
+        self.months = set()
+        self.bytes = 0
+
+    def summary(self):
+        return (f"{self.rows} predictions into {len(self.months)} month files "
+                f"({', '.join(sorted(self.months)) or '-'}), archive now {self.bytes / 1e6:.1f} MB")
+
+def archive(before, app=None, progress=None):
+    """
+    Moves predictions created before `before` into the month files, one
+    month at a time: the file and manifest are written first and the rows
+    deleted afterwards, so an interrupted run leaves duplicates rather than
+    losing data. Only rows written to (or already identical in) the archive
+    are deleted.
+
+    Archived ids must never be handed out again. New tables use SQLite
+    AUTOINCREMENT; on older SQLite tables the newest row stays live so
+    max(id) + 1 stays above the archive. A live row whose id is at or below
+    the highest archived id is either a leftover of an interrupted run
+    (identical contents: deleted) or a reused id, which raises ArchiveError
+    before anything of that month is deleted.
+    """
+    if np is None:
+        raise ImportError("numpy is required for archiving")
+    from . import db
+    from .models import Prediction as P
+    path = archive_dir(app)
+    os.makedirs(path, exist_ok=True)
+    manifest = load_manifest(path)
+    stats = ArchiveStats()
+    candidates = [P.created_at < before]
+    if _reuses_ids():
+        newest = db.session.query(db.func.max(P.id)).scalar()
+        if newest is not None:
+            candidates.append(P.id != newest)
+
+    while True:
+        oldest = db.session.query(db.func.min(P.created_at)).filter(*candidates).scalar()
+        if oldest is None:
+            break
+        key = month_key(oldest)
+        start, end = _month_bounds(key)
+        end = min(end, before)
+
+        month_path = os.path.join(path, f"predictions-{key}.npz")
+        rows = _existing_rows(month_path)
+        seen = {r[0]: r for r in rows}
+        watermark = max((m["max_id"] for m in manifest["months"].values()), default=0)
+        moved, reused = [], []
+        last_id = 0
+        while True:
+            chunk = (db.session.query(P.id, P.user_id, P.created_at, P.total_cost, P.predicted_2026_cost,
+                                      P.inputs, P.quantities, P.cost_breakdown, P.details)
+                     .filter(*candidates, P.created_at >= start, P.created_at < end, P.id > last_id)
+                     .order_by(P.id).limit(CHUNK_ROWS).all())
+            if not chunk:
+                break
+            for r in chunk:
+                blob = pack_details(*decode_columns(r.inputs, r.quantities, r.cost_breakdown, r.details))
+                row = (r.id, r.user_id, r.created_at, r.total_cost, r.predicted_2026_cost, blob)
+                archived = seen.get(r.id) or (_archived_row(path, manifest, r.id) if r.id <= watermark else None)
+                if archived is None:
+                    rows.append(row)
+                elif archived != row:
+                    reused.append(r.id)
+                    continue
+                moved.append(r.id)
+            last_id = chunk[-1].id
+            if progress:
+                progress(key, len(moved))
+        if reused:
+            raise ArchiveError(f"{len(reused)} live predictions of {key} reuse archived ids with different "
+                               f"contents (e.g. {', '.join(map(str, reused[:5]))}); nothing of {key} was deleted")
+
+        cols = _build_columns(rows)
+        _write_month(month_path, cols)
+        manifest["months"][key] = {
+            "file": os.path.basename(month_path),
+            "rows": len(rows),
+            "min_id": int(cols["id"][0]),
+            "max_id": int(cols["id"][-1]),
+            "bytes": os.path.getsize(month_path),
+        }
+        manifest["archived_before"] = max(manifest.get("archived_before") or '', before.isoformat())
+        _write_manifest(path, manifest)
+
+        for i in range(0, len(moved), DELETE_CHUNK):
+            P.query.filter(P.id.in_(moved[i:i + DELETE_CHUNK])).delete(synchronize_session=False)
+            db.session.commit()
+        stats.rows += len(moved)
+        stats.months.add(key)
+
+    stats.bytes = sum(m["bytes"] for m in manifest["months"].values())
+    return stats
+
+# ------------------------------------------------------------ reads
+
+def _months_for(start=None, end=None):
+    """(key, path, manifest entry) of the archived months overlapping [start, end), oldest first."""
+    global _warned
+    path = archive_dir()
+    if not path:
+        return []
+    months = load_manifest(path)["months"]
+    if not months:
+        return []
+    if np is None:
+        if not _warned:
+            print("Archive Warning: numpy is not installed, archived predictions are not readable")
+            _warned = True
+        return []
+    selected = []
+    for key in sorted(months):
+        m_start, m_end = _month_bounds(key)
+        if (start and m_end <= start) or (end and m_start >= end):
+            continue
+        selected.append((key, os.path.join(path, months[key]["file"]), months[key]))
+    return selected
+
+def iter_archived(user_id=None, start=None, end=None, newest_first=False):
+    months = _months_for(start, end)
+    for _, month_path, _ in (reversed(months) if newest_first else months):
+        cols = _month_columns(month_path)
+        mask = np.ones(len(cols["id"]), dtype=bool)
+        if user_id is not None:
+            mask &= cols["user_id"] == int(user_id)
+        if start:
+            mask &= cols["created_at"] >= _to_us(start)
+        if end:
+            mask &= cols["created_at"] < _to_us(end)
+        idx = np.flatnonzero(mask)
+        if newest_first:
+            idx = idx[np.argsort(cols["created_at"][idx], kind='stable')[::-1]]
+        for i in idx:
+            yield ArchivedPrediction(cols, i)
+
+def history(user_id):
+    """A user's archived predictions, newest first (appended after the live rows)."""
+    return list(iter_archived(user_id=user_id, newest_first=True))
+
+def find(pred_id):
+    for _, month_path, meta in _months_for():
+        if meta["min_id"] <= pred_id <= meta["max_id"]:
+            found = _search(_month_columns(month_path), pred_id)
+            if found:
+                return found
+    return None
+
+def archived_count():
+    path = archive_dir()
+    return sum(m["rows"] for m in load_manifest(path)["months"].values()) if path else 0
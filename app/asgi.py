@@ -0,0 +1,314 @@
+"""
+ASGI variant of the data API for high-concurrency deployments.
+
+`POST /api/data/estimate`, `GET /api/data/dashboard` and
+`GET /api/data/result/<id>` are served natively on the event loop. The
+request body is streamed from the socket into a spooled buffer without
+holding a thread, database work (including a shared rate-limit store) runs
+on a small dedicated thread pool (SQLite/MySQL drivers here are blocking)
+and CPU-bound work (body parsing, blueprint decoding, model loading, the
+estimate itself, PDF rendering) runs on a separate executor, so the loop
+only ever waits on I/O.
+Every other route falls through to the regular Flask app via asgiref.
+
+    uvicorn asgi:application --workers 2
+"""
+import asyncio
+import json
+import math
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .estimation import (default_features, parse_estimate_params, run_estimate, send_report,
+                         estimate_response, dashboard_predictions, dashboard_payload)
+from .ratelimit import forwarded_client
+from .uploads import UploadError
+
+SPOOL_MAX_MEMORY = 1024 * 1024
+DEFAULT_MAX_BODY = 32 * 1024 * 1024
+RESULT_PATH = re.compile(r"^/api/data/result/(\d+)$")
+
+class RequestTooLarge(Exception):
+    pass
+
+class BadContentLength(Exception):
+    pass
+
+class AsyncDataAPI:
+    def __init__(self, flask_app, db_workers=8, cpu_workers=None):
+        from asgiref.wsgi import WsgiToAsgi
+        self.flask_app = flask_app
+        self.fallback = WsgiToAsgi(flask_app)
+        self.db_pool = ThreadPoolExecutor(db_workers, thread_name_prefix='asgi-db')
+        self.cpu_pool = ThreadPoolExecutor(cpu_workers, thread_name_prefix='asgi-cpu')
+        self.max_body = flask_app.config.get('MAX_CONTENT_LENGTH') or DEFAULT_MAX_BODY
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http':
+            method, path = scope['method'], scope['path']
+            if method == 'POST' and path == '/api/data/estimate':
+                # Idempotent submissions go through the Flask view (app/idempotency.py)
+                if any(name == b'idempotency-key' for name, _ in scope['headers']):
+                    return await self.fallback(scope, receive, send)
+                return await self.estimate(scope, receive, send)
+            if method == 'GET' and path == '/api/data/dashboard':
+                return await self.dashboard(scope, receive, send)
+            match = RESULT_PATH.match(path) if method == 'GET' else None
+            if match:
+                return await self.result(scope, receive, send, int(match.group(1)))
+        return await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.db_pool.shutdown(wait=False)
+                self.cpu_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # ------------------------------------------------------------ helpers
+
+    def _in_app(self, fn, *args):
+        with self.flask_app.app_context():
+            return fn(*args)
+
+    async def run_db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.db_pool, self._in_app, fn, *args)
+
+    async def run_cpu(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.cpu_pool, self._in_app, fn, *args)
+
+    async def send_json(self, send, status, payload, headers=()):
+        await self.send_body(send, status, self.flask_app.json.dumps(payload).encode('utf-8'), headers)
+
+    async def send_body(self, send, status, body, headers=()):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+            *headers,
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _identity(self, scope):
+        """Decodes the bearer access token; returns (user_id, error_message)."""
+        from flask_jwt_extended import decode_token
+        headers = dict(scope['headers'])
+        auth = headers.get(b'authorization', b'').decode('latin-1')
+        if not auth.startswith('Bearer '):
+            return None, "Missing Authorization Header"
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(auth[len('Bearer '):])
+            if claims.get('type') != 'access':
+                return None, "Only non-refresh tokens are allowed"
+            return int(claims[self.flask_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]), None
+        except Exception as e:
+            return None, str(e)
+
+    async def read_body(self, scope, receive):
+        """Streams the request body into a spooled temp file, enforcing the size limit."""
+        declared = dict(scope['headers']).get(b'content-length')
+        if declared is not None:
+            try:
+                declared = int(declared)
+            except ValueError:
+                raise BadContentLength()
+            if declared < 0:
+                raise BadContentLength()
+            if declared > self.max_body:
+                raise RequestTooLarge()
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                spool.close()
+                raise ConnectionResetError("client disconnected")
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                spool.close()
+                raise RequestTooLarge()
+            spool.write(chunk)
+            if not message.get('more_body'):
+                break
+        spool.seek(0)
+        return spool, size
+
+    @staticmethod
+    def _parse_form(headers, spool, size):
+        from werkzeug.formparser import parse_form_data
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_TYPE': headers.get(b'content-type', b'').decode('latin-1'),
+            'CONTENT_LENGTH': str(size),
+            'wsgi.input': spool,
+        }
+        _, form, files = parse_form_data(environ)
+        return form, files
+
+    @staticmethod
+    def _features(files):
+        from flask import current_app
+        from .blueprint_features import extract_blueprint_features
+        from .blueprint_tiles import tile_options
+        from .uploads import read_upload
+        f = files.get('blueprint')
+        if f is not None and f.filename != '':
+            upload = read_upload(f.stream, current_app.config['BLUEPRINT_MAX_BYTES'])
+            return extract_blueprint_features(upload.stream, tiled=tile_options(current_app.config, current_app.logger))
+        return default_features()
+
+    def _client(self, scope):
+        """Client address, trusting PROXY_FIX_X_FOR proxies like the Flask app's ProxyFix does."""
+        remote = (scope.get('client') or ('unknown', 0))[0]
+        forwarded = ','.join(v.decode('latin-1') for k, v in scope['headers'] if k == b'x-forwarded-for')
+        return forwarded_client(remote, forwarded, self.flask_app.config.get('PROXY_FIX_X_FOR', 0))
+
+    # ------------------------------------------------------------ routes
+
+    async def estimate(self, scope, receive, send):
+        user_id, error = self._identity(scope)
+        if user_id is None:
+            return await self.send_json(send, 401, {"msg": error})
+        limiter = self.flask_app.extensions.get('ratelimiter')
+        if limiter is not None:
+            wait = await self.run_db(limiter.check, 'data_api.estimate', {"user": str(user_id), "ip": self._client(scope)})
+            if wait > 0:
+                retry_after = max(1, math.ceil(wait))
+                return await self.send_json(send, 429, {"msg": f"Too many requests. Retry in {retry_after}s"},
+                                            headers=[(b'retry-after', str(retry_after).encode('ascii'))])
+        try:
+            spool, size = await self.read_body(scope, receive)
+        except RequestTooLarge:
+            limit = self.max_body // (1024 * 1024)
+            return await self.send_json(send, 413, {"msg": f"Upload exceeds the {limit} MB request limit"})
+        except BadContentLength:
+            return await self.send_json(send, 400, {"msg": "Invalid Content-Length header"})
+        except ConnectionResetError:
+            return
+
+        headers = dict(scope['headers'])
+        try:
+            if headers.get(b'content-type', b'').startswith(b'application/json'):
+                form_data, feats = await self.run_cpu(self._parse_json, spool), default_features()
+            else:
+                form, files = await self.run_cpu(self._parse_form, headers, spool, size)
+                form_data = form
+                feats = await self.run_cpu(self._features, files)
+        except UploadError as e:
+            return await self.send_json(send, e.status, {"msg": str(e)})
+        except ValueError:
+            return await self.send_json(send, 400, {"msg": "Malformed request body"})
+        finally:
+            spool.close()
+
+        user = await self.run_db(self._load_user, user_id)
+        if user is None:
+            return await self.send_json(send, 404, {"msg": "User not found"})
+        try:
+            params = parse_estimate_params(form_data, feats)
+        except (TypeError, ValueError) as e:
+            return await self.send_json(send, 400, {"msg": f"Invalid input: {e}"})
+        try:
+            result, catalog_version = await self.run_cpu(self._estimate, params)
+            prediction_id = await self.run_db(self._store_prediction, user_id, result)
+        except Exception as e:
+            print(f"Estimation Logic Error: {e}")
+            return await self.send_json(send, 500, {"msg": f"Internal estimation error: {str(e)}"})
+
+        try:
+            await self.run_cpu(send_report, user, prediction_id, result)
+        except Exception as e:
+            print(f"PDF/Email Error: {e}")
+        return await self.send_json(send, 201, estimate_response(prediction_id, result, catalog_version))
+
+    @staticmethod
+    def _parse_json(spool):
+        data = json.loads(spool.read() or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        return data
+
+    @staticmethod
+    def _estimate(params):
+        """run_estimate() with the shared models (loaded on first use) and the current catalog version."""
+        from flask import current_app
+        from .api.data import get_data_catalog, get_data_models, get_data_unit_costs
+        q_model, t_model = get_data_models()
+        result = run_estimate(params, q_model, t_model, get_data_unit_costs(),
+                              current_app.config.get('INFLATION_RATE', 0.07))
+        return result, get_data_catalog()[0]['version']
+
+    @staticmethod
+    def _load_user(user_id):
+        from .models import User
+        return User.query.get(user_id)
+
+    @staticmethod
+    def _store_prediction(user_id, result):
+        from flask import current_app
+        from . import db
+        from .models import Prediction
+        compact = current_app.config.get('PREDICTION_STORAGE') == 'compact'
+        prediction = Prediction.from_result(result, compact=compact, user_id=user_id)
+        db.session.add(prediction)
+        db.session.commit()
+        return prediction.id
+
+    async def dashboard(self, scope, receive, send):
+        user_id, error = self._identity(scope)
+        if user_id is None:
+            return await self.send_json(send, 401, {"msg": error})
+        payload = await self.run_db(self._dashboard, user_id)
+        return await self.send_json(send, 200, payload)
+
+    @staticmethod
+    def _dashboard(user_id):
+        return dashboard_payload(dashboard_predictions(user_id))
+
+    async def result(self, scope, receive, send, pred_id):
+        user_id, error = self._identity(scope)
+        if user_id is None:
+            return await self.send_json(send, 401, {"msg": error})
+        status, entry = await self.run_db(self._result, user_id, pred_id)
+        if status != 200:
+            return await self.send_json(send, status, entry)
+
+        from werkzeug.http import parse_etags
+        from .result_cache import CACHE_CONTROL
+        headers = [(b'etag', f'"{entry.etag}"'.encode('ascii')),
+                   (b'cache-control', CACHE_CONTROL.encode('ascii')), (b'vary', b'Authorization')]
+        if_none_match = dict(scope['headers']).get(b'if-none-match')
+        if if_none_match and parse_etags(if_none_match.decode('latin-1')).contains(entry.etag):
+            return await self.send_body(send, 304, b'', headers)
+        return await self.send_body(send, 200, entry.body, headers)
+
+    @staticmethod
+    def _result(user_id, pred_id):
+        from flask import current_app
+        from .api.data import get_data_pricing
+        from .models import User
+        from . import result_cache
+        entry = result_cache.get(pred_id, get_data_pricing().version,
+                                 current_app.config.get('RESULT_CACHE_SIZE', 1024))
+        if not entry:
+            return 404, {"msg": "Estimation not found"}
+        if entry.owner_id != user_id:
+            user = User.query.get(user_id)
+            if not user or not user.is_admin:
+                return 403, {"msg": "Unauthorized: You do not own this estimation"}
+        return 200, entry
+
+def create_asgi_app(flask_app=None, **kwargs):
+    if flask_app is None:
+        from . import create_app
+        flask_app = create_app()
+    return AsyncDataAPI(flask_app, **kwargs)
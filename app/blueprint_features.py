@@ -1,13 +1,23 @@
-from PIL import Image
 import io
 
-def extract_blueprint_features(image_bytes):
+def extract_blueprint_features(image_bytes, tiled=None):
     """
     Simpler, lightweight feature extraction using Pillow.
     Avoids heavy OpenCV/Numpy dependencies to fit within Vercel's 250MB limit.
+    Accepts raw bytes or a seekable binary stream (see app/uploads.py), which
+    Pillow reads in place; only the header is decoded to get the size.
+    With `tiled` (TileOptions, see app/blueprint_tiles.py), multi-page and
+    very large scans are decoded and measured tile by tile instead.
     """
     try:
-        img = Image.open(io.BytesIO(image_bytes))
+        from PIL import Image  # Pillow is loaded on the first upload only
+        source = image_bytes if hasattr(image_bytes, 'read') else io.BytesIO(image_bytes)
+        img = Image.open(source)
+        if tiled is not None:
+            from .blueprint_tiles import extract_tiled_features, needs_tiling
+            if needs_tiling(img, tiled):
+                source.seek(0)
+                return extract_tiled_features(source, tiled)[0]
         width, height = img.size
         
         # Use pixel area and aspect ratio as heuristics
@@ -0,0 +1,280 @@
+"""
+Tiled feature extraction for multi-page and very large blueprint scans.
+
+The default extractor (app/blueprint_features.py) only reads the image
+header. With BLUEPRINT_TILED enabled, scans with several pages or more
+than BLUEPRINT_TILE_MIN_PIXELS are measured instead:
+
+  * every page is decoded once, in its own thread (Pillow releases the GIL
+    while decoding), converted to greyscale and thresholded;
+  * the page is cut into overlapping tiles that are measured in parallel:
+    wall pixels, wall transitions along rows and columns (a dark line of
+    length L crosses ~2L pixel boundaries, so transitions / 2 ~ drawn wall
+    length, whatever the stroke width) and the bounding box of the walls.
+    Only the tile's core is counted; the overlap gives the seam context;
+  * tile stats are summed per page and pages are merged into the usual
+    area/rooms/wall features.
+
+The upload is never copied into memory: every page thread reads the
+(spooled) source through its own position-tracking handle. The memory
+budget caps the decoded pages alive at once; a page holds its share from
+decode until its last tile is measured. JPEG pages larger than the budget
+are decoded at reduced scale (draft mode). `progress(done, total)` is
+called as tiles finish; the estimate views log it at debug level.
+"""
+import io
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+THRESHOLD = 128          # darker pixels are drawing (walls)
+DECODE_BYTES_PER_PX = 4  # RGB decode + greyscale copy
+
+class TileOptions:
+    __slots__ = ("tile_px", "overlap", "workers", "memory_budget", "min_pixels", "progress")
+
+    def __init__(self, tile_px=2048, overlap=16, workers=0, memory_budget_mb=256, min_pixels=16_000_000,
+                 progress=None):
+        self.tile_px = max(64, int(tile_px))
+        self.overlap = max(1, int(overlap))
+        self.workers = int(workers) or os.cpu_count() or 1
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.min_pixels = int(min_pixels)
+        self.progress = progress
+
+def tile_options(config, logger=None):
+    """TileOptions from the app config, or None when tiled mode is off. Progress goes to `logger.debug`."""
+    if not config.get('BLUEPRINT_TILED'):
+        return None
+    return TileOptions(tile_px=config.get('BLUEPRINT_TILE_PX', 2048),
+                       overlap=config.get('BLUEPRINT_TILE_OVERLAP', 16),
+                       workers=config.get('BLUEPRINT_TILE_WORKERS', 0),
+                       memory_budget_mb=config.get('BLUEPRINT_MEMORY_BUDGET_MB', 256),
+                       min_pixels=config.get('BLUEPRINT_TILE_MIN_PIXELS', 16_000_000),
+                       progress=log_progress(logger) if logger else None)
+
+def log_progress(logger, every=64):
+    """A progress callback that logs every `every` tiles and whenever the known tiles are all done."""
+    def progress(done, total):
+        if done == total or done % every == 0:
+            logger.debug("Blueprint tiles: %d/%d", done, total)
+    return progress
+
+def needs_tiling(img, options):
+    return getattr(img, 'n_frames', 1) > 1 or img.size[0] * img.size[1] >= options.min_pixels
+
+def tile_boxes(width, height, tile_px, overlap):
+    """(box, core) pairs: `box` includes the overlap, `core` is the part counted, both in page coordinates."""
+    boxes = []
+    for y in range(0, height, tile_px):
+        for x in range(0, width, tile_px):
+            core = (x, y, min(x + tile_px, width), min(y + tile_px, height))
+            box = (max(0, x - overlap), max(0, y - overlap),
+                   min(width, core[2] + overlap), min(height, core[3] + overlap))
+            boxes.append((box, core))
+    return boxes
+
+_BINARY = [0 if v < THRESHOLD else 255 for v in range(256)]
+
+def measure_tile(page, box, core):
+    """(wall_px, row_transitions, col_transitions, bbox or None) for the core of one tile."""
+    from PIL import ImageChops
+    tile = page.crop(box).point(_BINARY)
+    ox, oy = box[0], box[1]
+    cx0, cy0, cx1, cy1 = core[0] - ox, core[1] - oy, core[2] - ox, core[3] - oy
+
+    core_img = tile.crop((cx0, cy0, cx1, cy1))
+    wall_px = core_img.histogram()[0]
+    # Transition between x-1 and x for every x in the core (x = 0 has no left neighbour)
+    lx = max(cx0, 1)
+    rows = ImageChops.difference(tile.crop((lx, cy0, cx1, cy1)), tile.crop((lx - 1, cy0, cx1 - 1, cy1)))
+    ty = max(cy0, 1)
+    cols = ImageChops.difference(tile.crop((cx0, ty, cx1, cy1)), tile.crop((cx0, ty - 1, cx1, cy1 - 1)))
+    row_t = rows.histogram()[255] if lx < cx1 else 0
+    col_t = cols.histogram()[255] if ty < cy1 else 0
+
+    bbox = core_img.point(lambda v: 255 - v).getbbox() if wall_px else None
+    if bbox:
+        bbox = (bbox[0] + core[0], bbox[1] + core[1], bbox[2] + core[0], bbox[3] + core[1])
+    return wall_px, row_t, col_t, bbox
+
+class _PageReader:
+    """
+    A read-only view of a shared seekable stream with its own position, so
+    each page thread can open the upload without copying it. Reads seek the
+    shared stream under a lock.
+    """
+
+    def __init__(self, stream, lock):
+        self.stream = stream
+        self.lock = lock
+        self.pos = 0
+
+    def read(self, size=-1):
+        with self.lock:
+            self.stream.seek(self.pos)
+            data = self.stream.read(size)
+        self.pos += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            with self.lock:
+                offset += self.stream.seek(0, os.SEEK_END)
+        self.pos = max(0, offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def close(self):
+        pass
+
+def _open_page(reader, index, options):
+    """
+    (image, scale, decoded bytes) for page `index`, not decoded yet. JPEG
+    pages over the memory budget are set to decode at reduced scale.
+    """
+    from PIL import Image
+    img = Image.open(reader)
+    img.seek(index)
+    width, height = img.size
+    scale = 1
+    if width * height * DECODE_BYTES_PER_PX > options.memory_budget and img.format == 'JPEG':
+        scale = math.ceil(math.sqrt(width * height * DECODE_BYTES_PER_PX / options.memory_budget))
+        img.draft('L', (width // scale, height // scale))
+        scale = width / img.size[0]
+    return img, scale, width * height * DECODE_BYTES_PER_PX / (scale * scale)
+
+class _Budget:
+    """Counts decoded bytes in flight; blocks while a new page would exceed the budget."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.leases = 0
+        self.cond = threading.Condition()
+
+    def __call__(self, nbytes):
+        budget = self
+
+        class _Lease:
+            def __enter__(self):
+                with budget.cond:
+                    # A page bigger than the whole budget still runs, alone
+                    budget.cond.wait_for(lambda: budget.used == 0 or budget.used + nbytes <= budget.limit)
+                    budget.used += nbytes
+                    budget.leases += 1
+
+            def __exit__(self, *exc):
+                with budget.cond:
+                    budget.used -= nbytes
+                    budget.leases -= 1
+                    budget.cond.notify_all()
+        return _Lease()
+
+class _Progress:
+    def __init__(self, callback):
+        self.callback = callback
+        self.done = 0
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def add(self, total=0, done=0):
+        with self.lock:
+            self.total += total
+            self.done += done
+            done, total = self.done, self.total
+        if self.callback and done:
+            self.callback(done, total)
+
+def _page_features(page, scale, pool, options, progress):
+    boxes = tile_boxes(page.size[0], page.size[1], options.tile_px, options.overlap)
+    progress.add(total=len(boxes))
+    stats = []
+
+    def run(box, core):
+        result = measure_tile(page, box, core)
+        progress.add(done=1)
+        return result
+
+    # Tiles of one page fan out on the shared pool; this thread waits for them
+    stats = [f.result() for f in [pool.submit(run, box, core) for box, core in boxes]]
+    wall_px = sum(s[0] for s in stats)
+    transitions = sum(s[1] + s[2] for s in stats)
+    boxes = [s[3] for s in stats if s[3]]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes)) if boxes else None
+    return {"size": page.size, "scale": scale, "wall_px": wall_px,
+            "wall_len_px": transitions / 2.0, "bbox": bbox, "tiles": len(stats)}
+
+def page_to_features(stats, source_size):
+    """Area/rooms/wall features for one measured page (same heuristics and clamps as the single-frame path)."""
+    width, height = source_size
+    sqft = max(400, min((width * height) / 1000000.0 * 1200, 5000))
+    px_w, px_h = stats["size"]
+    ft_per_px = math.sqrt(sqft / (px_w * px_h))
+    walls_ft = stats["wall_len_px"] * ft_per_px
+    side = math.sqrt(sqft)
+    if stats["bbox"]:
+        x0, y0, x1, y1 = stats["bbox"]
+        external_ft = 2 * ((x1 - x0) + (y1 - y0)) * ft_per_px
+    else:
+        external_ft = 4 * side
+    # Inverse of the takeoff's partition model: internal = 2 (sqrt(rooms) - 1) * side
+    internal_ft = max(walls_ft - external_ft, 0)
+    rooms = (internal_ft / (2 * side) + 1) ** 2
+    return {
+        "area_sqft_estimate": round(sqft, 1),
+        "rooms_estimate": max(1, min(int(round(rooms)), 10)),
+        "wall_length_ft": round(max(60, min(external_ft, 1000)), 1),
+    }
+
+def extract_tiled_features(source, options):
+    """
+    Features for a multi-page or very large scan. `source` is bytes or a
+    seekable binary stream. Pages are merged: the largest page gives the
+    plate area, rooms and wall length are averaged over pages. Returns
+    (features, stats).
+    """
+    from PIL import Image
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    lock = threading.Lock()
+    with Image.open(_PageReader(stream, lock)) as img:
+        sizes = []
+        for index in range(getattr(img, 'n_frames', 1)):
+            img.seek(index)
+            sizes.append(img.size)
+
+    budget = _Budget(options.memory_budget)
+    progress = _Progress(options.progress)
+    # Page threads only decode and wait on their tiles, so they get their own pool
+    with ThreadPoolExecutor(options.workers, thread_name_prefix='tiles') as tiles, \
+            ThreadPoolExecutor(min(len(sizes), options.workers), thread_name_prefix='pages') as pages:
+        def run_page(index):
+            img, scale, nbytes = _open_page(_PageReader(stream, lock), index, options)
+            # The lease covers the decoded page until its last tile is measured
+            with img, budget(nbytes):
+                page = img.convert('L')
+                return _page_features(page, scale, tiles, options, progress)
+        measured = list(pages.map(run_page, range(len(sizes))))
+
+    per_page = [page_to_features(m, size) for m, size in zip(measured, sizes)]
+    main = max(range(len(sizes)), key=lambda i: sizes[i][0] * sizes[i][1])
+    features = {
+        "area_sqft_estimate": per_page[main]["area_sqft_estimate"],
+        "rooms_estimate": int(round(sum(p["rooms_estimate"] for p in per_page) / len(per_page))),
+        "wall_length_ft": round(sum(p["wall_length_ft"] for p in per_page) / len(per_page), 1),
+    }
+    stats = {"pages": len(sizes), "tiles": sum(m["tiles"] for m in measured),
+             "wall_px": sum(m["wall_px"] for m in measured)}
+    return features, stats
@@ -0,0 +1,181 @@
+"""
+Calibration of the estimator from historical records (see app/ingest.py).
+
+For every city×quality group the per-sqft material factors and a cost
+multiplier are fitted by least squares on the estimator's own form:
+
+    quantity_m          ~ factor_m * area_sqft
+    total_cost / floors ~ rate * area_sqft
+    multiplier          = rate / sum(factor_m * base_price_m)
+
+Only the sufficient statistics of each group (X'X, X'Y and the row count)
+are kept in the artifact, so a refit folds in records newer than
+`last_record_id` instead of rescanning the table. Artifacts are versioned
+JSON files (`calibration-0001.json`, ...) and CostEstimatorModel loads the
+newest one. NumPy is only needed to run the fit, not to load the artifact.
+"""
+import json
+import os
+from datetime import datetime
+
+MATERIALS = ["bricks", "cement", "steel", "paint", "labor"]  # CostEstimatorModel.material_data keys
+QTY_COLUMNS = ["bricks_count", "cement_bags", "steel_kg", "paint_liters", "worker_days"]
+# unit_costs.json "base" keys and compute_cost_breakdown's defaults, price per unit of quantity
+BASE_PRICES = [("brick_per_1000", 6500, 1 / 1000), ("cement_bag", 380, 1), ("steel_kg", 78, 1),
+               ("paint_liter", 260, 1), ("labor_day", 1000, 1)]
+FEATURES = ["area_sqft"]
+GLOBAL = "*"
+MIN_GROUP_ROWS = 3
+CHUNK_ROWS = 50000
+
+def group_key(city, quality):
+    if quality == 'economical': quality = 'basic'
+    return f"{city}|{quality}"
+
+def calibration_dir(app=None):
+    from flask import current_app, has_app_context
+    if app is None and not has_app_context():
+        return os.environ.get('CALIBRATION_DIR')
+    app = app or current_app
+    return app.config.get('CALIBRATION_DIR') or os.path.join(app.instance_path, 'calibration')
+
+def artifact_versions(path):
+    if not path or not os.path.isdir(path):
+        return []
+    versions = []
+    for name in os.listdir(path):
+        if name.startswith('calibration-') and name.endswith('.json'):
+            try:
+                versions.append(int(name[len('calibration-'):-len('.json')]))
+            except ValueError:
+                pass
+    return sorted(versions)
+
+def artifact_path(path, version):
+    return os.path.join(path, f"calibration-{version:04d}.json")
+
+def load_current(app=None):
+    """The newest calibration artifact, or None if nothing has been fitted yet."""
+    path = calibration_dir(app)
+    versions = artifact_versions(path)
+    if not versions:
+        return None
+    with open(artifact_path(path, versions[-1]), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _record_chunks(after_id):
+    from . import db
+    from .models import HistoricalRecord as H
+    q = (db.session.query(H.id, H.city, H.quality, H.floors, H.area_sqft, H.bricks_count, H.cement_bags,
+                          H.steel_kg, H.paint_liters, H.worker_days, H.total_cost)
+         .filter(H.id > after_id).order_by(H.id))
+    chunk = []
+    for row in q.yield_per(CHUNK_ROWS):
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _accumulate(stats, chunk):
+    """Adds one chunk of records to the per-group X'X / X'Y sums; returns rows used."""
+    import numpy as np
+    nan = float('nan')
+    values = np.array([[nan if v is None else v for v in row[3:]] for row in chunk], dtype=float)
+    floors, area, qty, total = values[:, 0], values[:, 1], values[:, 2:7], values[:, 7]
+    usable = np.isfinite(qty).all(axis=1) & np.isfinite(total) & np.isfinite(area) & (floors > 0)
+    if not usable.any():
+        return 0
+
+    keys = np.array([group_key(row[1], row[2]) for row in chunk], dtype=object)[usable]
+    X = area[usable, None]
+    Y = np.column_stack([qty[usable], total[usable] / floors[usable]])
+    groups, inverse = np.unique(keys, return_inverse=True)
+
+    xtx = np.zeros((len(groups), X.shape[1], X.shape[1]))
+    xty = np.zeros((len(groups), X.shape[1], Y.shape[1]))
+    np.add.at(xtx, inverse, X[:, :, None] * X[:, None, :])
+    np.add.at(xty, inverse, X[:, :, None] * Y[:, None, :])
+    counts = np.bincount(inverse, minlength=len(groups))
+
+    for g, key in enumerate(groups):
+        for name in (key, GLOBAL):
+            s = stats.setdefault(name, {"n": 0, "xtx": 0.0, "xty": 0.0})
+            s["n"] += int(counts[g])
+            s["xtx"] = s["xtx"] + xtx[g]
+            s["xty"] = s["xty"] + xty[g]
+    return int(usable.sum())
+
+def _fit(stats, base_prices):
+    """Solves every group's normal equations in one batched pseudo-inverse."""
+    import numpy as np
+    names = [k for k, s in stats.items() if s["n"] >= MIN_GROUP_ROWS]
+    fitted = {}
+    if names:
+        XtX = np.stack([np.asarray(stats[k]["xtx"], dtype=float) for k in names])
+        XtY = np.stack([np.asarray(stats[k]["xty"], dtype=float) for k in names])
+        coef = np.linalg.pinv(XtX) @ XtY  # (groups, features, targets)
+        for name, c in zip(names, coef):
+            factors = dict(zip(MATERIALS, (float(v) for v in c[0, :len(MATERIALS)])))
+            unit_rate = sum(factors[m] * p for m, p in zip(MATERIALS, base_prices))
+            rate = float(c[0, len(MATERIALS)])
+            fitted[name] = {"factors": factors, "multiplier": rate / unit_rate if unit_rate > 0 else None}
+    return fitted
+
+def calibrate(unit_costs, full=False, app=None):
+    """
+    Folds historical records newer than the current artifact into its
+    statistics and writes the next version. Returns (artifact, new_rows);
+    nothing is written when there are no new usable rows (artifact may be None).
+    """
+    import numpy as np
+    path = calibration_dir(app)
+    previous = None if full else load_current(app)
+
+    stats = {}
+    last_id = 0
+    if previous:
+        last_id = previous["last_record_id"]
+        for name, g in previous["groups"].items():
+            stats[name] = {"n": g["n"], "xtx": np.array(g["xtx"]), "xty": np.array(g["xty"])}
+
+    new_rows = 0
+    for chunk in _record_chunks(last_id):
+        new_rows += _accumulate(stats, chunk)
+        last_id = chunk[-1][0]
+    if new_rows == 0:
+        return previous, 0
+
+    base = unit_costs.get('base', {})
+    base_prices = [base.get(key, default) * scale for key, default, scale in BASE_PRICES]
+    fitted = _fit(stats, base_prices)
+
+    versions = artifact_versions(path)
+    version = (versions[-1] if versions else 0) + 1
+    artifact = {
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(timespec='seconds'),
+        "last_record_id": last_id,
+        "rows": stats[GLOBAL]["n"] if GLOBAL in stats else 0,
+        "features": FEATURES,
+        "targets": QTY_COLUMNS + ["total_cost_per_floor"],
+        "base_prices": dict(zip(MATERIALS, base_prices)),
+        "groups": {
+            name: {
+                "n": s["n"],
+                "factors": fitted.get(name, {}).get("factors"),
+                "multiplier": fitted.get(name, {}).get("multiplier"),
+                "xtx": np.asarray(s["xtx"]).tolist(),
+                "xty": np.asarray(s["xty"]).tolist(),
+            }
+            for name, s in sorted(stats.items())
+        },
+    }
+
+    os.makedirs(path, exist_ok=True)
+    target = artifact_path(path, version)
+    with open(target + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, indent=1)
+    os.replace(target + '.tmp', target)
+    return artifact, new_rows
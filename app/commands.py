@@ -0,0 +1,166 @@
+import click
+
+def register_commands(app):
+    """Attach the maintenance CLI commands (`flask --app wsgi <command>`)."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create database tables and record the schema marker."""
+        from .schema import create_schema
+        marker = create_schema(app)
+        click.echo(f"Schema ready ({marker})")
+
+    @app.cli.command('compress-assets')
+    def compress_assets_command():
+        """Pre-compress the built SPA (client/dist) into .gz/.br siblings."""
+        from .static_assets import compress_assets
+        written = compress_assets(app.static_folder)
+        click.echo(f"Wrote {len(written)} compressed assets")
+
+    @app.cli.command('export-predictions')
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson', 'parquet']), default='csv')
+    @click.option('--output', '-o', default='-', help="File path, or - for stdout (csv/ndjson only).")
+    @click.option('--start', help="ISO date/datetime, inclusive.")
+    @click.option('--end', help="ISO date (whole day included) or datetime, exclusive.")
+    @click.option('--city')
+    @click.option('--user-id', type=int)
+    def export_predictions_command(fmt, output, start, end, city, user_id):
+        """Stream predictions to CSV, NDJSON or Parquet."""
+        from . import export
+        try:
+            filters = {"start": export.parse_date(start), "end": export.parse_date(end, end=True),
+                       "city": city, "user_id": user_id}
+        except ValueError:
+            raise click.BadParameter("start/end must be ISO dates")
+        if fmt == 'parquet':
+            if not export.parquet_available():
+                raise click.UsageError("Parquet export requires pyarrow")
+            if output == '-':
+                raise click.UsageError("Parquet export needs --output")
+
+        stats = export.ExportStats()
+        rows = export.iter_rows(stats=stats, **filters)
+        if fmt == 'parquet':
+            export.write_parquet(rows, output)
+        else:
+            with click.open_file(output, 'w', encoding='utf-8') as out:
+                for chunk in export.stream(fmt, rows):
+                    out.write(chunk)
+        click.echo(f"Exported {stats.summary()}", err=True)
+
+    @app.cli.command('portfolio-report')
+    @click.argument('user_id', type=int)
+    @click.option('--output', '-o', required=True, help="PDF file to write.")
+    @click.option('--start', help="ISO date/datetime, inclusive.")
+    @click.option('--end', help="ISO date (whole day included) or datetime, exclusive.")
+    def portfolio_report_command(user_id, output, start, end):
+        """Write a user's estimates as one portfolio PDF (app/portfolio.py)."""
+        from . import export
+        from .models import User
+        from .portfolio import write_portfolio
+        user = User.query.get(user_id)
+        if user is None:
+            raise click.BadParameter(f"no user {user_id}")
+        try:
+            rows = export.iter_rows(start=export.parse_date(start), end=export.parse_date(end, end=True),
+                                    user_id=user_id)
+        except ValueError:
+            raise click.BadParameter("start/end must be ISO dates")
+        with open(output, 'wb') as f:
+            stats = write_portfolio(rows, f, owner={"name": user.username, "email": user.email})
+        click.echo(f"Wrote {output}: {stats.summary()}")
+
+    @app.cli.command('import-history')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--rejects', help="Where to write rejected rows (default: instance/imports/).")
+    @click.option('--batch-size', type=int, default=5000, show_default=True)
+    def import_history_command(path, rejects, batch_size):
+        """Bulk-load a historical cost CSV into the historical_record table."""
+        import os
+        from . import ingest
+        from .cost_model import load_unit_costs
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            try:
+                stats, reject_path = ingest.import_csv(f, load_unit_costs(), source=os.path.basename(path),
+                                                       reject_path=rejects, batch_size=batch_size)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        result = stats.as_dict()
+        click.echo(f"Imported {result['inserted']}/{result['rows']} rows in {result['seconds']}s "
+                   f"({result['rows_per_sec']:,} rows/sec), {result['rejected']} rejected")
+        if reject_path:
+            click.echo(f"Rejected rows: {reject_path}")
+
+    @app.cli.command('calibrate')
+    @click.option('--full', is_flag=True, help="Refit from scratch instead of folding in new records.")
+    def calibrate_command(full):
+        """Fit per city×quality factors/multipliers from historical records."""
+        from .calibration import calibrate, calibration_dir, artifact_path
+        from .cost_model import load_unit_costs
+        try:
+            artifact, new_rows = calibrate(load_unit_costs(), full=full)
+        except ImportError:
+            raise click.ClickException("Calibration requires numpy (pip install numpy)")
+        if not new_rows:
+            if artifact:
+                click.echo(f"No new historical records; calibration v{artifact['version']} is current")
+            else:
+                click.echo("No historical records to calibrate from (see import-history)")
+            return
+        fitted = sum(1 for g in artifact['groups'].values() if g['factors'])
+        click.echo(f"Calibration v{artifact['version']}: +{new_rows} records ({artifact['rows']} total), "
+                   f"{fitted} groups fitted -> {artifact_path(calibration_dir(), artifact['version'])}")
+        click.echo("Restart the app workers to load it.")
+
+    @app.cli.command('compact-predictions')
+    @click.option('--batch-size', type=int, default=5000, show_default=True)
+    @click.option('--zstd', 'use_zstd', is_flag=True,
+                  help="Also compress with a zstd dictionary trained on the table (needs zstandard).")
+    @click.option('--expand', is_flag=True, help="Move compact rows back to the JSON columns.")
+    @click.option('--vacuum', is_flag=True, help="Run VACUUM afterwards to return freed pages (SQLite).")
+    def compact_predictions_command(batch_size, use_zstd, expand, vacuum):
+        """Rewrite stored predictions to/from the compact binary format, in chunks."""
+        from . import compact, db
+
+        def progress(stats):
+            click.echo(f"  {stats.rows:,} rows", err=True)
+
+        if expand:
+            stats = compact.expand_rows(batch_size, progress=progress)
+        else:
+            compressor = None
+            if use_zstd:
+                try:
+                    dict_id = compact.train_dictionary(compact.sample_blobs(), app=app)
+                except ImportError:
+                    raise click.ClickException("--zstd requires the zstandard package")
+                compressor = compact.Compressor(dict_id)
+                click.echo(f"Trained zstd dictionary {dict_id}", err=True)
+            stats = compact.compact_rows(batch_size, compressor=compressor, progress=progress)
+        click.echo(f"{'Expanded' if expand else 'Compacted'} {stats.summary()}")
+        if stats.skipped:
+            click.echo(f"{stats.skipped} rows changed during the run; run again to pick them up")
+        if vacuum and db.engine.dialect.name == 'sqlite':
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql("VACUUM")
+            click.echo("VACUUM done")
+
+    @app.cli.command('archive-predictions')
+    @click.option('--older-than-days', type=int, help="Defaults to ARCHIVE_AFTER_DAYS.")
+    def archive_predictions_command(older_than_days):
+        """Move old predictions into per-month columnar files under instance/archive/."""
+        from datetime import datetime, timedelta
+        from .archive import ArchiveError, archive, archive_dir
+        days = older_than_days if older_than_days is not None else app.config.get('ARCHIVE_AFTER_DAYS', 365)
+        before = datetime.utcnow() - timedelta(days=days)
+
+        def progress(month, rows):
+            click.echo(f"  {month}: {rows:,} rows", err=True)
+
+        try:
+            stats = archive(before, app=app, progress=progress)
+        except ImportError:
+            raise click.ClickException("Archiving requires numpy (pip install numpy)")
+        except ArchiveError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Archived {stats.summary()} -> {archive_dir(app)}")
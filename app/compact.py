@@ -0,0 +1,358 @@
+"""
+Compact binary encoding of a Prediction's inputs / quantities / breakdown.
+
+The three JSON Text columns repeat the same key names in every row. With
+PREDICTION_STORAGE = "compact" they are stored together in the `details`
+BLOB instead:
+
+    byte 0      format version (0xC1)
+    byte 1      flags: bit 0 = zstd-compressed body (uint32 dictionary id follows)
+    byte 2      layout: 'F' fixed, 'G' generic
+    body        fixed: one struct for the standard estimate schema (93 bytes)
+                generic: tagged key/value sections for anything else
+
+Key names and common strings (cities, qualities) are coded against frozen
+tables, so a row that matches the schema the estimator writes costs one
+struct.unpack to decode. Rows with extra keys or unusual types use the
+generic layout and still round-trip exactly. zstd dictionary compression
+is optional and only used when the `zstandard` package is installed.
+"""
+import json
+import os
+import struct
+import time
+
+VERSION = 0xC1
+FLAG_ZSTD = 0x01
+
+# Frozen code tables for format 0xC1: append only, never reorder.
+KEYS = ("city", "quality", "floors", "carpet_ratio", "is_commercial", "area_sqft_estimate",
+        "rooms_estimate", "wall_length_ft", "bricks_count", "cement_bags", "steel_kg",
+        "paint_liters", "worker_days", "bricks", "cement", "steel", "paint", "labor")
+STRINGS = ("Chennai", "Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Kolkata", "Pune", "Ahmedabad",
+           "Jaipur", "Coimbatore", "economical", "basic", "standard", "premium", "high-end",
+           "true", "false", "")
+_KEY_CODES = {k: i for i, k in enumerate(KEYS)}
+_STRING_CODES = {s: i for i, s in enumerate(STRINGS)}
+
+INPUT_KEYS = ("city", "quality", "floors", "carpet_ratio", "is_commercial",
+              "area_sqft_estimate", "rooms_estimate", "wall_length_ft")
+QTY_KEYS = ("bricks_count", "cement_bags", "steel_kg", "paint_liters", "worker_days")
+COST_KEYS = ("bricks", "cement", "steel", "paint", "labor")
+
+_HEADER = struct.Struct('<BBc')
+_DICT_ID = struct.Struct('<I')
+# city, quality, floors, carpet_ratio, is_commercial, area, rooms, wall, 5 quantities, 5 costs, int-flags
+_FIXED = struct.Struct('<BBHdBdHd5i5dB')
+_INT_FLAG_FIELDS = ("carpet_ratio", "area_sqft_estimate", "wall_length_ft")
+
+class CompactError(ValueError):
+    pass
+
+# ------------------------------------------------------------ fixed layout
+
+def _is_num(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def _fits_fixed(inputs, quantities, breakdown):
+    if len(inputs) != len(INPUT_KEYS) or any(k not in inputs for k in INPUT_KEYS):
+        return False
+    if len(quantities) != len(QTY_KEYS) or any(type(quantities.get(k)) is not int for k in QTY_KEYS):
+        return False
+    if len(breakdown) != len(COST_KEYS) or any(type(breakdown.get(k)) is not float for k in COST_KEYS):
+        return False
+    if inputs["city"] not in _STRING_CODES or inputs["quality"] not in _STRING_CODES:
+        return False
+    for k in ("floors", "rooms_estimate"):
+        if type(inputs[k]) is not int or not 0 <= inputs[k] <= 0xFFFF:
+            return False
+    if type(inputs["is_commercial"]) is not bool:
+        return False
+    if any(not _is_num(inputs[k]) or float(inputs[k]) != inputs[k] for k in _INT_FLAG_FIELDS):
+        return False
+    if any(not -2**31 <= quantities[k] < 2**31 for k in QTY_KEYS):
+        return False
+    return True
+
+def _pack_fixed(inputs, quantities, breakdown):
+    int_flags = 0
+    for bit, k in enumerate(_INT_FLAG_FIELDS):
+        if type(inputs[k]) is int:
+            int_flags |= 1 << bit
+    return _FIXED.pack(
+        _STRING_CODES[inputs["city"]], _STRING_CODES[inputs["quality"]], inputs["floors"],
+        inputs["carpet_ratio"], inputs["is_commercial"], inputs["area_sqft_estimate"],
+        inputs["rooms_estimate"], inputs["wall_length_ft"],
+        *(quantities[k] for k in QTY_KEYS), *(breakdown[k] for k in COST_KEYS), int_flags)
+
+def _unpack_fixed(buf, offset):
+    v = _FIXED.unpack_from(buf, offset)
+    int_flags = v[18]
+    carpet, area, wall = v[3], v[5], v[7]
+    if int_flags & 1: carpet = int(carpet)
+    if int_flags & 2: area = int(area)
+    if int_flags & 4: wall = int(wall)
+    inputs = {
+        "city": STRINGS[v[0]], "quality": STRINGS[v[1]], "floors": v[2], "carpet_ratio": carpet,
+        "is_commercial": bool(v[4]), "area_sqft_estimate": area, "rooms_estimate": v[6],
+        "wall_length_ft": wall,
+    }
+    return inputs, dict(zip(QTY_KEYS, v[8:13])), dict(zip(COST_KEYS, v[13:18]))
+
+# ------------------------------------------------------------ generic layout
+
+def _pack_value(out, v):
+    if v is None:
+        out += b'N'
+    elif v is True:
+        out += b'T'
+    elif v is False:
+        out += b'F'
+    elif type(v) is int and -2**63 <= v < 2**63:
+        out += b'q' + struct.pack('<q', v)
+    elif type(v) is float:
+        out += b'd' + struct.pack('<d', v)
+    elif type(v) is str and v in _STRING_CODES:
+        out += b's' + bytes((_STRING_CODES[v],))
+    elif type(v) is str and len(v.encode('utf-8')) < 0x10000:
+        data = v.encode('utf-8')
+        out += b'S' + struct.pack('<H', len(data)) + data
+    else:
+        data = json.dumps(v).encode('utf-8')
+        out += b'J' + struct.pack('<I', len(data)) + data
+
+def _unpack_value(buf, pos):
+    tag = buf[pos:pos + 1]
+    pos += 1
+    if tag == b'N': return None, pos
+    if tag == b'T': return True, pos
+    if tag == b'F': return False, pos
+    if tag == b'q': return struct.unpack_from('<q', buf, pos)[0], pos + 8
+    if tag == b'd': return struct.unpack_from('<d', buf, pos)[0], pos + 8
+    if tag == b's': return STRINGS[buf[pos]], pos + 1
+    if tag == b'S':
+        n = struct.unpack_from('<H', buf, pos)[0]
+        return bytes(buf[pos + 2:pos + 2 + n]).decode('utf-8'), pos + 2 + n
+    if tag == b'J':
+        n = struct.unpack_from('<I', buf, pos)[0]
+        return json.loads(bytes(buf[pos + 4:pos + 4 + n])), pos + 4 + n
+    raise CompactError(f"unknown value tag {tag!r}")
+
+def _pack_section(out, d):
+    if not isinstance(d, dict):
+        # Not a mapping: keep it verbatim as JSON
+        out += b'\xff\xff'
+        _pack_value(out, d)
+        return
+    out += struct.pack('<H', len(d))
+    for key, value in d.items():
+        code = _KEY_CODES.get(key)
+        if code is not None:
+            out += bytes((code,))
+        else:
+            data = str(key).encode('utf-8')
+            out += b'\xff' + struct.pack('<H', len(data)) + data
+        _pack_value(out, value)
+
+def _unpack_section(buf, pos):
+    count = struct.unpack_from('<H', buf, pos)[0]
+    pos += 2
+    if count == 0xFFFF:
+        return _unpack_value(buf, pos)
+    d = {}
+    for _ in range(count):
+        code = buf[pos]
+        pos += 1
+        if code == 0xFF:
+            n = struct.unpack_from('<H', buf, pos)[0]
+            key = bytes(buf[pos + 2:pos + 2 + n]).decode('utf-8')
+            pos += 2 + n
+        else:
+            key = KEYS[code]
+        d[key], pos = _unpack_value(buf, pos)
+    return d, pos
+
+# ------------------------------------------------------------ zstd dictionaries
+
+_DICTS = {}
+
+def dict_dir(app=None):
+    from flask import current_app, has_app_context
+    if app is None and not has_app_context():
+        return os.environ.get('COMPACT_DICT_DIR') or 'instance/compact'
+    app = app or current_app
+    return app.config.get('COMPACT_DICT_DIR') or os.path.join(app.instance_path, 'compact')
+
+def _dictionary(dict_id):
+    d = _DICTS.get(dict_id)
+    if d is None:
+        import zstandard
+        with open(os.path.join(dict_dir(), f"zstd-{dict_id}.dict"), 'rb') as f:
+            d = zstandard.ZstdCompressionDict(f.read())
+        _DICTS[dict_id] = d
+    return d
+
+def train_dictionary(samples, size=16 * 1024, app=None):
+    """Trains a zstd dictionary on uncompressed blobs; returns its id."""
+    import zstandard
+    d = zstandard.train_dictionary(size, [blob[_HEADER.size - 1:] for blob in samples])
+    dict_id = d.dict_id()
+    path = dict_dir(app)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, f"zstd-{dict_id}.dict"), 'wb') as f:
+        f.write(d.as_bytes())
+    _DICTS[dict_id] = d
+    return dict_id
+
+class Compressor:
+    """Packs with a trained zstd dictionary (see train_dictionary)."""
+
+    def __init__(self, dict_id, level=3):
+        import zstandard
+        self.dict_id = dict_id
+        self.zstd = zstandard.ZstdCompressor(level=level, dict_data=_dictionary(dict_id))
+
+    def compress(self, blob):
+        payload = blob[_HEADER.size - 1:]  # layout byte + body
+        return (bytes((VERSION, FLAG_ZSTD)) + _DICT_ID.pack(self.dict_id)
+                + self.zstd.compress(payload))
+
+# ------------------------------------------------------------ public API
+
+def pack_details(inputs, quantities, breakdown, compressor=None):
+    if isinstance(inputs, dict) and isinstance(quantities, dict) and isinstance(breakdown, dict) \
+            and _fits_fixed(inputs, quantities, breakdown):
+        blob = _HEADER.pack(VERSION, 0, b'F') + _pack_fixed(inputs, quantities, breakdown)
+    else:
+        out = bytearray(_HEADER.pack(VERSION, 0, b'G'))
+        for section in (inputs, quantities, breakdown):
+            _pack_section(out, section)
+        blob = bytes(out)
+    return compressor.compress(blob) if compressor else blob
+
+def unpack_details(blob):
+    """(inputs, quantities, breakdown) from a details BLOB."""
+    if blob[2:3] == b'F' and blob[0] == VERSION and not blob[1]:
+        return _unpack_fixed(blob, 3)
+    buf = memoryview(blob)
+    if len(buf) < 3 or buf[0] != VERSION:
+        raise CompactError("not a compact prediction payload")
+    if buf[1] & FLAG_ZSTD:
+        import zstandard
+        dict_id = _DICT_ID.unpack_from(buf, 2)[0]
+        payload = zstandard.ZstdDecompressor(dict_data=_dictionary(dict_id)).decompress(bytes(buf[6:]))
+        buf = memoryview(bytes((VERSION, 0)) + payload)
+    if buf[2:3] == b'F':
+        return _unpack_fixed(buf, 3)
+    pos = 3
+    inputs, pos = _unpack_section(buf, pos)
+    quantities, pos = _unpack_section(buf, pos)
+    breakdown, pos = _unpack_section(buf, pos)
+    return inputs, quantities, breakdown
+
+def decode_columns(inputs, quantities, cost_breakdown, details):
+    """Decoded triple for a row read as plain columns (export, similarity index)."""
+    if details is not None:
+        return unpack_details(details)
+    from .json_provider import loads
+    return loads(inputs), loads(quantities), loads(cost_breakdown)
+
+# ------------------------------------------------------------ online migration
+
+class MigrationStats:
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.json_bytes = 0
+        self.compact_bytes = 0
+        self.started = time.perf_counter()
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        saved = 1 - self.compact_bytes / self.json_bytes if self.json_bytes else 0.0
+        return (f"{self.rows} rows in {seconds:.1f}s ({self.rows / seconds if seconds else 0:,.0f} rows/sec); "
+                f"payload {self.json_bytes:,} -> {self.compact_bytes:,} bytes ({saved:.0%} smaller)")
+
+def _rows_to_migrate(column_filter, last_id, batch_size):
+    from . import db
+    from .models import Prediction as P
+    return (db.session.query(P.id, P.inputs, P.quantities, P.cost_breakdown, P.details)
+            .filter(column_filter, P.id > last_id).order_by(P.id).limit(batch_size).all())
+
+def compact_rows(batch_size=5000, compressor=None, progress=None):
+    """
+    Rewrites JSON-stored predictions into `details`, one short transaction
+    per chunk of ids, so the app keeps serving (and writing) meanwhile. The
+    UPDATE only applies while the row's JSON is unchanged, so a concurrent
+    edit is never overwritten; such rows are counted as skipped and picked
+    up by the next run.
+    """
+    from sqlalchemy import bindparam
+    from . import db
+    from .models import Prediction as P
+    from .json_provider import loads
+    table = P.__table__
+    stmt = (table.update()
+            .where(table.c.id == bindparam('pid'), table.c.details.is_(None),
+                   table.c.inputs == bindparam('old_inputs'))
+            .values(details=bindparam('blob'), inputs='', quantities='', cost_breakdown=''))
+    stats = MigrationStats()
+    last_id = 0
+    while True:
+        rows = _rows_to_migrate(P.details.is_(None), last_id, batch_size)
+        if not rows:
+            break
+        params = []
+        for r in rows:
+            blob = pack_details(loads(r.inputs), loads(r.quantities), loads(r.cost_breakdown), compressor)
+            params.append({"pid": r.id, "old_inputs": r.inputs, "blob": blob})
+            stats.json_bytes += len(r.inputs) + len(r.quantities) + len(r.cost_breakdown)
+            stats.compact_bytes += len(blob)
+        updated = db.session.execute(stmt, params).rowcount
+        db.session.commit()
+        stats.rows += len(rows)
+        if updated is not None and updated >= 0:
+            stats.skipped += len(rows) - updated
+        last_id = rows[-1].id
+        if progress:
+            progress(stats)
+    return stats
+
+def expand_rows(batch_size=5000, progress=None):
+    """Reverse of compact_rows: moves `details` back into the JSON columns."""
+    from sqlalchemy import bindparam
+    from . import db
+    from .models import Prediction as P
+    from .json_provider import dumps
+    table = P.__table__
+    stmt = (table.update()
+            .where(table.c.id == bindparam('pid'), table.c.details == bindparam('old_details'))
+            .values(details=None, inputs=bindparam('new_inputs'), quantities=bindparam('new_quantities'),
+                    cost_breakdown=bindparam('new_breakdown')))
+    stats = MigrationStats()
+    last_id = 0
+    while True:
+        rows = _rows_to_migrate(P.details.isnot(None), last_id, batch_size)
+        if not rows:
+            break
+        params = []
+        for r in rows:
+            inputs, quantities, breakdown = unpack_details(r.details)
+            params.append({"pid": r.id, "old_details": r.details, "new_inputs": dumps(inputs),
+                           "new_quantities": dumps(quantities), "new_breakdown": dumps(breakdown)})
+            stats.compact_bytes += len(r.details)
+            stats.json_bytes += sum(len(params[-1][k]) for k in ("new_inputs", "new_quantities", "new_breakdown"))
+        db.session.execute(stmt, params)
+        db.session.commit()
+        stats.rows += len(rows)
+        last_id = rows[-1].id
+        if progress:
+            progress(stats)
+    return stats
+
+def sample_blobs(limit=10000):
+    """Uncompressed blobs for the first `limit` predictions (dictionary training input)."""
+    from . import db
+    from .models import Prediction as P
+    rows = db.session.query(P.inputs, P.quantities, P.cost_breakdown, P.details).limit(limit)
+    return [pack_details(*decode_columns(*r)) for r in rows]
@@ -9,7 +9,8 @@ def load_unit_costs(path=None) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def compute_cost_breakdown(quantities: Dict[str, Any], city: str, quality: str, unit_costs_data: Dict[str, Any]):
+def compute_cost_breakdown(quantities: Dict[str, Any], city: str, quality: str, unit_costs_data: Dict[str, Any],
+                           multiplier: float = None):
     base = unit_costs_data.get('base', {})
     city_mults = unit_costs_data.get('city_multiplier', {})
     qual_mults = unit_costs_data.get('quality_multiplier', {})
@@ -19,7 +20,8 @@ def compute_cost_breakdown(quantities: Dict[str, Any], city: str, quality: str,
     
     city_mult = city_mults.get(city, 1.0)
     qual_mult = qual_mults.get(quality, 1.0)
-    overall_mult = city_mult * qual_mult
+    # A calibrated city×quality multiplier replaces the static pair
+    overall_mult = multiplier if multiplier is not None else city_mult * qual_mult
     
     breakdown = {}
     
@@ -47,7 +49,7 @@ def compute_cost_breakdown(quantities: Dict[str, Any], city: str, quality: str,
     return {"breakdown": breakdown, "total": total}
 
 class CostEstimatorModel:
-    def __init__(self):
+    def __init__(self, calibration=None):
         # Material prediction factors (based on training data trends)
         self.material_data = {
             'cement': 0.4,   # bags per sqft
@@ -57,6 +59,32 @@ class CostEstimatorModel:
             'paint': 0.18,   # liters per sqft
             'labor': 0.12    # days per sqft
         }
+        # Fitted per city×quality factors/multipliers (app/calibration.py artifact)
+        self.calibration = calibration
+
+    def calibrated_group(self, item: Dict[str, Any]):
+        """
+        The calibration group for an input's city/quality. Pairs without a fit
+        get the global fit's material factors but keep the static city×quality
+        multipliers (multiplier None). None when nothing is calibrated.
+        """
+        if not self.calibration:
+            return None
+        groups = self.calibration.get('groups', {})
+        quality = item.get('quality', 'standard')
+        if quality == 'economical': quality = 'basic'
+        group = groups.get(f"{item.get('city', 'Chennai')}|{quality}")
+        if group and group.get('factors'):
+            return group
+        group = groups.get('*')
+        if group and group.get('factors'):
+            return {"factors": group['factors'], "multiplier": None}
+        return None
+
+    def cost_multiplier(self, item: Dict[str, Any]):
+        """The calibrated multiplier predict_total_cost prices `item` with, or None for the static pair."""
+        group = self.calibrated_group(item)
+        return group.get('multiplier') if group else None
         
     def predict(self, data: Dict[str, Any]):
         """
@@ -64,17 +92,19 @@ class CostEstimatorModel:
         data: dictionary containing 'area_sqft'
         """
         if isinstance(data, list) and len(data) > 0:
-            area = data[0].get('area_sqft', 0)
-        else:
-            area = data.get('area_sqft', 0)
+            data = data[0]
+        area = data.get('area_sqft', 0)
+
+        group = self.calibrated_group(data)
+        factors = group['factors'] if group else self.material_data
             
         # Calculate quantities based on factors
         res = [
-            area * self.material_data['bricks'],
-            area * self.material_data['cement'],
-            area * self.material_data['steel'],
-            area * self.material_data['paint'],
-            area * self.material_data['labor']
+            area * factors['bricks'],
+            area * factors['cement'],
+            area * factors['steel'],
+            area * factors['paint'],
+            area * factors['labor']
         ]
         return [res]
 
@@ -112,7 +142,7 @@ class CostEstimatorModel:
             u_costs = {}
             
         # Get breakdown total
-        res = compute_cost_breakdown(q_dict, city, quality, u_costs)
+        res = compute_cost_breakdown(q_dict, city, quality, u_costs, multiplier=self.cost_multiplier(item))
         
         # Multiply by floors (assuming base area is per floor or total area is passed)
         # In this app, area is usually total area, so floors might be a multiplier for height-related complexity
@@ -122,7 +152,28 @@ class CostEstimatorModel:
         
         return [total_cost]
 
-def load_models():
-    """Returns a mockable interface to keep existing code working."""
-    model = CostEstimatorModel()
+def quantity_model_name():
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get('QUANTITY_MODEL', 'area')
+    return os.environ.get('QUANTITY_MODEL', 'area')
+
+def load_models(calibration=None, kind=None):
+    """
+    Returns a mockable interface to keep existing code working. `kind`
+    (default: QUANTITY_MODEL) is "area" for CostEstimatorModel or "takeoff"
+    for the element takeoff in app/takeoff.py.
+    """
+    kind = kind or quantity_model_name()
+    if kind == 'takeoff':
+        from .takeoff import TakeoffModel
+        model = TakeoffModel()
+        return model, model
+    if calibration is None:
+        try:
+            from .calibration import load_current
+            calibration = load_current()
+        except Exception as e:
+            print(f"Calibration Warning: {e}")
+    model = CostEstimatorModel(calibration)
     return model, model
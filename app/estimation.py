@@ -0,0 +1,314 @@
+"""
+The estimate pipeline shared by the WSGI (app/api/data.py) and ASGI
+(app/asgi.py) handlers: request parsing, quantity/cost prediction and the
+PDF/email report. Each step is a plain function so callers can time them,
+run them on an executor or reuse intermediate results.
+"""
+import math
+import os
+from contextlib import nullcontext
+from datetime import datetime
+
+from .cost_model import compute_cost_breakdown
+
+QTY_COLS = ["bricks_count", "cement_bags", "steel_kg", "paint_liters", "worker_days"]
+
+def _no_span(name):
+    return nullcontext()
+
+def default_features():
+    # Defaults if no image
+    return {"area_sqft_estimate": 900, "rooms_estimate": 5, "wall_length_ft": 120}
+
+def _text(value, name):
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value
+
+def _number(value, cast, name):
+    # JSON bodies can carry any type; only numbers and numeric strings are accepted
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise ValueError(f"{name} must be a number")
+    number = cast(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be finite")
+    return number
+
+def parse_estimate_params(form_data, feats):
+    """
+    Normalizes the estimate form (JSON body or multipart fields) and applies
+    the manual overrides to the blueprint features. Raises ValueError on
+    malformed numbers and on fields of the wrong type.
+    """
+    city = _text(form_data.get('city', 'Chennai'), 'city')
+    # quality names in train_models.py: ['economical', 'standard', 'premium', 'high-end']
+    # frontend sends: ['basic', 'standard', 'premium']
+    quality = _text(form_data.get('quality', 'standard'), 'quality').lower()
+    if quality == 'basic': quality = 'economical' # Map basic to economical for model
+
+    floors = _number(form_data.get('floors', 2), int, 'floors')
+    carpet_ratio = _number(form_data.get('carpet_ratio', 0.72), float, 'carpet_ratio')
+    is_commercial = form_data.get('is_commercial', False)
+    if isinstance(is_commercial, (list, dict)):
+        raise ValueError("is_commercial must be a boolean")
+
+    feats = dict(feats)
+    # Overrides - handle empty strings safely
+    area_override = form_data.get('area_sqft')
+    if area_override and area_override != '':
+        feats["area_sqft_estimate"] = _number(area_override, float, 'area_sqft')
+
+    rooms_override = form_data.get('rooms')
+    if rooms_override and rooms_override != '':
+        feats["rooms_estimate"] = _number(rooms_override, int, 'rooms')
+
+    wall_override = form_data.get('wall_length')
+    if wall_override and wall_override != '':
+        feats["wall_length_ft"] = _number(wall_override, float, 'wall_length')
+
+    return {
+        "city": city,
+        "quality": quality,
+        "floors": floors,
+        "carpet_ratio": carpet_ratio,
+        "is_commercial": is_commercial,
+        "feats": feats,
+    }
+
+def model_input(params):
+    # rooms/wall_length_ft/carpet_ratio are only read by the takeoff model (app/takeoff.py)
+    return {
+        "city": params["city"],
+        "quality": params["quality"],
+        "area_sqft": params["feats"]["area_sqft_estimate"],
+        "no_of_floors": params["floors"],
+        "rooms": params["feats"].get("rooms_estimate"),
+        "wall_length_ft": params["feats"].get("wall_length_ft"),
+        "carpet_ratio": params["carpet_ratio"],
+    }
+
+def predict_quantities(q_model, input_data):
+    q = q_model.predict(input_data)[0]
+    return dict(zip(QTY_COLS, [int(round(max(0, v))) for v in q]))
+
+def forecast_2026(total, inflation):
+    years_diff = 2026 - datetime.now().year
+    return total * ((1 + inflation) ** max(0, years_diff))
+
+def stored_inputs(params):
+    return {
+        "city": params["city"],
+        "quality": params["quality"],
+        "floors": params["floors"],
+        "carpet_ratio": params["carpet_ratio"],
+        "is_commercial": params["is_commercial"],
+        **params["feats"]
+    }
+
+def breakdown_multiplier(t_model, input_data):
+    """The calibrated multiplier the total was priced with, so the breakdown adds up to it."""
+    cost_multiplier = getattr(t_model, 'cost_multiplier', None)
+    return cost_multiplier(input_data) if cost_multiplier else None
+
+def run_estimate(params, q_model, t_model, u_costs, inflation, span=None):
+    """
+    Runs quantities -> breakdown -> total -> 2026 forecast for parsed params.
+    `span` is an optional timing context factory (app.instrumentation.span).
+    """
+    span = span or _no_span
+    input_data = model_input(params)
+
+    with span("predict"):
+        qty_pred = predict_quantities(q_model, input_data)
+    with span("breakdown"):
+        cost_res = compute_cost_breakdown(qty_pred, params["city"], params["quality"], u_costs,
+                                          multiplier=breakdown_multiplier(t_model, input_data))
+    with span("total_cost"):
+        total_predicted = max(0, t_model.predict_total_cost(input_data)[0])
+
+    return {
+        "inputs": stored_inputs(params),
+        "quantities": qty_pred,
+        "breakdown": cost_res["breakdown"],
+        "total": total_predicted,
+        "predicted_2026": forecast_2026(total_predicted, inflation),
+    }
+
+# Estimate stages: the stored input fields each one reads and the stages it
+# consumes. Features come from the blueprint (or overrides) and are kept in
+# the stored inputs, so an edit never decodes the image again.
+STAGES = {
+    "features": (("area_sqft_estimate", "rooms_estimate", "wall_length_ft"), ()),
+    "quantities": (("city", "quality", "floors", "carpet_ratio"), ("features",)),  # model_input() fields
+    "breakdown": (("city", "quality"), ("quantities",)),
+    "total": (("city", "quality", "floors", "carpet_ratio"), ("features",)),
+    "forecast": ((), ("total",)),
+    "report": (("is_commercial",), ("quantities", "breakdown", "total", "forecast")),
+}
+
+def dirty_stages(changed_fields):
+    """Stages to recompute after `changed_fields` changed, in pipeline order."""
+    dirty = set()
+    for stage, (fields, upstream) in STAGES.items():  # dict order is topological
+        if set(fields) & set(changed_fields) or dirty & set(upstream):
+            dirty.add(stage)
+    return [stage for stage in STAGES if stage in dirty]
+
+EDITABLE = ("city", "quality", "floors", "carpet_ratio", "is_commercial", "area_sqft", "rooms", "wall_length")
+
+def reestimate(inputs, result, changes, q_model, t_model, u_costs, inflation, span=None):
+    """
+    Applies `changes` (estimate form fields) to a stored estimate and
+    recomputes only the stages downstream of the inputs that changed.
+    `result` holds the stored quantities/breakdown/total/predicted_2026.
+    Returns (new_result, recomputed_stages). Raises ValueError like
+    parse_estimate_params.
+    """
+    span = span or _no_span
+    form = {k: inputs[k] for k in ("city", "quality", "floors", "carpet_ratio", "is_commercial") if k in inputs}
+    form.update(changes)
+    feats = {k: inputs[k] for k in STAGES["features"][0] if k in inputs}
+    params = parse_estimate_params(form, feats)
+
+    new_inputs = stored_inputs(params)
+    changed = [k for k in new_inputs if new_inputs[k] != inputs.get(k)]
+    stages = dirty_stages(changed)
+    new = dict(result, inputs=new_inputs)
+    input_data = model_input(params)
+
+    if "quantities" in stages:
+        with span("predict"):
+            new["quantities"] = predict_quantities(q_model, input_data)
+    if "breakdown" in stages:
+        with span("breakdown"):
+            new["breakdown"] = compute_cost_breakdown(new["quantities"], params["city"], params["quality"],
+                                                      u_costs, breakdown_multiplier(t_model, input_data))["breakdown"]
+    if "total" in stages:
+        with span("total_cost"):
+            new["total"] = max(0, t_model.predict_total_cost(input_data)[0])
+    if "forecast" in stages:
+        new["predicted_2026"] = forecast_2026(new["total"], inflation)
+    return new, stages
+
+def report_data(user, prediction_id, result, date=None):
+    return {
+        'user': {'name': user.username, 'email': user.email},
+        'date': date or datetime.now().strftime("%Y-%m-%d %H:%M"),
+        'id': prediction_id,
+        'inputs': result["inputs"],
+        'quantities': result["quantities"],
+        'breakdown': result["breakdown"],
+        'total': result["total"],
+        'predicted_2026': result["predicted_2026"]
+    }
+
+def send_report(user, prediction_id, result, span=None):
+    """Renders the PDF report and hands it to the mail thread."""
+    from .utils import send_email, generate_pdf
+    span = span or _no_span
+
+    with span("pdf"):
+        pdf_bytes = generate_pdf(report_data(user, prediction_id, result))
+    # Send Email
+    with span("email"):
+        send_email("Your Estimation Report", user.email,
+                   body=f"Hi {user.username},\n\nPlease find attached the detailed cost estimation report.\n\nTotal: Rs. {result['total']:,.2f}",
+                   pdf_bytes=pdf_bytes, pdf_name=f"estimate_{prediction_id}.pdf")
+
+def estimate_response(prediction_id, result, catalog_version=None):
+    # catalog_version: GET /api/data/catalog the client can preview with
+    return {
+        "id": prediction_id,
+        "total_cost": result["total"],
+        "predicted_2026": result["predicted_2026"],
+        "quantities": result["quantities"],
+        "breakdown": result["breakdown"],
+        "pdf_generated": True,
+        "catalog_version": catalog_version,
+    }
+
+def dashboard_query(user_id):
+    """The user's predictions, newest first, loading only the columns the dashboard reads."""
+    from sqlalchemy.orm import load_only
+    from .models import Prediction
+    return (Prediction.query.filter_by(user_id=user_id)
+            .options(load_only(Prediction.id, Prediction.created_at, Prediction.inputs,
+                               Prediction.details, Prediction.total_cost, Prediction.predicted_2026_cost))
+            .order_by(Prediction.created_at.desc()))
+
+def dashboard_predictions(user_id):
+    """Live rows from dashboard_query followed by the user's archived history (app/archive.py)."""
+    from .archive import history
+    return dashboard_query(user_id).all() + history(user_id)
+
+def dashboard_payload(predictions):
+    data = []
+    for p in predictions:
+        data.append({
+            "id": p.id,
+            "date": p.created_at.strftime('%Y-%m-%d'),
+            "city": p.inputs_data.get('city', 'Unknown'),
+            "total_cost": p.total_cost,
+            "predicted_2026": p.predicted_2026_cost
+        })
+
+    total_value = sum(p.total_cost for p in predictions)
+    return {"estimations": data, "total_value": total_value, "count": len(data)}
+
+def result_payload(pred):
+    return {
+        "inputs": pred.inputs_data,
+        "quantities": pred.quantities_data,
+        "breakdown": pred.breakdown_data,
+        "total_cost": pred.total_cost,
+        "predicted_2026": pred.predicted_2026_cost,
+        "date": pred.created_at.strftime('%Y-%m-%d'),
+        "revision": getattr(pred, 'revision', None) or 1,
+    }
+
+def stored_result(pred):
+    """A stored prediction in run_estimate()'s result shape."""
+    return {
+        "inputs": pred.inputs_data,
+        "quantities": pred.quantities_data,
+        "breakdown": pred.breakdown_data,
+        "total": pred.total_cost,
+        "predicted_2026": pred.predicted_2026_cost,
+    }
+
+def reports_dir():
+    from flask import current_app
+    return current_app.config.get('REPORTS_DIR') or os.path.join(current_app.instance_path, 'reports')
+
+def report_path(prediction_id, revision):
+    return os.path.join(reports_dir(), f"estimate_{prediction_id}_r{revision}.pdf")
+
+def render_report(owner, pred):
+    """
+    Path of the PDF for the prediction's current revision, rendering it on
+    first request. Edits only discard the old files (invalidate_reports).
+    """
+    from .utils import generate_pdf
+    revision = getattr(pred, 'revision', None) or 1
+    path = report_path(pred.id, revision)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = report_data(owner, pred.id, stored_result(pred), date=pred.created_at.strftime("%Y-%m-%d %H:%M"))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(generate_pdf(data))
+        os.replace(tmp, path)
+    return path
+
+def invalidate_reports(prediction_id):
+    prefix = f"estimate_{prediction_id}_r"
+    try:
+        names = os.listdir(reports_dir())
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix):
+            try:
+                os.remove(os.path.join(reports_dir(), name))
+            except OSError:
+                pass
@@ -0,0 +1,185 @@
+"""
+Streaming export of predictions for reporting.
+
+Rows are read with `yield_per` (a server-side cursor where the driver
+supports it) as plain column tuples, their JSON columns are decoded and
+flattened one row at a time, and the writers emit fixed-size chunks, so
+memory stays constant however many predictions are exported. Parquet is
+available when pyarrow is installed. Archived months (app/archive.py)
+are streamed ahead of the live table, so exports cover the full history.
+"""
+import csv
+import io
+import itertools
+import json
+import time
+from datetime import datetime, timedelta
+
+from . import db
+from .models import Prediction
+from .estimation import QTY_COLS
+from .json_provider import dumps
+from .compact import decode_columns
+from .archive import iter_archived
+
+BATCH_SIZE = 1000
+
+INPUT_COLS = ["city", "quality", "floors", "carpet_ratio", "is_commercial",
+              "area_sqft_estimate", "rooms_estimate", "wall_length_ft"]
+BREAKDOWN_COLS = ["bricks", "cement", "steel", "paint", "labor"]
+COLUMNS = (["id", "user_id", "created_at", "total_cost", "predicted_2026"]
+           + INPUT_COLS + QTY_COLS + [f"cost_{c}" for c in BREAKDOWN_COLS])
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def parse_date(value, end=False):
+    """ISO date or datetime; a bare `end` date covers that whole day."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+class ExportStats:
+    def __init__(self):
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        return f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/sec)"
+
+def export_query(start=None, end=None, city=None, user_id=None):
+    q = db.session.query(
+        Prediction.id, Prediction.user_id, Prediction.created_at, Prediction.total_cost,
+        Prediction.predicted_2026_cost, Prediction.inputs, Prediction.quantities,
+        Prediction.cost_breakdown, Prediction.details,
+    )
+    if start:
+        q = q.filter(Prediction.created_at >= start)
+    if end:
+        q = q.filter(Prediction.created_at < end)
+    if user_id:
+        q = q.filter(Prediction.user_id == user_id)
+    if city and city.isascii():
+        # Cheap pre-filter on the stored JSON text; iter_rows re-checks the decoded value.
+        # Non-ASCII names are encoded differently by orjson and json, so they skip it.
+        pattern = json.dumps(city).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        q = q.filter(db.or_(Prediction.inputs.like(f'%{pattern}%', escape='\\'),
+                            Prediction.details.isnot(None)))
+    return q.order_by(Prediction.id)
+
+def flatten(row):
+    inputs, quantities, breakdown = decode_columns(row.inputs, row.quantities, row.cost_breakdown, row.details)
+    flat = {
+        "id": row.id,
+        "user_id": row.user_id,
+        "created_at": row.created_at.isoformat(),
+        "total_cost": row.total_cost,
+        "predicted_2026": row.predicted_2026_cost,
+    }
+    for c in INPUT_COLS:
+        flat[c] = inputs.get(c)
+    for c in QTY_COLS:
+        flat[c] = quantities.get(c)
+    for c in BREAKDOWN_COLS:
+        flat[f"cost_{c}"] = breakdown.get(c)
+    return flat
+
+def iter_rows(start=None, end=None, city=None, user_id=None, stats=None):
+    """Archived months first (they are the oldest rows), then the live table."""
+    archived = iter_archived(user_id=user_id, start=start, end=end)
+    live = export_query(start, end, city, user_id).yield_per(BATCH_SIZE)
+    for row in itertools.chain(archived, live):
+        flat = flatten(row)
+        if city and flat["city"] != city:
+            continue
+        if stats:
+            stats.rows += 1
+        yield flat
+
+def csv_chunks(rows, chunk_rows=BATCH_SIZE):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS)
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue()
+
+def ndjson_chunks(rows, chunk_rows=BATCH_SIZE):
+    lines = []
+    for row in rows:
+        lines.append(dumps(row))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _parquet_schema():
+    import pyarrow as pa
+    types = {"id": pa.int64(), "user_id": pa.int64(), "created_at": pa.string(),
+             "city": pa.string(), "quality": pa.string(), "is_commercial": pa.bool_()}
+    return pa.schema([(c, types.get(c, pa.float64())) for c in COLUMNS])
+
+def _flag(value):
+    """is_commercial as stored (bool, or a form string like "true"/"on"); None stays null."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 'on', '1', 'yes')
+    return bool(value)
+
+def parquet_columns(batch):
+    return {c: [_flag(r[c]) if c == "is_commercial" else r[c] for r in batch] for c in COLUMNS}
+
+def write_parquet(rows, sink, batch_rows=BATCH_SIZE * 10):
+    """Writes rows to a file path or binary file object in row groups of `batch_rows`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _parquet_schema()
+
+    def flush(batch, writer):
+        if batch:
+            writer.write_table(pa.Table.from_pydict(parquet_columns(batch), schema=schema))
+
+    with pq.ParquetWriter(sink, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                flush(batch, writer)
+                batch = []
+        flush(batch, writer)
+
+def stream(fmt, rows):
+    """Text chunks for the streaming formats (csv/ndjson)."""
+    if fmt == "csv":
+        return csv_chunks(rows)
+    return ndjson_chunks(rows)
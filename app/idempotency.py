@@ -0,0 +1,178 @@
+"""
+Idempotency-Key support for retried POSTs (the PWA replays estimate
+submissions on flaky networks).
+
+A request carrying `Idempotency-Key` is fingerprinted (path, form/JSON
+fields and the SHA-256 of any uploaded files) and recorded per user in the
+idempotency_record table with a TTL. A retry with the same key gets the
+stored response back instead of re-running the view; a retry that is still
+running in another process gets 409, and reusing a key for a different
+request gets 422. Concurrent duplicates inside one process are collapsed
+onto a single computation (single-flight): followers wait for the leader
+and replay its response. The decorator sits outside @rate_limit, so
+replays do not spend a token; a 429 is not stored.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .models import IdempotencyRecord
+from .uploads import stream_sha256
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# A pending record older than this belongs to a worker that died mid-request
+PENDING_TIMEOUT = timedelta(minutes=2)
+PURGE_EVERY = 200
+
+class _Flight:
+    __slots__ = ("fingerprint", "done", "response")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response = None  # (body, status, mimetype) once the leader finishes
+
+_flights = {}
+_flights_lock = threading.Lock()
+_inserts = 0
+
+def request_fingerprint():
+    h = hashlib.sha256(f"{request.method} {request.path}\n".encode('utf-8'))
+    if request.is_json:
+        h.update(json.dumps(request.get_json(silent=True), sort_keys=True).encode('utf-8'))
+    else:
+        for name, value in sorted(request.form.items(multi=True)):
+            h.update(f"{name}={value}\n".encode('utf-8'))
+        digests = g.setdefault('upload_sha256', {})
+        for name, f in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digests[name] = stream_sha256(f.stream)
+            h.update(f"{name}:{digests[name]}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def upload_sha256(name):
+    """The digest request_fingerprint() already computed for upload `name`, if any (saves a second pass)."""
+    return g.get('upload_sha256', {}).get(name)
+
+def _replay(body, status, mimetype='application/json'):
+    response = make_response(body, status)
+    response.mimetype = mimetype
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _error(message, status):
+    response = make_response(jsonify({"msg": message}), status)
+    if status == 409:
+        response.headers['Retry-After'] = '1'
+    return response
+
+def _purge_expired():
+    global _inserts
+    _inserts += 1
+    if _inserts % PURGE_EVERY == 0:
+        IdempotencyRecord.query.filter(IdempotencyRecord.expires_at < datetime.utcnow()).delete()
+        db.session.commit()
+
+def _claim(user_id, key, fingerprint):
+    """
+    Registers this request as the owner of the key. Returns None when the
+    view should run, else the response to send instead.
+    """
+    now = datetime.utcnow()
+    ttl = timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400))
+    record = IdempotencyRecord.query.filter_by(user_id=user_id, key=key).first()
+
+    if record and record.expires_at > now:
+        if record.fingerprint != fingerprint:
+            return _error(f"{HEADER} was already used for a different request", 422)
+        if record.status == 'complete':
+            return _replay(record.response_body, record.response_status)
+        if now - record.created_at < PENDING_TIMEOUT:
+            return _error("A request with this Idempotency-Key is still being processed", 409)
+
+    if record:
+        # Expired or abandoned: take it over
+        record.fingerprint = fingerprint
+        record.status = 'pending'
+        record.response_status = record.response_body = None
+        record.created_at, record.expires_at = now, now + ttl
+    else:
+        db.session.add(IdempotencyRecord(user_id=user_id, key=key, fingerprint=fingerprint,
+                                         created_at=now, expires_at=now + ttl))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process inserted the same key between our read and write
+        db.session.rollback()
+        return _error("A request with this Idempotency-Key is still being processed", 409)
+    _purge_expired()
+    return None
+
+def _settle(user_id, key, response):
+    record = IdempotencyRecord.query.filter_by(user_id=user_id, key=key).first()
+    if record is None:
+        return
+    if response is None or response.status_code >= 500 or response.status_code == 429:
+        # Failures and rate-limit rejections are not cached, so the client can retry with the same key
+        db.session.delete(record)
+    else:
+        record.status = 'complete'
+        record.response_status = response.status_code
+        record.response_body = response.get_data(as_text=True)
+    db.session.commit()
+
+def idempotent(view):
+    """Makes a JWT-protected POST view honour the Idempotency-Key header."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+
+        user_id = int(get_jwt_identity())
+        fingerprint = request_fingerprint()
+        scope = (user_id, key)
+
+        with _flights_lock:
+            flight = _flights.get(scope)
+            leader = flight is None
+            if leader:
+                flight = _flights[scope] = _Flight(fingerprint)
+
+        if not leader:
+            if flight.fingerprint != fingerprint:
+                return _error(f"{HEADER} was already used for a different request", 422)
+            flight.done.wait(current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 30))
+            if flight.response is None:
+                return _error("A request with this Idempotency-Key is still being processed", 409)
+            return _replay(*flight.response)
+
+        try:
+            early = _claim(user_id, key, fingerprint)
+            if early is not None:
+                flight.response = (early.get_data(), early.status_code, early.mimetype)
+                return early
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                db.session.rollback()
+                _settle(user_id, key, None)
+                raise
+            _settle(user_id, key, response)
+            flight.response = (response.get_data(), response.status_code, response.mimetype)
+            return response
+        finally:
+            flight.done.set()
+            with _flights_lock:
+                _flights.pop(scope, None)
+
+    return wrapper
@@ -0,0 +1,180 @@
+"""
+Bulk import of historical cost datasets (the format of
+app/data/building_cost_dataset.csv) into the historical_record table.
+
+The CSV is parsed as a stream and handled in batches: each row is validated
+and its city/quality normalized against the unit_costs.json vocabularies,
+good rows go to the database with one executemany INSERT per batch, and bad
+rows are written to a reject file with their line number and reason.
+"""
+import csv
+import math
+import os
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from . import db
+from .models import HistoricalRecord
+
+BATCH_SIZE = 5000
+
+CITY_ALIASES = {
+    "bangalore": "Bengaluru",
+    "bombay": "Mumbai",
+    "calcutta": "Kolkata",
+    "madras": "Chennai",
+    "new delhi": "Delhi",
+    "poona": "Pune",
+}
+# unit_costs.json prices three tiers; the training data adds "high-end", which
+# the estimator prices on its own (no unit_costs multiplier), so it is kept as is
+QUALITY_ALIASES = {
+    "economical": "basic",
+    "economy": "basic",
+}
+EXTRA_QUALITIES = ("high-end",)
+HEADER_ALIASES = {"area": "area_sqft", "no_of_floors": "floors"}
+
+REQUIRED = ("city", "quality", "floors", "area_sqft", "total_cost")
+OPTIONAL_FLOATS = ("wall_length_ft", "carpet_ratio", "bricks_count", "cement_bags",
+                   "steel_kg", "paint_liters", "worker_days")
+
+class Vocabulary:
+    def __init__(self, unit_costs):
+        self.cities = {c.lower(): c for c in unit_costs.get("city_multiplier", {})}
+        self.qualities = {q.lower(): q for q in (*unit_costs.get("quality_multiplier", {}), *EXTRA_QUALITIES)}
+
+    def city(self, value):
+        key = value.strip().lower()
+        key = CITY_ALIASES.get(key, key).lower()
+        return self.cities.get(key)
+
+    def quality(self, value):
+        key = value.strip().lower()
+        key = QUALITY_ALIASES.get(key, key)
+        return self.qualities.get(key)
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        seconds = self.seconds
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.rows / seconds) if seconds > 0 else 0,
+        }
+
+def _number(row, key, cast, minimum=None, maximum=None, required=False):
+    raw = (row.get(key) or "").strip()
+    if raw == "":
+        if required:
+            raise ValueError(f"missing {key}")
+        return None
+    try:
+        number = float(raw)
+        if not math.isfinite(number):
+            raise ValueError()
+        value = cast(number)
+    except ValueError:
+        raise ValueError(f"{key} is not a number: {raw!r}")
+    if cast is int and number != value:
+        raise ValueError(f"{key} is not a whole number: {raw!r}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"{key} out of range: {value}")
+    return value
+
+def normalize(row, vocab):
+    """Validated insert values for one CSV row; raises ValueError with the reason."""
+    for key in REQUIRED:
+        if not (row.get(key) or "").strip():
+            raise ValueError(f"missing {key}")
+    city = vocab.city(row["city"])
+    if city is None:
+        raise ValueError(f"unknown city: {row['city']!r}")
+    quality = vocab.quality(row["quality"])
+    if quality is None:
+        raise ValueError(f"unknown quality: {row['quality']!r}")
+
+    values = {
+        "city": city,
+        "quality": quality,
+        "floors": _number(row, "floors", int, 1, 200, required=True),
+        "rooms": _number(row, "rooms", int, 0),
+        "area_sqft": _number(row, "area_sqft", float, 1, required=True),
+        "total_cost": _number(row, "total_cost", float, 1, required=True),
+    }
+    for key in OPTIONAL_FLOATS:
+        values[key] = _number(row, key, float, 0)
+    if values["carpet_ratio"] is not None and values["carpet_ratio"] > 1:
+        raise ValueError(f"carpet_ratio out of range: {values['carpet_ratio']}")
+    return values
+
+def rejects_dir(app=None):
+    app = app or current_app
+    path = app.config.get('IMPORT_REJECTS_DIR') or os.path.join(app.instance_path, 'imports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def import_csv(text_stream, unit_costs, source=None, reject_path=None, batch_size=BATCH_SIZE):
+    """
+    Imports a CSV text stream; returns (ImportStats, reject_path or None).
+    The reject file is only kept when at least one row was rejected.
+    """
+    reader = csv.DictReader(text_stream)
+    if reader.fieldnames is None:
+        raise ValueError("CSV has no header row")
+    reader.fieldnames = [HEADER_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in reader.fieldnames]
+    missing = [c for c in REQUIRED if c not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    vocab = Vocabulary(unit_costs)
+    stats = ImportStats()
+    reject_path = reject_path or os.path.join(
+        rejects_dir(), f"rejects-{datetime.utcnow():%Y%m%d-%H%M%S-%f}.csv")
+    table = HistoricalRecord.__table__
+    imported_at = datetime.utcnow()
+
+    with open(reject_path, 'w', newline='', encoding='utf-8') as reject_file:
+        rejects = csv.writer(reject_file)
+        rejects.writerow(["line", "reason"] + reader.fieldnames)
+        batch = []
+        for row in reader:
+            stats.rows += 1
+            try:
+                values = normalize(row, vocab)
+            except ValueError as e:
+                stats.rejected += 1
+                rejects.writerow([reader.line_num, str(e)] + [row.get(h) for h in reader.fieldnames])
+                continue
+            values["source"] = source
+            values["imported_at"] = imported_at
+            batch.append(values)
+            if len(batch) >= batch_size:
+                db.session.execute(insert(table), batch)
+                db.session.commit()
+                stats.inserted += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(table), batch)
+            db.session.commit()
+            stats.inserted += len(batch)
+
+    if not stats.rejected:
+        os.remove(reject_path)
+        reject_path = None
+    return stats, reject_path
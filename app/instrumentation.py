@@ -0,0 +1,176 @@
+"""
+Request-level performance instrumentation.
+
+When METRICS_ENABLED is set, every request records timing spans for the
+stages it runs (`with span("predict"): ...`), the number and duration of SQL
+statements it issues, and reports them in a `Server-Timing` header. Durations
+are aggregated into in-process histograms served at `/metrics` in Prometheus
+text format (one set per worker process).
+
+When disabled, `span()` returns a shared no-op context manager and the
+SQLAlchemy listeners are never attached.
+"""
+import threading
+import time
+from contextlib import nullcontext
+
+from flask import g, has_request_context, request
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_NOOP = nullcontext()
+_enabled = False
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            base = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f'{self.name}_bucket{{{",".join(base + [f"le={_q(bound)}"])}}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{",".join(base + [_INF])}}} {count}')
+            suffix = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return "\n".join(lines)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+_INF = 'le="+Inf"'
+
+def _q(bound):
+    return f'"{bound:g}"'
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint.",
+    ("endpoint", "method", "status"))
+STAGE_DURATION = Histogram(
+    "request_stage_duration_seconds", "Time spent in instrumented stages.",
+    ("endpoint", "stage"))
+SQL_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements issued per request.",
+    ("endpoint",), buckets=COUNT_BUCKETS)
+SQL_DURATION = Histogram(
+    "db_query_duration_seconds", "Total SQL time per request.", ("endpoint",))
+
+HISTOGRAMS = [REQUEST_DURATION, STAGE_DURATION, SQL_QUERIES, SQL_DURATION]
+
+class RequestTimings:
+    __slots__ = ("start", "spans", "sql_count", "sql_time")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+class _Span:
+    __slots__ = ("name", "timings", "t0")
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.spans.append((self.name, time.perf_counter() - self.t0))
+        return False
+
+def span(name):
+    """Context manager timing one stage of the current request."""
+    if not _enabled or not has_request_context():
+        return _NOOP
+    timings = g.get('_perf')
+    if timings is None:
+        return _NOOP
+    return _Span(name, timings)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_perf_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_perf_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        timings = g.get('_perf')
+        if timings is not None:
+            timings.sql_count += 1
+            timings.sql_time += elapsed
+
+def _start_request():
+    g._perf = RequestTimings()
+
+def _finish_request(response):
+    timings = g.pop('_perf', None)
+    if timings is None:
+        return response
+    total = time.perf_counter() - timings.start
+    endpoint = request.endpoint or "unmatched"
+
+    parts = []
+    for name, duration in timings.spans:
+        STAGE_DURATION.observe(duration, endpoint, name)
+        parts.append(f"{name};dur={duration * 1000:.2f}")
+    parts.append(f'db;dur={timings.sql_time * 1000:.2f};desc="{timings.sql_count} queries"')
+    parts.append(f"total;dur={total * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(parts)
+
+    REQUEST_DURATION.observe(total, endpoint, request.method, str(response.status_code))
+    SQL_QUERIES.observe(timings.sql_count, endpoint)
+    SQL_DURATION.observe(timings.sql_time, endpoint)
+    return response
+
+def render_metrics():
+    return "\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+def init_instrumentation(app):
+    """Hooks the request lifecycle and SQLAlchemy when METRICS_ENABLED is set."""
+    global _enabled
+    if not app.config.get('METRICS_ENABLED'):
+        return False
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    from .api.metrics import metrics_bp
+    app.register_blueprint(metrics_bp)
+    _enabled = True
+    return True
@@ -0,0 +1,59 @@
+"""
+Fast JSON for API responses and the JSON Text columns.
+
+orjson is used when it is installed (JSON_PROVIDER = "auto"), with the
+stdlib `json` module as the fallback. Responses keep Flask's behaviour:
+sorted keys, HTTP dates for datetimes and a trailing newline.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used instead
+    orjson = None
+
+if orjson is not None:
+    _COLUMN_OPTS = orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        """Compact JSON text for a stored column."""
+        return orjson.dumps(obj, option=_COLUMN_OPTS).decode('utf-8')
+
+    loads = orjson.loads
+else:
+    def dumps(obj):
+        """Compact JSON text for a stored column."""
+        return json.dumps(obj, separators=(',', ':'))
+
+    loads = json.loads
+
+class OrjsonProvider(DefaultJSONProvider):
+    options = 0
+    if orjson is not None:
+        options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                   | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def _dumpb(self, obj):
+        # DefaultJSONProvider.default handles dates (HTTP format), Decimal, UUID and dataclasses
+        return orjson.dumps(obj, default=self.default, option=self.options)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+def init_json(app):
+    provider = app.config.get('JSON_PROVIDER', 'auto')
+    if provider == 'auto' and orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -2,6 +2,51 @@ from datetime import datetime
 from . import db, login_manager
 from flask_login import UserMixin
 import json
+from .json_provider import dumps as json_dumps, loads as json_loads
+from .compact import pack_details, unpack_details
+
+class JSONText:
+    """
+    Lazily decoded view of a JSON Text column (`pred.inputs_data`). The text
+    is only parsed on first access and the result is cached until the
+    column changes; assigning encodes the value into the column. Rows stored
+    in the compact format (`details` BLOB, app/compact.py) decode from there.
+    """
+    def __init__(self, column, part=None):
+        self.column = column
+        self.part = part  # index in the compact (inputs, quantities, breakdown) triple
+        self.cache = f"_{column}_decoded"
+
+    @staticmethod
+    def _unpacked(obj):
+        blob = obj.details
+        cached = obj.__dict__.get('_details_decoded')
+        if cached is None or cached[0] is not blob:
+            cached = obj.__dict__['_details_decoded'] = (blob, unpack_details(blob))
+        return cached[1]
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        if self.part is not None and getattr(obj, 'details', None) is not None:
+            return self._unpacked(obj)[self.part]
+        raw = getattr(obj, self.column)
+        cached = obj.__dict__.get(self.cache)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        value = json_loads(raw) if raw is not None else None
+        obj.__dict__[self.cache] = (raw, value)
+        return value
+
+    def __set__(self, obj, value):
+        if self.part is not None and getattr(obj, 'details', None) is not None:
+            triple = list(self._unpacked(obj))
+            triple[self.part] = value
+            obj.details = pack_details(*triple)
+            return
+        raw = json_dumps(value)
+        setattr(obj, self.column, raw)
+        obj.__dict__[self.cache] = (raw, value)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -43,12 +88,73 @@ class Estimation(db.Model):
 class Prediction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    inputs = db.Column(db.Text, nullable=False) # JSON inputs
-    quantities = db.Column(db.Text, nullable=False) # JSON quantities
-    cost_breakdown = db.Column(db.Text, nullable=False) # JSON breakdown
+    inputs = db.Column(db.Text, nullable=False) # JSON inputs ('' when compact)
+    quantities = db.Column(db.Text, nullable=False) # JSON quantities ('' when compact)
+    cost_breakdown = db.Column(db.Text, nullable=False) # JSON breakdown ('' when compact)
+    details = db.Column(db.LargeBinary, nullable=True) # compact inputs/quantities/breakdown (app/compact.py)
     total_cost = db.Column(db.Float, nullable=False)
     predicted_2026_cost = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    revision = db.Column(db.Integer, nullable=True, default=1) # bumped by PATCH /result/<id>; NULL = 1
+    updated_at = db.Column(db.DateTime, nullable=True, index=True) # last PATCH; app/similarity.py re-indexes past it
+
+    # Ids are never reused, so they stay unique across the live table and the archive (app/archive.py)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    inputs_data = JSONText('inputs', 0)
+    quantities_data = JSONText('quantities', 1)
+    breakdown_data = JSONText('cost_breakdown', 2)
+
+    @classmethod
+    def from_result(cls, result, compact=False, **kwargs):
+        """A new row for an estimate result; `compact` stores the payload in `details`."""
+        pred = cls(total_cost=result["total"], predicted_2026_cost=result["predicted_2026"], **kwargs)
+        if compact:
+            pred.details = pack_details(result["inputs"], result["quantities"], result["breakdown"])
+            pred.inputs = pred.quantities = pred.cost_breakdown = ''
+        else:
+            pred.inputs_data = result["inputs"]
+            pred.quantities_data = result["quantities"]
+            pred.breakdown_data = result["breakdown"]
+        return pred
 
     def __repr__(self):
         return f"Prediction('{self.total_cost}', '{self.created_at}')"
+
+class HistoricalRecord(db.Model):
+    """Ground-truth cost records imported for training and calibration (app/ingest.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(50), nullable=False)
+    quality = db.Column(db.String(20), nullable=False)
+    floors = db.Column(db.Integer, nullable=False)
+    rooms = db.Column(db.Integer, nullable=True)
+    area_sqft = db.Column(db.Float, nullable=False)
+    wall_length_ft = db.Column(db.Float, nullable=True)
+    carpet_ratio = db.Column(db.Float, nullable=True)
+    bricks_count = db.Column(db.Float, nullable=True)
+    cement_bags = db.Column(db.Float, nullable=True)
+    steel_kg = db.Column(db.Float, nullable=True)
+    paint_liters = db.Column(db.Float, nullable=True)
+    worker_days = db.Column(db.Float, nullable=True)
+    total_cost = db.Column(db.Float, nullable=False)
+    source = db.Column(db.String(255), nullable=True)
+    imported_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_historical_city_quality', 'city', 'quality'),)
+
+    def __repr__(self):
+        return f"HistoricalRecord('{self.city}', '{self.quality}', '{self.total_cost}')"
+
+class IdempotencyRecord(db.Model):
+    """Stored outcome of a request sent with an Idempotency-Key (app/idempotency.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending | complete
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='uq_idempotency_user_key'),)
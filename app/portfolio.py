@@ -0,0 +1,284 @@
+"""
+Multi-estimate portfolio report: one PDF page per estimate plus summary pages.
+
+generate_pdf() (app/utils.py) builds a new FPDF document per estimate and
+lays out its tables through write_html/table, which is fine for one report
+but costs ~10ms a page. A portfolio of hundreds of estimates is written
+here directly as PDF objects instead:
+
+  * everything that is the same on every page (title band, table frames,
+    row labels, column headings, footer) is drawn once into a template
+    (a Form XObject) that each page references; per-page content streams
+    only hold the values;
+  * fonts are the PDF core fonts (Helvetica/Helvetica-Bold, no embedding),
+    measured with FPDF's metrics for right-aligned numbers;
+  * each page is compressed and emitted as soon as it is laid out, so the
+    document is streamed to a file or an HTTP response; per page only its
+    byte offsets and the few summary fields are kept. The summary pages,
+    page tree and cross-reference table are written at the end.
+
+Rows are the flat dicts of app/export.py (iter_rows), so live and archived
+predictions are covered alike.
+"""
+import zlib
+from datetime import datetime
+
+PAGE_W, PAGE_H = 595.28, 841.89  # A4 in points
+MARGIN = 50.0
+ROWS_PER_SUMMARY_PAGE = 38
+SPEC_ROWS = (("City", "city"), ("Quality", "quality"), ("Floors", "floors"), ("Area (sqft)", "area_sqft_estimate"),
+             ("Rooms", "rooms_estimate"), ("Wall length (ft)", "wall_length_ft"))
+MATERIAL_ROWS = (("Bricks", "bricks", "bricks_count", "Units"), ("Cement", "cement", "cement_bags", "Bags"),
+                 ("Steel", "steel", "steel_kg", "Kg"), ("Paint", "paint", "paint_liters", "L"),
+                 ("Labor", "labor", "worker_days", "Days"))
+SUMMARY_COLS = (("ID", 50), ("Date", 110), ("City", 190), ("Quality", 265), ("Floors", 330), ("Area", 385),
+                ("Total (Rs.)", 470), ("2026 (Rs.)", PAGE_W - MARGIN))
+SPEC_TOP, MATERIAL_TOP, ROW_H = 690.0, 520.0, 20.0
+
+_widths = None
+
+def _char_widths():
+    global _widths
+    if _widths is None:
+        from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+        _widths = {"F1": CORE_FONTS_CHARWIDTHS["helvetica"], "F2": CORE_FONTS_CHARWIDTHS["helveticaB"]}
+    return _widths
+
+def text_width(text, font, size):
+    widths = _char_widths()[font]
+    return sum(widths.get(c, 556) for c in text) * size / 1000.0
+
+def _escape(text):
+    return str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def _text(x, y, text, font="F1", size=10, align="L"):
+    text = str(text)
+    if align == "R":
+        x -= text_width(text, font, size)
+    elif align == "C":
+        x -= text_width(text, font, size) / 2
+    return f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET\n"
+
+def _money(value):
+    return f"{value:,.2f}" if value is not None else "-"
+
+class PortfolioStats:
+    def __init__(self):
+        self.estimates = 0
+        self.pages = 0
+        self.bytes = 0
+        self.started = datetime.utcnow()
+
+    def summary(self):
+        seconds = max((datetime.utcnow() - self.started).total_seconds(), 1e-9)
+        return f"{self.estimates} estimates, {self.pages} pages, {self.bytes / 1024:.0f} KB in {seconds:.2f}s"
+
+class PDFStream:
+    """
+    Minimal append-only PDF writer: objects are encoded and handed out as
+    bytes immediately; only their offsets are kept for the xref table.
+    """
+    CATALOG, PAGES, FONT, FONT_BOLD, FIRST_FREE = 1, 2, 3, 4, 5
+
+    def __init__(self, compress=True):
+        self.compress = compress
+        self.offset = 0
+        self.offsets = {}
+        self.next_id = self.FIRST_FREE
+        self.kids = []
+        self.out = []
+
+    def take(self):
+        """Bytes produced since the last call."""
+        data = b''.join(self.out)
+        self.out = []
+        return data
+
+    def _emit(self, data):
+        self.out.append(data)
+        self.offset += len(data)
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def obj(self, num, body):
+        self.offsets[num] = self.offset
+        self._emit(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def stream(self, num, content, extra=""):
+        data = content.encode('latin-1', 'replace')
+        if self.compress:
+            data = zlib.compress(data, 6)
+            extra += " /Filter /FlateDecode"
+        self.obj(num, f"<< /Length {len(data)}{extra} >>\nstream\n".encode() + data + b"\nendstream")
+
+    def begin(self):
+        self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.obj(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>".encode())
+        for num, name in ((self.FONT, "Helvetica"), (self.FONT_BOLD, "Helvetica-Bold")):
+            self.obj(num, f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} /Encoding /WinAnsiEncoding >>".encode())
+
+    def fonts(self):
+        return f"/Font << /F1 {self.FONT} 0 R /F2 {self.FONT_BOLD} 0 R >>"
+
+    def template(self, content):
+        """Form XObject drawn on every page; returns its object number."""
+        num = self.new_id()
+        self.stream(num, content, f" /Type /XObject /Subtype /Form /BBox [0 0 {PAGE_W} {PAGE_H}]"
+                                  f" /Resources << {self.fonts()} >>")
+        return num
+
+    def page(self, content, templates):
+        content_id, page_id = self.new_id(), self.new_id()
+        self.stream(content_id, content)
+        xobjects = " ".join(f"/{name} {num} 0 R" for name, num in templates.items())
+        self.obj(page_id, (f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}]"
+                           f" /Resources << {self.fonts()} /XObject << {xobjects} >> >>"
+                           f" /Contents {content_id} 0 R >>").encode())
+        self.kids.append(page_id)
+
+    def finish(self, title):
+        info = self.new_id()
+        self.obj(self.PAGES, (f"<< /Type /Pages /Count {len(self.kids)} /Kids ["
+                              + " ".join(f"{k} 0 R" for k in self.kids) + "] >>").encode())
+        self.obj(info, f"<< /Title ({_escape(title)}) /Producer (Civil Estimator AI) >>".encode('latin-1', 'replace'))
+        xref = self.offset
+        lines = [f"xref\n0 {self.next_id}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[n]:010d} 00000 n \n" for n in range(1, self.next_id)]
+        lines.append(f"trailer\n<< /Size {self.next_id} /Root {self.CATALOG} 0 R /Info {info} 0 R >>\n"
+                     f"startxref\n{xref}\n%%EOF\n")
+        self._emit("".join(lines).encode())
+
+# ------------------------------------------------------------ templates
+
+def _frame(top, rows, col_x, right):
+    """Table grid (header row + `rows`) as path operators."""
+    bottom = top - ROW_H * (rows + 1)
+    ops = [f"0.85 0.87 0.9 rg {MARGIN:.2f} {top - ROW_H:.2f} {right - MARGIN:.2f} {ROW_H:.2f} re f 0 g\n",
+           "0.6 G 0.5 w\n"]
+    for i in range(rows + 2):
+        y = top - ROW_H * i
+        ops.append(f"{MARGIN:.2f} {y:.2f} m {right:.2f} {y:.2f} l S\n")
+    for x in (MARGIN, *col_x, right):
+        ops.append(f"{x:.2f} {top:.2f} m {x:.2f} {bottom:.2f} l S\n")
+    return "".join(ops)
+
+def _header(title, subtitle):
+    return (f"0.17 0.24 0.31 rg 0 {PAGE_H - 70:.2f} {PAGE_W:.2f} 70 re f 1 g\n"
+            + _text(MARGIN, PAGE_H - 40, title, "F2", 20)
+            + _text(MARGIN, PAGE_H - 58, subtitle, "F1", 10)
+            + "0 g\n"
+            + _text(PAGE_W / 2, 30, "Generated by Civil Estimator AI", "F1", 8, "C"))
+
+def estimate_template(subtitle):
+    right = PAGE_W - MARGIN
+    ops = [_header("Building Cost Estimate", subtitle),
+           _text(MARGIN, SPEC_TOP + 10, "Project Specifications", "F2", 13),
+           _frame(SPEC_TOP, len(SPEC_ROWS), (220,), right),
+           _text(MARGIN + 6, SPEC_TOP - 14, "Item", "F2"), _text(226, SPEC_TOP - 14, "Value", "F2"),
+           _text(MARGIN, MATERIAL_TOP + 10, "Material Breakdown", "F2", 13),
+           _frame(MATERIAL_TOP, len(MATERIAL_ROWS) + 1, (220, 380), right),
+           _text(MARGIN + 6, MATERIAL_TOP - 14, "Material", "F2"),
+           _text(374, MATERIAL_TOP - 14, "Quantity", "F2", align="R"),
+           _text(right - 6, MATERIAL_TOP - 14, "Estimated Cost (Rs.)", "F2", align="R")]
+    for i, (label, _) in enumerate(SPEC_ROWS, 1):
+        ops.append(_text(MARGIN + 6, SPEC_TOP - ROW_H * i - 14, label))
+    for i, (label, *_) in enumerate(MATERIAL_ROWS, 1):
+        ops.append(_text(MARGIN + 6, MATERIAL_TOP - ROW_H * i - 14, label))
+    ops.append(_text(MARGIN + 6, MATERIAL_TOP - ROW_H * (len(MATERIAL_ROWS) + 1) - 14, "TOTAL ESTIMATE", "F2"))
+    return "".join(ops)
+
+def summary_template(subtitle):
+    ops = [_header("Portfolio Summary", subtitle)]
+    for label, x in SUMMARY_COLS:
+        ops.append(_text(x, PAGE_H - 100, label, "F2", 9, "L" if x < 300 else "R"))
+    ops.append(f"0.6 G 0.5 w {MARGIN:.2f} {PAGE_H - 106:.2f} m {PAGE_W - MARGIN:.2f} {PAGE_H - 106:.2f} l S\n")
+    return "".join(ops)
+
+# ------------------------------------------------------------ pages
+
+def estimate_page(row, page_no):
+    right = PAGE_W - MARGIN
+    date = str(row.get("created_at") or "")[:16].replace("T", " ")
+    ops = ["/Tpl Do\n1 g\n", _text(right, PAGE_H - 58, f"Estimate #{row['id']}  |  {date}", "F1", 10, "R"), "0 g\n"]
+    for i, (_, key) in enumerate(SPEC_ROWS, 1):
+        value = row.get(key)
+        ops.append(_text(226, SPEC_TOP - ROW_H * i - 14, "N/A" if value is None else value))
+    for i, (_, cost_key, qty_key, unit) in enumerate(MATERIAL_ROWS, 1):
+        y = MATERIAL_TOP - ROW_H * i - 14
+        qty = row.get(qty_key)
+        ops.append(_text(374, y, f"{qty:,.0f} {unit}" if qty is not None else "-", align="R"))
+        ops.append(_text(right - 6, y, _money(row.get(f"cost_{cost_key}")), align="R"))
+    ops.append(_text(right - 6, MATERIAL_TOP - ROW_H * (len(MATERIAL_ROWS) + 1) - 14,
+                     _money(row.get("total_cost")), "F2", align="R"))
+    if row.get("predicted_2026"):
+        y = MATERIAL_TOP - ROW_H * (len(MATERIAL_ROWS) + 2) - 40
+        ops.append(_text(MARGIN, y, "Future Price Forecast (2026)", "F2", 13))
+        ops.append(_text(MARGIN, y - 20, "Based on current market trends and inflation analysis, the estimated "
+                                         "cost in 2026 is approximately"))
+        ops.append(_text(MARGIN, y - 34, f"Rs. {_money(row['predicted_2026'])}.", "F2"))
+    ops.append(_text(right, 30, f"Page {page_no}", "F1", 8, "R"))
+    return "".join(ops)
+
+def summary_page(rows, page_no, grand_total=None):
+    ops = ["/Sum Do\n"]
+    y = PAGE_H - 122
+    for row in rows:
+        values = (row["id"], str(row.get("created_at") or "")[:10], row.get("city") or "", row.get("quality") or "",
+                  row.get("floors") or "", row.get("area_sqft_estimate") or "", _money(row.get("total_cost")),
+                  _money(row.get("predicted_2026")))
+        for (_, x), value in zip(SUMMARY_COLS, values):
+            ops.append(_text(x, y, value, "F1", 9, "L" if x < 300 else "R"))
+        y -= 17
+    if grand_total is not None:
+        ops.append(f"0.6 G 0.5 w {MARGIN:.2f} {y + 11:.2f} m {PAGE_W - MARGIN:.2f} {y + 11:.2f} l S\n")
+        ops.append(_text(MARGIN, y - 4, "Portfolio total", "F2", 10))
+        ops.append(_text(SUMMARY_COLS[-2][1], y - 4, _money(grand_total), "F2", 10, "R"))
+    ops.append(_text(PAGE_W - MARGIN, 30, f"Page {page_no}", "F1", 8, "R"))
+    return "".join(ops)
+
+# ------------------------------------------------------------ documents
+
+def iter_portfolio(rows, owner=None, title="Building Cost Portfolio", stats=None, compress=True):
+    """
+    Yields the PDF as byte chunks (about one page each): a page per row of
+    `rows` (export.flatten dicts) followed by summary pages. The summary
+    only keeps the few fields it lists, not the rendered pages.
+    """
+    stats = stats or PortfolioStats()
+    pdf = PDFStream(compress=compress)
+    pdf.begin()
+    subtitle = f"{owner['name']} ({owner['email']})" if owner else title
+    subtitle += f"  |  {datetime.now():%Y-%m-%d %H:%M}"
+    templates = {"Tpl": pdf.template(estimate_template(subtitle))}
+    summary = []
+    total = 0.0
+    for row in rows:
+        pdf.page(estimate_page(row, stats.pages + 1), templates)
+        stats.pages += 1
+        stats.estimates += 1
+        total += row.get("total_cost") or 0
+        summary.append({k: row.get(k) for k in ("id", "created_at", "city", "quality", "floors",
+                                                "area_sqft_estimate", "total_cost", "predicted_2026")})
+        chunk = pdf.take()
+        stats.bytes += len(chunk)
+        yield chunk
+
+    sum_templates = {"Sum": pdf.template(summary_template(subtitle))}
+    for start in range(0, max(len(summary), 1), ROWS_PER_SUMMARY_PAGE):
+        part = summary[start:start + ROWS_PER_SUMMARY_PAGE]
+        last = start + ROWS_PER_SUMMARY_PAGE >= len(summary)
+        pdf.page(summary_page(part, stats.pages + 1, total if last else None), sum_templates)
+        stats.pages += 1
+    pdf.finish(title)
+    chunk = pdf.take()
+    stats.bytes += len(chunk)
+    yield chunk
+
+def write_portfolio(rows, fileobj, owner=None, title="Building Cost Portfolio", stats=None):
+    """Streams the portfolio into a binary file object; returns the stats."""
+    stats = stats or PortfolioStats()
+    for chunk in iter_portfolio(rows, owner=owner, title=title, stats=stats):
+        fileobj.write(chunk)
+    return stats
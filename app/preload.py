@@ -0,0 +1,136 @@
+"""
+Preload mode: build read-only state before gunicorn forks its workers.
+
+Without it every worker imports the app on its own and loads models, unit
+costs, pricing tables, FPDF and Pillow on its first requests, so those
+requests are slow after each deploy or worker recycle and every worker
+holds its own copy. With PRELOAD=true (gunicorn.conf.py turns it on
+together with preload_app), create_app() runs warm() once in the master:
+
+  * estimator models, unit costs, the compiled pricing tables and catalog,
+  * one sample estimate and PDF render (imports FPDF and loads the core
+    font metrics, table and HTML code paths),
+  * Pillow and its image plugins, the static asset manifest,
+
+then closes pooled database connections so no socket is shared across the
+fork. gunicorn's when_ready hook calls freeze() just before the workers are
+forked: gc.freeze() moves everything allocated so far into the permanent
+generation, so the collector never touches (and copy-on-write never
+duplicates) those pages in the workers.
+
+PRELOAD=background runs the same steps in a thread instead, for servers
+that do not fork a preloaded master (gunicorn without preload_app, the
+ASGI app, flask run): the process accepts connections right away and GET
+/api/ready answers 503 until warm-up has finished. With PRELOAD=true the
+warm-up is over before create_app() returns, so /api/ready is 200 as soon
+as the server listens; it is 200 when PRELOAD is off. If any step failed
+it stays 503 (the step's error is in the body), so a broken deploy never
+looks ready.
+"""
+import gc
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from flask import jsonify
+
+_frozen_in = None
+
+def _models(app):
+    from .api.data import get_data_catalog, get_data_models, get_data_unit_costs, get_data_pricing
+    from .routes import get_models, get_unit_costs
+    get_data_models()
+    get_data_unit_costs()
+    get_models()
+    get_unit_costs()
+    return f"pricing {get_data_pricing().version}, catalog {get_data_catalog()[0]['version']}"
+
+def _report(app):
+    from .api.data import get_data_models, get_data_unit_costs
+    from .estimation import default_features, parse_estimate_params, report_data, run_estimate
+    from .utils import generate_pdf
+    q_model, t_model = get_data_models()
+    params = parse_estimate_params({}, default_features())
+    result = run_estimate(params, q_model, t_model, get_data_unit_costs(), app.config.get('INFLATION_RATE', 0.07))
+    user = SimpleNamespace(username="preload", email="preload@localhost")
+    return f"{len(generate_pdf(report_data(user, 0, result)))} byte sample report"
+
+def _pillow(app):
+    from PIL import Image
+    Image.init()
+    return f"{len(Image.OPEN)} image formats"
+
+def _static(app):
+    from .static_assets import init_static_manifest
+    manifest = app.extensions.get('static_manifest') or init_static_manifest(app)
+    return f"{len(manifest.assets)} static assets"
+
+STEPS = (("models", _models), ("report", _report), ("pillow", _pillow), ("static", _static))
+
+def preload_mode(app):
+    """The PRELOAD mode: "true", "background" or None (off)."""
+    mode = str(app.config.get('PRELOAD', False)).lower()
+    if mode in ('true', 'on', '1'):
+        return 'true'
+    return 'background' if mode == 'background' else None
+
+def _state(app):
+    return app.extensions.setdefault('preload', {"warm": False, "warming": False, "seconds": None,
+                                                 "steps": {}, "failed": []})
+
+def warm(app, dispose=True):
+    """
+    Builds the shared read-only state; a failing step is logged, skipped and
+    listed in state["failed"]. `dispose` closes the pooled connections
+    (before a fork).
+    """
+    from . import db
+    from .schema import _is_memory_db
+    state = _state(app)
+    state["warming"] = True
+    t0 = time.perf_counter()
+    with app.app_context():
+        for name, step in STEPS:
+            t1 = time.perf_counter()
+            try:
+                detail = step(app)
+                state["steps"][name] = {"ms": round((time.perf_counter() - t1) * 1000, 1), "detail": detail}
+            except Exception as e:
+                print(f"Preload Warning: {name} failed: {e}")
+                state["steps"][name] = {"error": str(e)}
+        state["failed"] = [name for name, step in state["steps"].items() if "error" in step]
+        # Workers open their own connections after the fork; an in-memory database lives in its connection
+        if dispose and not _is_memory_db(app):
+            db.engine.dispose()
+    state["seconds"] = round(time.perf_counter() - t0, 3)
+    state["warm"], state["warming"] = True, False
+    print(f"Preloaded in {state['seconds']}s: {', '.join(state['steps'])}")
+    return state
+
+def freeze():
+    """Moves every object allocated so far out of the collector's reach (call right before forking)."""
+    global _frozen_in
+    gc.collect()
+    gc.freeze()
+    _frozen_in = os.getpid()
+
+def status(app):
+    # frozen_in is the master's pid in a forked worker
+    return dict(_state(app), pid=os.getpid(), frozen_in=_frozen_in, frozen_objects=gc.get_freeze_count())
+
+def init_preload(app):
+    mode = preload_mode(app)
+
+    @app.route('/api/ready', methods=['GET'])
+    def ready():
+        body = status(app)
+        body["ready"] = mode is None or (body["warm"] and not body["failed"])
+        return jsonify(body), 200 if body["ready"] else 503
+
+    if mode == 'true':
+        warm(app)
+    elif mode == 'background':
+        _state(app)["warming"] = True
+        threading.Thread(target=warm, args=(app,), kwargs={"dispose": False}, name='preload', daemon=True).start()
+    return mode
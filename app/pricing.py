@@ -0,0 +1,183 @@
+"""
+Compiled pricing tables for grid evaluation (the /api/data/sweep endpoint).
+
+The estimator's total is linear in area and floors for a given city and
+quality: total = area * floors * rate[city, quality]. Compiling probes the
+model once per city×quality cell at unit area/floors, so the table follows
+whatever the model does (unit_costs.json multipliers, a calibration
+artifact) and a whole Cartesian grid becomes one broadcast multiply.
+Cells outside the table are probed the same way: `default_rates` per
+quality for other cities, `other_quality_rates` per city for qualities
+the model has no multiplier or calibrated group for (they price like an
+unknown quality does in the estimator, keeping the city multiplier).
+`version` fingerprints the compiled rates and can be used as a cache key.
+
+Models that are not linear (TakeoffModel: footings are paid once, walls
+grow with the plate's side) set `linear = False`; their grids are
+evaluated by the model's own vectorized `grid_totals`, and the table keeps
+the unit-area/unit-floor probes only as indicative rates.
+"""
+import hashlib
+import json
+import math
+
+try:
+    import numpy as np
+except ImportError:  # Optional: plain list comprehensions are used instead
+    np = None
+
+DEFAULT_CITY = "*"
+OTHER_QUALITY = ""  # probe name for qualities outside unit_costs.json and the calibration
+QUALITY_ALIASES = {"basic": "economical"}  # frontend name -> model name
+
+class PricingTables:
+    def __init__(self, cities, qualities, rates, default_rates, other_quality_rates, unit_costs, model=None):
+        self.cities = cities
+        self.qualities = qualities
+        self.rates = rates                  # rates[i][j]: cost per sqft per floor
+        self.default_rates = default_rates  # quality -> rate for cities outside the table
+        self.other_quality_rates = other_quality_rates  # city (or "*") -> rate for qualities outside it
+        self.model = model                  # non-linear model that evaluates grids itself
+        payload = json.dumps({"unit_costs": unit_costs, "cities": cities, "qualities": qualities,
+                              "rates": rates, "default": default_rates, "other": other_quality_rates,
+                              "model": getattr(model, 'version', None)}, sort_keys=True)
+        self.version = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+    def rate(self, city, quality):
+        quality = QUALITY_ALIASES.get(quality, quality)
+        if quality not in self.qualities:
+            return self.other_quality_rates.get(city, self.other_quality_rates[DEFAULT_CITY])
+        if city in self.cities:
+            return self.rates[self.cities.index(city)][self.qualities.index(quality)]
+        return self.default_rates[quality]
+
+    def evaluate(self, cities, qualities, floors, areas, rooms=None, wall_length=None):
+        """
+        Totals for the full grid cities x qualities x floors x areas, flattened
+        in that (row-major) order. `rooms`/`wall_length` only reach non-linear
+        models; the rate table does not depend on them.
+        """
+        if self.model is not None:
+            return self.model.grid_totals(cities, qualities, floors, areas, rooms=rooms, wall_length=wall_length)
+        rates = [[self.rate(c, q) for q in qualities] for c in cities]
+        if np is not None:
+            grid = (np.asarray(rates, dtype=float)[:, :, None, None]
+                    * np.asarray(floors, dtype=float)[None, None, :, None]
+                    * np.asarray(areas, dtype=float)[None, None, None, :])
+            return np.maximum(grid, 0).ravel()
+        return [max(0, r * f * a) for row in rates for r in row for f in floors for a in areas]
+
+def compile_pricing(t_model, unit_costs):
+    """
+    Probes `t_model.predict_total_cost` at area=1, floors=1 for each cell.
+    Cities and qualities of calibrated pairs join the table so their fitted
+    multipliers are not priced as the fallback.
+    """
+    cities = list(unit_costs.get('city_multiplier', {})) or ["Chennai"]
+    qualities = ["economical"] + [q for q in unit_costs.get('quality_multiplier', {}) if q != 'basic']
+    if "standard" not in qualities:
+        qualities.append("standard")
+    calibration = getattr(t_model, 'calibration', None) or {}
+    for key in calibration.get('groups', {}):
+        if '|' in key:
+            city, quality = key.split('|', 1)
+            quality = QUALITY_ALIASES.get(quality, quality)
+            if city not in cities:
+                cities.append(city)
+            if quality not in qualities:
+                qualities.append(quality)
+
+    def probe(city, quality):
+        return t_model.predict_total_cost({"city": city, "quality": quality,
+                                           "area_sqft": 1.0, "no_of_floors": 1})[0]
+
+    rates = [[probe(c, q) for q in qualities] for c in cities]
+    default_rates = {q: probe(DEFAULT_CITY, q) for q in qualities}
+    other_quality_rates = {c: probe(c, OTHER_QUALITY) for c in cities + [DEFAULT_CITY]}
+    model = None if getattr(t_model, 'linear', True) else t_model
+    return PricingTables(cities, qualities, rates, default_rates, other_quality_rates, unit_costs, model=model)
+
+def build_catalog(tables, unit_costs, q_model, forecast_factor):
+    """
+    Everything a client needs to preview an estimate without a round trip
+    (GET /api/data/catalog). For a linear model:
+
+        quantity[m]  = round(area * factors[m])
+                       (factors: calibrated_groups[city|quality], else calibrated_groups["*"],
+                        else material_factors)
+        breakdown[m] = quantity[m] * price[m] * multiplier
+                       (multiplier: calibrated_groups[city|quality].multiplier when present,
+                        else city_multiplier[city] * quality_multiplier[quality])
+        total        = area * floors * rates[city][quality]
+                       (default_rates[quality] for other cities; qualities outside
+                        `rates` use other_quality_rates[city], else ["*"])
+        2026         = total * forecast_2026_factor
+
+    With `linear` false (the takeoff model) totals are not a rate table
+    and previews go through POST /api/data/sweep instead. `version` hashes
+    the whole catalog; it is also the ETag and the `catalog_version` of
+    estimate responses.
+    """
+    calibration = getattr(q_model, 'calibration', None) or {}
+    # The global fit ("*") only lends its factors; unfitted pairs keep the static multipliers
+    groups = {key: {"factors": g["factors"], "multiplier": g.get("multiplier") if key != "*" else None}
+              for key, g in calibration.get('groups', {}).items() if g.get('factors')}
+    catalog = {
+        "pricing_version": tables.version,
+        "model": getattr(q_model, 'version', 'area'),
+        "linear": tables.model is None,
+        "base": unit_costs.get('base', {}),
+        "city_multiplier": unit_costs.get('city_multiplier', {}),
+        "quality_multiplier": unit_costs.get('quality_multiplier', {}),
+        "quality_aliases": QUALITY_ALIASES,
+        "material_factors": dict(getattr(q_model, 'material_data', {})),
+        "calibrated_groups": groups,
+        "rates": {c: dict(zip(tables.qualities, row)) for c, row in zip(tables.cities, tables.rates)},
+        "default_rates": tables.default_rates,
+        "other_quality_rates": tables.other_quality_rates,
+        "forecast_2026_factor": forecast_factor,
+    }
+    payload = json.dumps(catalog, sort_keys=True)
+    catalog["version"] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    return catalog
+
+def label(value, name):
+    """A city/quality name from a sweep body. Numbers are not names."""
+    if not isinstance(value, str):
+        raise ValueError(f"{name}: expected names, got {value!r}")
+    return value
+
+def grid_size(*dims):
+    size = 1
+    for d in dims:
+        size *= len(d)
+    return size
+
+def _finite(value, cast, name):
+    """`cast(value)`, rejecting infinities, NaN and numbers too large to convert."""
+    try:
+        value = cast(value)
+    except OverflowError:
+        raise ValueError(f"{name}: must be a finite number")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{name}: must be a finite number")
+    return value
+
+def expand(spec, cast, name, limit=10000):
+    """
+    A sweep dimension: a scalar, a list, or {"start", "stop", "step"} with
+    `stop` inclusive. Raises ValueError on bad input.
+    """
+    if isinstance(spec, dict):
+        start, stop = _finite(spec["start"], cast, name), _finite(spec["stop"], cast, name)
+        step = _finite(spec.get("step", 1), cast, name)
+        if step <= 0 or stop < start:
+            raise ValueError(f"{name}: need start <= stop and step > 0")
+        count = int((stop - start) / step + 1e-9) + 1
+        if count > limit:
+            raise ValueError(f"{name}: at most {limit} values")
+        return [cast(start + i * step) for i in range(count)]
+    values = spec if isinstance(spec, list) else [spec]
+    if not values or len(values) > limit:
+        raise ValueError(f"{name}: between 1 and {limit} values")
+    return [_finite(v, cast, name) for v in values]
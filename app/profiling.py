@@ -0,0 +1,239 @@
+"""
+On-demand profiling for production requests.
+
+An admin can profile a single request by sending
+`X-Profile: cpu|sample|memory` (or `?_profile=...`) with their own token,
+or arm a time window in which every request handled by this worker is
+profiled (POST /api/admin/profile/window). CPU profiles are written as
+cProfile `.prof` files (open with snakeviz or `python -m pstats`), sampled
+profiles as collapsed stacks (`.collapsed`, one `frame;frame;... count`
+line per stack, for flamegraph.pl or speedscope), memory profiles as
+tracemalloc top-allocation reports, all under PROFILE_DIR.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import current_app, g, request
+
+MODES = ('cpu', 'sample', 'memory')
+SORT_KEYS = tuple(sorted(pstats.Stats.sort_arg_dict_default))
+SUFFIXES = ('.prof', '.collapsed', '.mem.txt')
+MAX_WINDOW_SECONDS = 300
+TOP_ALLOCATIONS = 25
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+_window = {'until': 0.0, 'mode': 'cpu'}
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+def profile_dir(app=None):
+    app = app or current_app
+    path = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def arm_window(seconds, mode='cpu'):
+    """Profile every request on this worker for the next `seconds`."""
+    seconds = max(0, min(int(seconds), MAX_WINDOW_SECONDS))
+    _window['mode'] = mode
+    _window['until'] = time.time() + seconds
+    return _window['until']
+
+def window_status():
+    remaining = _window['until'] - time.time()
+    return {"active": remaining > 0, "mode": _window['mode'], "remaining_seconds": max(0, round(remaining, 1))}
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _tracemalloc_users += 1
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users = max(0, _tracemalloc_users - 1)
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def finish(self):
+        self.done.set()
+        self.join()
+        return self.counts
+
+def format_collapsed(counts):
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+def format_allocations(before, after, limit=TOP_ALLOCATIONS, title=None):
+    stats = after.compare_to(before, 'lineno')
+    lines = [title] if title else []
+    total = sum(s.size_diff for s in stats)
+    lines.append(f"Net allocated: {total / 1024:.1f} KiB")
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size_diff / 1024:>10.1f} KiB {stat.count_diff:>8} blocks  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines)
+
+def _requested_mode():
+    if _window['until'] > time.time():
+        return _window['mode']
+    flag = request.headers.get('X-Profile') or request.args.get('_profile')
+    if not flag:
+        return None
+    mode = flag.lower() if flag.lower() in MODES else 'cpu'
+    # Only honour the flag for admins so it cannot be used to fill the disk
+    from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+    from .models import User
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return None
+    user = User.query.get(identity) if identity else None
+    return mode if user and user.is_admin else None
+
+def _start_profile():
+    mode = _requested_mode()
+    if mode is None:
+        return
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active in this interpreter; skip this request
+            return
+        g._profile = ('cpu', profiler, time.time())
+    elif mode == 'sample':
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        g._profile = ('sample', sampler, time.time())
+    else:
+        _start_tracemalloc()
+        g._profile = ('memory', tracemalloc.take_snapshot(), time.time())
+
+def _finish_profile(response):
+    state = g.pop('_profile', None)
+    if state is None:
+        return response
+    mode, handle, started = state
+    endpoint = (request.endpoint or 'unmatched').replace('.', '-')
+    name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{endpoint}-{os.getpid()}-{threading.get_ident() % 10000}"
+    try:
+        if mode == 'cpu':
+            handle.disable()
+            name += '.prof'
+            handle.dump_stats(os.path.join(profile_dir(), name))
+        elif mode == 'sample':
+            name += '.collapsed'
+            with open(os.path.join(profile_dir(), name), 'w') as f:
+                f.write(format_collapsed(handle.finish()))
+        else:
+            after = tracemalloc.take_snapshot()
+            _stop_tracemalloc()
+            name += '.mem.txt'
+            report = format_allocations(handle, after, title=f"{request.method} {request.path}")
+            with open(os.path.join(profile_dir(), name), 'w') as f:
+                f.write(report)
+        response.headers['X-Profile-Id'] = name
+    except Exception as e:
+        print(f"Profile write failed: {e}")
+    return response
+
+def _abandon_profile(exc):
+    # after_request is skipped on unhandled errors; never leave a profiler running
+    state = g.pop('_profile', None)
+    if state is None:
+        return
+    if state[0] == 'cpu':
+        state[1].disable()
+    elif state[0] == 'sample':
+        state[1].finish()
+    else:
+        _stop_tracemalloc()
+
+def list_profiles():
+    directory = profile_dir()
+    items = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(SUFFIXES):
+            st = entry.stat()
+            items.append({"name": entry.name, "bytes": st.st_size, "created": int(st.st_mtime)})
+    return sorted(items, key=lambda i: i['created'], reverse=True)
+
+def profile_path(name):
+    """Resolves a stored profile by name, refusing anything outside PROFILE_DIR."""
+    if os.path.basename(name) != name:
+        return None
+    path = os.path.join(profile_dir(), name)
+    return path if os.path.isfile(path) else None
+
+def summarize_profile(path, limit=30, sort='cumulative'):
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+def memory_hotspots(params, q_model, t_model, u_costs, inflation, limit=15):
+    """
+    Runs the production estimate pipeline (estimation.run_estimate on parsed
+    params) and the PDF report once under tracemalloc and reports the top
+    allocation sites of each stage.
+    """
+    from types import SimpleNamespace
+    from .estimation import report_data, run_estimate
+    from .utils import generate_pdf
+
+    _start_tracemalloc()
+    try:
+        start = tracemalloc.take_snapshot()
+        result = run_estimate(params, q_model, t_model, u_costs, inflation)
+        after_estimate = tracemalloc.take_snapshot()
+
+        user = SimpleNamespace(username='profile', email='profile@example.com')
+        generate_pdf(report_data(user, 0, result))
+        after_pdf = tracemalloc.take_snapshot()
+    finally:
+        _stop_tracemalloc()
+
+    return {
+        "estimate": format_allocations(start, after_estimate, limit),
+        "pdf": format_allocations(after_estimate, after_pdf, limit),
+    }
+
+def init_profiling(app):
+    if not app.config.get('PROFILING_ENABLED', True):
+        return False
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abandon_profile)
+    return True
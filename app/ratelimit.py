@@ -0,0 +1,255 @@
+"""
+Per-user and per-IP rate limiting with token buckets.
+
+Limits are configured per endpoint in RATE_LIMITS, e.g.
+
+    {"data_api.estimate": {"user": "20/minute", "ip": "120/minute"}}
+
+and enforced by the `@rate_limit` decorator, which sits under
+`@jwt_required()` so the user identity is already verified. The fast path
+is a plain dict of [tokens, timestamp] lists per bucket, updated without
+locks (a rare race admits one extra request), which costs a few
+microseconds.
+
+With RATELIMIT_STORAGE_URL set (`sqlite:///path`, `redis://host:6379/0`
+or `memory://` for the in-process stand-in), workers draw tokens from the
+shared bucket in small leases and spend them locally, so the limit holds
+across processes to within one lease per worker without a round trip per
+request. A lease is only good for as long as the store takes to refill
+it, so idle workers do not sit on tokens from an earlier window.
+
+A request is admitted only if every scope has a token, and only then is
+one spent from each: a request the per-user bucket rejects does not also
+drain the per-IP one.
+
+Client addresses come from `request.remote_addr`; behind reverse proxies
+set PROXY_FIX_X_FOR to their number so werkzeug's ProxyFix takes the
+address the outermost trusted proxy saw (the Nth X-Forwarded-For entry
+from the right), not the client-supplied left-most one.
+"""
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+PRUNE_AT = 50000
+
+def parse_limit(text):
+    """'20/minute' -> (capacity, refill per second)."""
+    count, _, period = text.partition('/')
+    period = period.strip().rstrip('s') or 'second'
+    if period not in PERIODS:
+        raise ValueError(f"unknown rate-limit period in {text!r}")
+    count = float(count)
+    return count, count / PERIODS[period]
+
+class MemoryStore:
+    """In-process stand-in for the shared store (tests, single-worker setups)."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key, want, capacity, rate, now):
+        with self.lock:
+            tokens, ts = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            granted = min(want, int(tokens))
+            self.buckets[key] = (tokens - granted, now)
+        return granted, (1 - (tokens - granted)) / rate if not granted else 0.0
+
+class SQLiteStore:
+    """Shared buckets in a SQLite file; one short write transaction per lease."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_bucket (key TEXT PRIMARY KEY, tokens REAL, ts REAL)")
+
+    def _conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def acquire(self, key, want, capacity, rate, now):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, ts FROM rate_bucket WHERE key = ?", (key,)).fetchone()
+            tokens, ts = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            granted = min(want, int(tokens))
+            conn.execute("INSERT OR REPLACE INTO rate_bucket (key, tokens, ts) VALUES (?, ?, ?)",
+                         (key, tokens - granted, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return granted, (1 - (tokens - granted)) / rate if not granted else 0.0
+
+class RedisStore:
+    """Shared buckets in Redis (or any server speaking its protocol and EVAL)."""
+
+    SCRIPT = """
+    local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local capacity, rate, now, want = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(b[1]) or capacity
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local granted = math.min(want, math.floor(tokens))
+    redis.call('HSET', KEYS[1], 'tokens', tokens - granted, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {granted, tostring(tokens - granted)}
+    """
+
+    def __init__(self, url):
+        import redis  # Optional dependency, only needed for redis:// storage
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def acquire(self, key, want, capacity, rate, now):
+        granted, left = self.script(keys=[f"ratelimit:{key}"], args=[capacity, rate, now, want])
+        granted = int(granted)
+        return granted, (1 - float(left)) / rate if not granted else 0.0
+
+def make_store(url):
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f"unsupported RATELIMIT_STORAGE_URL: {url}")
+
+class RateLimiter:
+    def __init__(self, limits, store=None, lease_fraction=0.1, clock=time.time):
+        self.rules = {endpoint: {scope: parse_limit(text) for scope, text in scopes.items()}
+                      for endpoint, scopes in limits.items()}
+        self.store = store
+        self.lease_fraction = lease_fraction
+        self.clock = clock
+        self.buckets = {}
+
+    def available(self, key, capacity, rate, now):
+        """
+        Refills (or leases) the bucket without spending from it. Returns 0
+        when it holds a token, else seconds until the next one.
+        """
+        bucket = self.buckets.get(key)
+        if self.store is None:
+            if bucket is None:
+                bucket = self.buckets[key] = [capacity, now]
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            return 0.0 if bucket[0] >= 1 else (1 - bucket[0]) / rate
+
+        # Shared store: [leased tokens, lease expiry]; top up from the store when empty or stale
+        if bucket is None:
+            bucket = self.buckets[key] = [0, now]
+        if bucket[0] >= 1 and now < bucket[1]:
+            return 0.0
+        lease = max(1, int(capacity * self.lease_fraction))
+        granted, retry_after = self.store.acquire(key, lease, capacity, rate, now)
+        bucket[0], bucket[1] = granted, now + granted / rate
+        return 0.0 if granted else retry_after
+
+    def hit(self, key, capacity, rate, now=None):
+        """Takes one token; returns 0 when allowed, else seconds until the next token."""
+        now = self.clock() if now is None else now
+        if len(self.buckets) >= PRUNE_AT:
+            self.prune(now)
+        wait = self.available(key, capacity, rate, now)
+        if not wait:
+            self.buckets[key][0] -= 1
+        return wait
+
+    def prune(self, now):
+        """Drops buckets that carry no state: refilled completely, or (store mode) empty or expired leases."""
+        for key, bucket in list(self.buckets.items()):
+            if self.store is not None:
+                if bucket[0] < 1 or now >= bucket[1]:
+                    self.buckets.pop(key, None)
+                continue
+            rule = self.rules.get(key.split('|', 2)[0], {}).get(key.split('|', 2)[1])
+            if rule and bucket[0] + (now - bucket[1]) * rule[1] >= rule[0]:
+                self.buckets.pop(key, None)
+
+    def check(self, endpoint, identities):
+        """
+        identities: {"user": id, "ip": addr}. Returns 0 when the request may
+        proceed (one token is then spent from every scope), else the
+        Retry-After delay in seconds and nothing is spent.
+        """
+        rules = self.rules.get(endpoint)
+        if not rules:
+            return 0.0
+        now = self.clock()
+        if len(self.buckets) >= PRUNE_AT:
+            self.prune(now)
+        keys, wait = [], 0.0
+        for scope, (capacity, rate) in rules.items():
+            who = identities.get(scope)
+            if who is None:
+                continue
+            key = f"{endpoint}|{scope}|{who}"
+            keys.append(key)
+            wait = max(wait, self.available(key, capacity, rate, now))
+        if wait:
+            return wait
+        for key in keys:
+            self.buckets[key][0] -= 1
+        return 0.0
+
+def forwarded_client(remote, forwarded, hops):
+    """
+    The client address as seen by the outermost of `hops` trusted proxies:
+    the hops-th X-Forwarded-For entry from the right (what ProxyFix(x_for=hops)
+    sets as remote_addr). Falls back to `remote` without enough entries.
+    """
+    if hops <= 0 or not forwarded:
+        return remote
+    entries = [e.strip() for e in forwarded.split(',')]
+    return entries[-hops] if len(entries) >= hops else remote
+
+def rate_limit(view):
+    """Applies the RATE_LIMITS entry for this endpoint (no-op when none)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions.get('ratelimiter')
+        if limiter is not None and request.endpoint in limiter.rules:
+            identities = {"ip": request.remote_addr or 'unknown'}
+            try:
+                identities["user"] = get_jwt_identity()
+            except RuntimeError:  # view is not behind @jwt_required
+                pass
+            wait = limiter.check(request.endpoint, identities)
+            if wait > 0:
+                retry_after = max(1, math.ceil(wait))
+                response = make_response(jsonify({"msg": f"Too many requests. Retry in {retry_after}s"}), 429)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+        return view(*args, **kwargs)
+    return wrapper
+
+def init_ratelimit(app):
+    if not app.config.get('RATELIMIT_ENABLED', True):
+        return
+    store = make_store(app.config.get('RATELIMIT_STORAGE_URL'))
+    app.extensions['ratelimiter'] = RateLimiter(app.config.get('RATE_LIMITS', {}), store)
+
+def init_proxy_fix(app):
+    """Trusts X-Forwarded-For/-Proto from PROXY_FIX_X_FOR reverse proxies (0: none)."""
+    hops = app.config.get('PROXY_FIX_X_FOR', 0)
+    if hops > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
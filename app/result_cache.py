@@ -0,0 +1,95 @@
+"""
+In-process LRU of GET /api/data/result/<id> responses.
+
+A view used to load the whole Prediction row, the viewer (when not the
+owner) and decode three JSON payloads. Now it reads only the row's owner
+and revision (one primary-key lookup, no payload columns). It then serves
+the encoded body cached under (id, owner, revision, pricing version).
+PATCH bumps the revision (and calls invalidate()), so an edit is picked
+up by every worker without cross-process invalidation. Archived rows are
+read-only and are keyed as such. Each app keeps its own LRU in
+app.extensions['result_cache'], so two apps (or databases) in one
+process never serve each other's rows.
+
+Each entry keeps the JSON body and a strong ETag (a hash of the body).
+Responses carry `Cache-Control: private, no-cache`: browsers keep the
+result but revalidate it, and an unchanged estimate costs a 304 with no
+body. RESULT_CACHE_SIZE (0 disables the LRU) bounds the entries.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_CONTROL = "private, no-cache"
+ARCHIVED = "archived"
+
+class ResultCache:
+    def __init__(self):
+        self.entries = OrderedDict()  # (id, owner, revision or ARCHIVED, pricing version) -> CachedResult
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+def _cache():
+    from flask import current_app
+    return current_app.extensions.setdefault('result_cache', ResultCache())
+
+class CachedResult:
+    __slots__ = ("owner_id", "body", "etag")
+
+    def __init__(self, owner_id, body):
+        self.owner_id = owner_id
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+
+def _live_row(pred_id):
+    from . import db
+    from .models import Prediction as P
+    return db.session.query(P.user_id, P.revision).filter(P.id == pred_id).first()
+
+def get(pred_id, pricing_version, max_entries=1024):
+    """The cached response for a prediction (live or archived), or None if it does not exist."""
+    from flask import current_app
+    from .archive import find
+    from .estimation import result_payload
+    from .models import Prediction
+
+    cache = _cache()
+    row = _live_row(pred_id)
+    key = (pred_id, row.user_id if row else None, (row.revision or 1) if row else ARCHIVED, pricing_version)
+    with cache.lock:
+        entry = cache.entries.get(key)
+        if entry is not None:
+            cache.entries.move_to_end(key)
+            cache.stats["hits"] += 1
+            return entry
+        cache.stats["misses"] += 1
+
+    pred = Prediction.query.filter_by(id=pred_id).first() if row else find(pred_id)
+    if pred is None:
+        return None
+    entry = CachedResult(pred.user_id, current_app.json.dumps(result_payload(pred)).encode('utf-8'))
+    if max_entries > 0:
+        # Keyed by what was actually read, in case an edit landed in between
+        key = (pred_id, pred.user_id if row else None,
+               (getattr(pred, 'revision', None) or 1) if row else ARCHIVED, pricing_version)
+        with cache.lock:
+            cache.entries[key] = entry
+            while len(cache.entries) > max_entries:
+                cache.entries.popitem(last=False)
+    return entry
+
+def invalidate(pred_id):
+    cache = _cache()
+    with cache.lock:
+        for key in [k for k in cache.entries if k[0] == pred_id]:
+            del cache.entries[key]
+
+def clear():
+    cache = _cache()
+    with cache.lock:
+        cache.entries.clear()
+
+def stats():
+    cache = _cache()
+    with cache.lock:
+        return {"entries": len(cache.entries), **cache.stats}
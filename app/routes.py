@@ -4,6 +4,7 @@ from flask_login import login_user, current_user, logout_user, login_required
 from .cost_model import load_models, compute_cost_breakdown, load_unit_costs
 from .blueprint_features import extract_blueprint_features
 from .utils import send_email, generate_pdf
+from .static_assets import init_static_manifest, serve_asset
 import json
 import os
 from datetime import datetime
@@ -41,18 +42,20 @@ def get_unit_costs():
             _UNIT_COSTS = {}
     return _UNIT_COSTS
 
-from flask import send_from_directory
-
 @main_bp.route("/", defaults={'path': ''})
 @main_bp.route("/<path:path>")
 def serve(path):
     if path.startswith("api"):
          return abort(404)
 
-    static_folder = current_app.static_folder
-    
-    if path != "" and os.path.exists(os.path.join(static_folder, path)):
-        return send_from_directory(static_folder, path)
-        
-    return send_from_directory(static_folder, 'index.html')
-
+    manifest = current_app.extensions.get('static_manifest')
+    if manifest is None:
+        manifest = init_static_manifest(current_app)
+
+    asset = manifest.get(path) if path != "" else None
+    if asset is None:
+        # SPA fallback: client-side routes resolve to index.html
+        asset = manifest.get('index.html')
+        if asset is None:
+            return abort(404)
+    return serve_asset(asset)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+from . import db
+
+def _schema_digest(app):
+    """Fingerprint of the database URI and the declared tables/columns."""
+    from . import models  # noqa: F401  (registers the tables on db.metadata)
+    h = hashlib.sha1(app.config['SQLALCHEMY_DATABASE_URI'].encode('utf-8'))
+    for table in sorted(db.metadata.tables.values(), key=lambda t: t.name):
+        h.update(table.name.encode('utf-8'))
+        for col in table.columns:
+            h.update(col.name.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+def _marker_path(app):
+    marker_dir = app.config.get('SCHEMA_MARKER_DIR') or app.instance_path
+    return os.path.join(marker_dir, f".schema-{_schema_digest(app)}")
+
+def _is_memory_db(app):
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    return uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri
+
+def _sqlite_file(app):
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite:///') and not _is_memory_db(app):
+        path = uri[len('sqlite:///'):]
+        if not os.path.isabs(path):
+            path = os.path.join(app.instance_path, path)
+        return path
+    return None
+
+def upgrade_schema():
+    """
+    Adds nullable columns and indexes declared on the models but missing
+    from existing tables (create_all only creates whole tables). Returns
+    the added names.
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {c['name'] for c in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in have or not col.nullable:
+                continue
+            col_type = col.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col_type}')
+            added.append(f"{table.name}.{col.name}")
+        have_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in have_indexes and all(c.name in have or c.nullable for c in index.columns):
+                index.create(db.engine)
+                added.append(f"{table.name}.{index.name}")
+    if added:
+        print(f"Schema upgraded: added {', '.join(added)}")
+    return added
+
+def create_schema(app):
+    """Explicit migrate step: create missing tables/columns and write the marker."""
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    marker = _marker_path(app)
+    try:
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        with open(marker, 'w') as f:
+            f.write(app.config['SQLALCHEMY_DATABASE_URI'])
+    except OSError as e:
+        print(f"Schema marker not written: {e}")
+    return marker
+
+def ensure_schema(app):
+    """
+    Runs create_schema() only when no marker exists for the current
+    database/model combination, so warm processes skip the DDL round trips.
+    Returns True when the schema was (re)created.
+    """
+    if _is_memory_db(app):
+        # Nothing persists between processes, so a marker would lie
+        with app.app_context():
+            db.create_all()
+        return True
+    marker = _marker_path(app)
+    sqlite_file = _sqlite_file(app)
+    if os.path.exists(marker) and (sqlite_file is None or os.path.exists(sqlite_file)):
+        return False
+    create_schema(app)
+    return True
@@ -0,0 +1,283 @@
+"""
+"Similar past projects" lookup over historical records and stored predictions.
+
+Rows are indexed once per process by their typed features (floors, area,
+rooms) and partitioned by city/quality, so a top-k query is a brute-force
+distance scan over a single partition: vectorized with NumPy when it is
+installed, heapq otherwise. The index is kept current incrementally:
+each lookup first folds in rows above the per-table id watermark and
+predictions whose `updated_at` (set by PATCH /result/<id>) is past the
+edit watermark (two indexed range queries, normally empty), which picks up
+inserts and edits from every worker without a rebuild. Edited rows are
+tombstoned in their old partition and re-added with their new features.
+Prediction hits are checked against the live table before they are
+returned, so rows archived or deleted by any process are evicted.
+"""
+import heapq
+import threading
+
+from flask import current_app
+
+from .compact import unpack_details
+from .json_provider import loads
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python scan is used instead
+    np = None
+
+FEATURES = ("floors", "area_sqft", "rooms")
+# Distance units: one floor ~ 250 sqft ~ 2 rooms
+SCALES = (1.0, 250.0, 2.0)
+SOURCES = ("historical", "prediction")
+CHUNK_ROWS = 10000
+MAX_K = 50
+
+def partition_key(city, quality):
+    quality = (quality or 'standard').lower()
+    if quality == 'economical': quality = 'basic'
+    return f"{city}|{quality}"
+
+def scaled(floors, area, rooms):
+    if rooms is None:
+        rooms = round(area / 180)  # typical plan when the record has no room count
+    return (floors / SCALES[0], area / SCALES[1], rooms / SCALES[2])
+
+class Partition:
+    """Append-only column store for one city/quality pair; removed rows are tombstoned."""
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.dead = 0
+        if np is not None:
+            self.features = np.empty((capacity, len(FEATURES)))
+            self.cost = np.empty(capacity)
+            self.ref = np.empty(capacity, dtype=np.int64)
+            self.owner = np.empty(capacity, dtype=np.int64)
+            self.source = np.empty(capacity, dtype=np.int8)
+        else:
+            self.features, self.cost, self.ref, self.owner, self.source = [], [], [], [], []
+
+    def _grow(self, needed):
+        capacity = len(self.cost)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("features", "cost", "ref", "owner", "source"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def extend(self, rows):
+        """rows: (source_code, ref_id, owner_id, scaled_features, cost) tuples; returns the first position."""
+        start = self.size
+        if not rows:
+            return start
+        if np is None:
+            for source, ref, owner, feats, cost in rows:
+                self.source.append(source)
+                self.ref.append(ref)
+                self.owner.append(owner)
+                self.features.append(feats)
+                self.cost.append(cost)
+            self.size += len(rows)
+            return start
+        end = start + len(rows)
+        self._grow(end)
+        source, ref, owner, feats, cost = zip(*rows)
+        self.source[start:end] = source
+        self.ref[start:end] = ref
+        self.owner[start:end] = owner
+        self.features[start:end] = feats
+        self.cost[start:end] = cost
+        self.size = end
+        return start
+
+    def remove(self, i):
+        """Tombstones position `i`: it keeps its slot but never matches again."""
+        if self.source[i] >= 0:
+            self.source[i] = -1
+            self.dead += 1
+
+    def nearest(self, query, k, exclude=None, source=None):
+        """Positions and distances of the k closest rows, nearest first."""
+        if self.size == 0:
+            return []
+        if np is None:
+            def candidates():
+                for i in range(self.size):
+                    if self.source[i] < 0 or (source is not None and self.source[i] != source):
+                        continue
+                    if exclude is not None and (self.source[i], self.ref[i]) == exclude:
+                        continue
+                    f = self.features[i]
+                    yield ((f[0] - query[0]) ** 2 + (f[1] - query[1]) ** 2 + (f[2] - query[2]) ** 2, i)
+            return [(i, d ** 0.5) for d, i in heapq.nsmallest(k, candidates())]
+
+        n = self.size
+        dist = ((self.features[:n] - np.asarray(query)) ** 2).sum(axis=1)
+        dist[self.source[:n] < 0] = np.inf
+        if source is not None:
+            dist[self.source[:n] != source] = np.inf
+        if exclude is not None:
+            dist[(self.source[:n] == exclude[0]) & (self.ref[:n] == exclude[1])] = np.inf
+        k = min(k, n)
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return [(int(i), float(dist[i]) ** 0.5) for i in top if np.isfinite(dist[i])]
+
+class SimilarityIndex:
+    def __init__(self):
+        self.partitions = {}
+        self.watermarks = {"historical": 0, "prediction": 0}
+        self.edited_since = None  # newest Prediction.updated_at folded in
+        self.positions = {}       # (source_code, ref_id) -> (partition key, position)
+        self.revisions = {}       # prediction id -> revision indexed, for edited rows
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return sum(p.size - p.dead for p in self.partitions.values())
+
+    def add(self, rows):
+        """
+        rows: (source, ref_id, owner_id, city, quality, floors, area, rooms, cost)
+        tuples. A row already in the index replaces its previous entry.
+        """
+        grouped = {}
+        for source, ref, owner, city, quality, floors, area, rooms, cost in rows:
+            grouped.setdefault(partition_key(city, quality), []).append(
+                (SOURCES.index(source), ref, owner or 0, scaled(floors, area, rooms), cost))
+        with self.lock:
+            for key, items in grouped.items():
+                for item in items:
+                    self._remove((item[0], item[1]))
+                start = self.partitions.setdefault(key, Partition()).extend(items)
+                for offset, item in enumerate(items):
+                    self.positions[(item[0], item[1])] = (key, start + offset)
+
+    def _remove(self, code_ref):
+        where = self.positions.pop(code_ref, None)
+        if where is not None:
+            self.partitions[where[0]].remove(where[1])
+        return where is not None
+
+    def remove(self, source, ref):
+        """Drops one row (e.g. a prediction that was archived or deleted); returns whether it was indexed."""
+        with self.lock:
+            if source == "prediction":
+                self.revisions.pop(ref, None)
+            return self._remove((SOURCES.index(source), ref))
+
+    @staticmethod
+    def _prediction_row(r):
+        inputs = unpack_details(r.details)[0] if r.details is not None else loads(r.inputs)
+        return ("prediction", r.id, r.user_id, inputs.get('city'), inputs.get('quality'),
+                inputs.get('floors', 1), inputs.get('area_sqft_estimate', 0),
+                inputs.get('rooms_estimate'), r.total_cost)
+
+    def refresh(self):
+        """Folds in rows inserted or edited since the last refresh; returns how many."""
+        from . import db
+        from .models import HistoricalRecord as H, Prediction as P
+        added = 0
+
+        q = (db.session.query(H.id, H.city, H.quality, H.floors, H.area_sqft, H.rooms, H.total_cost)
+             .filter(H.id > self.watermarks["historical"]).order_by(H.id))
+        batch = []
+        for r in q.yield_per(CHUNK_ROWS):
+            batch.append(("historical", r.id, None, r.city, r.quality, r.floors, r.area_sqft, r.rooms, r.total_cost))
+            if len(batch) >= CHUNK_ROWS:
+                added += self._commit_batch("historical", batch)
+                batch = []
+        added += self._commit_batch("historical", batch)
+
+        q = (db.session.query(P.id, P.user_id, P.inputs, P.details, P.total_cost, P.revision)
+             .filter(P.id > self.watermarks["prediction"]).order_by(P.id))
+        batch = []
+        for r in q.yield_per(CHUNK_ROWS):
+            if (r.revision or 1) > 1:
+                self.revisions[r.id] = r.revision  # already indexed with its edits
+            batch.append(self._prediction_row(r))
+            if len(batch) >= CHUNK_ROWS:
+                added += self._commit_batch("prediction", batch)
+                batch = []
+        added += self._commit_batch("prediction", batch)
+        return added + self._refresh_edits()
+
+    def _refresh_edits(self):
+        """Re-indexes predictions edited since `edited_since` (>=, so same-timestamp edits are not lost)."""
+        from . import db
+        from .models import Prediction as P
+        q = (db.session.query(P.id, P.user_id, P.inputs, P.details, P.total_cost, P.revision, P.updated_at)
+             .filter(P.updated_at.isnot(None), P.id <= self.watermarks["prediction"]))
+        if self.edited_since is not None:
+            q = q.filter(P.updated_at >= self.edited_since)
+        rows = []
+        for r in q.order_by(P.updated_at):
+            self.edited_since = r.updated_at
+            if self.revisions.get(r.id) != r.revision:
+                self.revisions[r.id] = r.revision
+                rows.append(self._prediction_row(r))
+        self.add(rows)
+        return len(rows)
+
+    def _evict_missing(self, hits):
+        """Removes prediction hits that are no longer in the live table; returns how many."""
+        refs = [hit["ref_id"] for hit in hits if hit["source"] == "prediction"]
+        if not refs:
+            return 0
+        from . import db
+        from .models import Prediction as P
+        live = {i for (i,) in db.session.query(P.id).filter(P.id.in_(refs))}
+        return sum(self.remove("prediction", ref) for ref in refs if ref not in live)
+
+    def _commit_batch(self, source, batch):
+        if not batch:
+            return 0
+        self.add(batch)
+        self.watermarks[source] = max(self.watermarks[source], batch[-1][1])
+        return len(batch)
+
+    def query(self, city, quality, floors, area, rooms, k=10, exclude=None, source=None):
+        """
+        Top-k neighbours in the city/quality partition. `exclude` is a
+        (source, ref_id) pair to skip (the query row itself); `source`
+        restricts matches to "historical" or "prediction".
+        """
+        partition = self.partitions.get(partition_key(city, quality))
+        if partition is None:
+            return []
+        while True:
+            hits = self._query(partition, floors, area, rooms, k, exclude, source)
+            if not self._evict_missing(hits):
+                return hits
+
+    def _query(self, partition, floors, area, rooms, k, exclude, source):
+        exclude_code = (SOURCES.index(exclude[0]), exclude[1]) if exclude else None
+        source_code = SOURCES.index(source) if source else None
+        with self.lock:
+            hits = partition.nearest(scaled(floors, area, rooms), k, exclude_code, source_code)
+            return [{
+                "source": SOURCES[int(partition.source[i])],
+                "ref_id": int(partition.ref[i]),
+                "owner_id": int(partition.owner[i]) or None,
+                "features": [round(float(v) * s, 2) for v, s in zip(partition.features[i], SCALES)],
+                "total_cost": float(partition.cost[i]),
+                "distance": round(d, 4),
+            } for i, d in hits]
+
+_build_lock = threading.Lock()
+
+def get_index(app=None):
+    """The app's index, caught up with the database."""
+    app = app or current_app
+    index = app.extensions.get('similarity_index')
+    if index is None:
+        with _build_lock:
+            index = app.extensions.setdefault('similarity_index', SimilarityIndex())
+    with _build_lock:
+        added = index.refresh()
+    if added > 1000:
+        print(f"Similarity index: +{added} rows ({len(index)} total)")
+    return index
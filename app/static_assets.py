@@ -0,0 +1,175 @@
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, request
+
+# Files under assets/ carry a content hash in their name (Vite build output)
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Entry points must be revalidated so a new deploy is picked up immediately
+REVALIDATE_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+
+REVALIDATE_FILES = {"index.html", "sw.js", "manifest.json"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+class StaticAsset:
+    __slots__ = ("path", "size", "mimetype", "etag", "last_modified",
+                 "cache_control", "data", "variants")
+
+    def __init__(self, path, size, mimetype, etag, last_modified, cache_control, data):
+        self.path = path
+        self.size = size
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+        self.data = data
+        self.variants = {}  # encoding -> (path, size, data)
+
+class StaticManifest:
+    """
+    In-memory index of the built SPA (client/dist), created once at startup.
+    Requests are answered from the index without stat() calls; small files
+    are held in memory, larger ones are streamed from their recorded path.
+    Pre-built `.br`/`.gz` siblings (see `flask compress-assets`) are served
+    when the client accepts them.
+    """
+
+    def __init__(self, root, inline_max_bytes=1024 * 1024):
+        self.root = root
+        self.inline_max_bytes = inline_max_bytes
+        self.assets = {}
+        if root and os.path.isdir(root):
+            self._scan(root, "")
+
+    def _scan(self, directory, prefix):
+        compressed = {}
+        for entry in os.scandir(directory):
+            rel = prefix + entry.name
+            if entry.is_dir():
+                self._scan(entry.path, rel + "/")
+                continue
+            for encoding, suffix in ENCODINGS:
+                if entry.name.endswith(suffix):
+                    compressed[rel] = (encoding, entry)
+                    break
+            else:
+                self.assets[rel] = self._load(rel, entry)
+
+        for rel, (encoding, entry) in compressed.items():
+            base = self.assets.get(rel.rsplit(".", 1)[0])
+            if base is not None:
+                st = entry.stat()
+                base.variants[encoding] = (entry.path, st.st_size, self._read(entry.path, st.st_size))
+
+    def _read(self, path, size):
+        if size > self.inline_max_bytes:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _load(self, rel, entry):
+        st = entry.stat()
+        data = self._read(entry.path, st.st_size)
+        h = hashlib.sha1()
+        if data is not None:
+            h.update(data)
+        else:
+            with open(entry.path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    h.update(chunk)
+
+        mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if rel.startswith("assets/"):
+            cache_control = IMMUTABLE_CACHE
+        elif rel in REVALIDATE_FILES:
+            cache_control = REVALIDATE_CACHE
+        else:
+            cache_control = DEFAULT_CACHE
+        return StaticAsset(entry.path, st.st_size, mimetype, h.hexdigest()[:20],
+                           int(st.st_mtime), cache_control, data)
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def __len__(self):
+        return len(self.assets)
+
+def _choose_encoding(asset):
+    if not asset.variants:
+        return None
+    accepted = request.accept_encodings
+    for encoding, _ in ENCODINGS:
+        if encoding in asset.variants and accepted[encoding]:
+            return encoding
+    return None
+
+def _file_body(path, size):
+    def generate():
+        with open(path, "rb") as f:
+            remaining = size
+            while remaining > 0:
+                chunk = f.read(min(65536, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    return generate()
+
+def serve_asset(asset):
+    """Builds the response for a manifest entry, honouring If-None-Match."""
+    encoding = _choose_encoding(asset)
+    etag = asset.etag + ("-" + encoding if encoding else "")
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        if encoding:
+            path, size, data = asset.variants[encoding]
+        else:
+            path, size, data = asset.path, asset.size, asset.data
+        body = data if data is not None else _file_body(path, size)
+        response = Response(body, mimetype=asset.mimetype, direct_passthrough=data is None)
+        response.content_length = size
+        if encoding:
+            response.content_encoding = encoding
+        response.last_modified = asset.last_modified
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = asset.cache_control
+    if asset.variants:
+        response.vary.add("Accept-Encoding")
+    return response
+
+def init_static_manifest(app):
+    manifest = StaticManifest(app.static_folder,
+                              inline_max_bytes=app.config.get('STATIC_INLINE_MAX_BYTES', 1024 * 1024))
+    app.extensions['static_manifest'] = manifest
+    return manifest
+
+def compress_assets(root, min_size=1024, extensions=(".js", ".css", ".html", ".json", ".svg", ".txt")):
+    """Writes `.gz` (and `.br` when the brotli module is installed) next to each text asset."""
+    import gzip
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(extensions) or os.path.getsize(os.path.join(directory, name)) < min_size:
+                continue
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                raw = f.read()
+            outputs = [(path + ".gz", gzip.compress(raw, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                outputs.append((path + ".br", brotli.compress(raw, quality=11)))
+            for out_path, payload in outputs:
+                if len(payload) < len(raw):
+                    with open(out_path, "wb") as f:
+                        f.write(payload)
+                    written.append(out_path)
+    return written
@@ -0,0 +1,247 @@
+"""
+Element-level quantity takeoff (QUANTITY_MODEL = "takeoff").
+
+CostEstimatorModel prices everything as area * factor. TakeoffModel
+measures the building instead, from the inputs estimate() already has:
+
+    walls     external run (wall_length_ft, else the plate perimeter) and
+              internal partitions (from rooms_estimate) -> brickwork volume
+              -> bricks and mortar cement
+    slabs     one RCC slab per floor plus beams/columns, and the footings
+              under the ground floor -> concrete cement and steel
+    surfaces  plastered wall faces and ceilings (carpet_ratio of the plate)
+              -> plaster cement, paint and floor screed
+
+Labour follows from productivity rates per element. Quantities cover the
+whole building (all floors), so the total is the breakdown sum and is not
+linear in floors or area: footings are paid once and walls scale with the
+plate's side, not its area. The formulas are plain arithmetic, so the same
+code takes floats (one request) or NumPy arrays (takeoff_batch, the sweep
+grid); NumPy is optional for single estimates.
+"""
+from typing import Any, Dict
+
+from .cost_model import CostEstimatorModel, compute_cost_breakdown, load_unit_costs
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only batch evaluation needs it
+    np = None
+
+STOREY_HEIGHT_FT = 10.0
+EXTERNAL_WALL_FT = 0.75      # 9" brick wall
+INTERNAL_WALL_FT = 0.375     # 4.5" partition
+EXTERNAL_OPENINGS = 0.15     # doors/windows deducted from external walls
+INTERNAL_OPENINGS = 0.10
+BRICKS_PER_CFT = 13.5        # 9"x4.5"x3" bricks incl. 10mm joints
+MORTAR_SHARE = 0.25          # mortar volume per volume of brickwork
+SLAB_FT = 5 / 12             # 125mm slab
+FRAME_SHARE = 0.40           # beams and columns, relative to slab concrete
+FOOTING_CFT_PER_SQFT = 0.35  # footings + plinth beam under the ground floor
+CFT_PER_BAG = 1.226          # 50kg cement bag
+DRY_VOLUME = 1.33            # dry volume factor for mortar/plaster
+CONCRETE_BAGS_PER_CFT = 8.0 / 35.31   # M20: ~8 bags per m3
+STEEL_KG_PER_CFT = 180.0 / 35.31      # ~180 kg per m3 of structural concrete
+PLASTER_BAGS_PER_SQFT = 0.0086        # 12mm, 1:4
+SCREED_BAGS_PER_SQFT = 0.025          # 40mm floor bed, 1:4
+PAINT_LITERS_PER_SQFT_COAT = 0.009
+# Worker-days per unit of work
+LABOR = {"bricks": 1 / 500, "concrete_cft": 0.09, "plaster_sqft": 1 / 50,
+         "paint_sqft_coat": 1 / 300, "floor_sqft": 0.02}
+
+# Finishes by quality (model names; "basic" is mapped to "economical")
+QUALITY = {
+    "economical": {"paint_coats": 2, "finish": 0.9},
+    "standard": {"paint_coats": 2, "finish": 1.0},
+    "premium": {"paint_coats": 3, "finish": 1.2},
+    "high-end": {"paint_coats": 3, "finish": 1.35},
+}
+DEFAULT_CARPET_RATIO = 0.72
+
+def _pos(x):
+    if np is not None and isinstance(x, np.ndarray):
+        return np.maximum(x, 0.0)
+    return max(x, 0.0)
+
+def default_rooms(area):
+    """Room count for a plate of `area` sqft when none is given (~180 sqft per room, 1-10)."""
+    if np is not None and isinstance(area, np.ndarray):
+        return np.clip(area / 180.0, 1, 10)
+    return min(max(area / 180.0, 1), 10)
+
+def takeoff(area, floors, rooms, wall_length, carpet_ratio, paint_coats, finish):
+    """
+    Element quantities for buildings of `floors` storeys on a plate of
+    `area` sqft. Every argument may be a float or a NumPy array (broadcast).
+    Returns {element: {measure: value}}.
+    """
+    side = _pos(area) ** 0.5
+    external_ft = wall_length
+    internal_ft = 2 * _pos(_pos(rooms) ** 0.5 - 1) * side  # grid of sqrt(rooms) x sqrt(rooms) rooms
+
+    ext_face = external_ft * STOREY_HEIGHT_FT * (1 - EXTERNAL_OPENINGS)
+    int_face = internal_ft * STOREY_HEIGHT_FT * (1 - INTERNAL_OPENINGS)
+    brickwork = (ext_face * EXTERNAL_WALL_FT + int_face * INTERNAL_WALL_FT) * floors
+    bricks = brickwork * BRICKS_PER_CFT
+    mortar_bags = brickwork * MORTAR_SHARE * DRY_VOLUME / 7 / CFT_PER_BAG  # 1:6 mix
+
+    slab_cft = area * SLAB_FT * floors
+    concrete = slab_cft * (1 + FRAME_SHARE) + area * FOOTING_CFT_PER_SQFT
+    concrete_bags = concrete * CONCRETE_BAGS_PER_CFT
+    steel = concrete * STEEL_KG_PER_CFT
+
+    carpet = area * carpet_ratio * floors
+    plaster = (2 * ext_face + 2 * int_face) * floors
+    paint_area = plaster + carpet  # walls and ceilings
+    plaster_bags = plaster * PLASTER_BAGS_PER_SQFT
+    screed_bags = carpet * SCREED_BAGS_PER_SQFT
+    paint = paint_area * paint_coats * PAINT_LITERS_PER_SQFT_COAT
+
+    labor = {
+        "masonry": bricks * LABOR["bricks"],
+        "concrete": concrete * LABOR["concrete_cft"],
+        "plaster": plaster * LABOR["plaster_sqft"] * finish,
+        "painting": paint_area * paint_coats * LABOR["paint_sqft_coat"] * finish,
+        "flooring": carpet * LABOR["floor_sqft"] * finish,
+    }
+    return {
+        "walls": {"external_ft": external_ft * floors, "internal_ft": internal_ft * floors,
+                  "brickwork_cft": brickwork, "bricks": bricks, "mortar_cement_bags": mortar_bags},
+        "slabs": {"slab_cft": slab_cft, "concrete_cft": concrete, "concrete_cement_bags": concrete_bags,
+                  "steel_kg": steel},
+        "surfaces": {"plaster_sqft": plaster, "paint_sqft": paint_area, "plaster_cement_bags": plaster_bags,
+                     "screed_cement_bags": screed_bags, "paint_liters": paint},
+        "labor": labor,
+    }
+
+def materials(elements):
+    """The five quantities compute_cost_breakdown prices, in QTY order."""
+    walls, slabs, surfaces = elements["walls"], elements["slabs"], elements["surfaces"]
+    return [
+        walls["bricks"],
+        walls["mortar_cement_bags"] + slabs["concrete_cement_bags"] + surfaces["plaster_cement_bags"]
+        + surfaces["screed_cement_bags"],
+        slabs["steel_kg"],
+        surfaces["paint_liters"],
+        sum(elements["labor"].values()),
+    ]
+
+def quality_params(quality):
+    quality = 'economical' if quality == 'basic' else quality
+    return QUALITY.get(quality, QUALITY["standard"])
+
+def takeoff_batch(area, floors, rooms=None, wall_length=None, carpet_ratio=None, quality="standard"):
+    """
+    Vectorized takeoff for many buildings (NumPy arrays or scalars; missing
+    rooms/walls/carpet use the same defaults as a single estimate). `quality`
+    is one name or an array of names. Returns the element dict with array
+    values.
+    """
+    if np is None:
+        raise ImportError("takeoff_batch requires numpy")
+    area = np.asarray(area, dtype=float)
+    floors = np.asarray(floors, dtype=float)
+    rooms = default_rooms(area) if rooms is None else np.asarray(rooms, dtype=float)
+    wall_length = 4 * np.sqrt(area) if wall_length is None else np.asarray(wall_length, dtype=float)
+    carpet_ratio = DEFAULT_CARPET_RATIO if carpet_ratio is None else np.asarray(carpet_ratio, dtype=float)
+    if isinstance(quality, str):
+        params = quality_params(quality)
+        coats, finish = params["paint_coats"], params["finish"]
+    else:
+        names = np.asarray(quality)
+        coats = np.ones(names.shape)
+        finish = np.ones(names.shape)
+        for name in np.unique(names):
+            params = quality_params(str(name))
+            coats[names == name] = params["paint_coats"]
+            finish[names == name] = params["finish"]
+    return takeoff(area, floors, rooms, wall_length, carpet_ratio, coats, finish)
+
+def _unit_prices(u_costs):
+    """Price per unit of each materials() quantity, before the city×quality multiplier."""
+    costs = compute_cost_breakdown({"bricks_count": 1, "cement_bags": 1, "steel_kg": 1, "paint_liters": 1,
+                                    "worker_days": 1}, "Chennai", "standard", u_costs, multiplier=1.0)
+    return [costs["breakdown"][m] for m in ("bricks", "cement", "steel", "paint", "labor")]
+
+class TakeoffModel(CostEstimatorModel):
+    """Drop-in quantity/total model backed by the element takeoff (see module docstring)."""
+    linear = False  # app/pricing.py evaluates sweep grids through grid_totals()
+    version = "takeoff-1"
+
+    def __init__(self, calibration=None, unit_costs=None):
+        # Calibration factors are fitted for the area model and are not applied here
+        super().__init__(calibration=None)
+        self.unit_costs = unit_costs
+
+    def _costs(self):
+        if self.unit_costs is None:
+            try:
+                self.unit_costs = load_unit_costs()
+            except Exception:
+                self.unit_costs = {}
+        return self.unit_costs
+
+    @staticmethod
+    def _item(data):
+        if isinstance(data, list) and len(data) > 0:
+            return data[0]
+        if hasattr(data, 'iloc'):
+            return data.iloc[0].to_dict()
+        return data
+
+    def bom(self, data: Dict[str, Any]):
+        """Detailed bill of materials for one building (model_input() keys)."""
+        item = self._item(data)
+        area = float(item.get('area_sqft', 0) or 0)
+        floors = float(item.get('no_of_floors', 1) or 1)
+        rooms = item.get('rooms')
+        wall = item.get('wall_length_ft')
+        carpet = item.get('carpet_ratio')
+        params = quality_params(item.get('quality', 'standard'))
+        return takeoff(area, floors,
+                       float(rooms) if rooms else default_rooms(area),
+                       float(wall) if wall else 4 * area ** 0.5,
+                       float(carpet) if carpet else DEFAULT_CARPET_RATIO,
+                       params["paint_coats"], params["finish"])
+
+    def predict(self, data: Dict[str, Any]):
+        return [materials(self.bom(data))]
+
+    def predict_total_cost(self, data: Dict[str, Any]):
+        item = self._item(data)
+        q = self.predict(item)[0]
+        res = compute_cost_breakdown(dict(zip(("bricks_count", "cement_bags", "steel_kg", "paint_liters",
+                                               "worker_days"), q)),
+                                     item.get('city', 'Chennai'), item.get('quality', 'standard'),
+                                     self._costs())
+        return [res["total"]]
+
+    def grid_totals(self, cities, qualities, floors, areas, rooms=None, wall_length=None):
+        """
+        Totals over cities x qualities x floors x areas, flattened row-major
+        (like PricingTables.evaluate). `rooms`/`wall_length` apply to every
+        cell; None derives them from the area like bom() does.
+        """
+        u_costs = self._costs()
+        prices = _unit_prices(u_costs)
+        mults = [[compute_cost_breakdown({"worker_days": 1}, c, q, u_costs)["breakdown"]["labor"] / prices[4]
+                  for q in qualities] for c in cities]
+        if np is None:
+            totals = []
+            for i, _ in enumerate(cities):
+                for j, q in enumerate(qualities):
+                    for f in floors:
+                        for a in areas:
+                            qty = self.predict({"quality": q, "area_sqft": a, "no_of_floors": f,
+                                                "rooms": rooms, "wall_length_ft": wall_length})[0]
+                            totals.append(max(0, mults[i][j] * sum(p * x for p, x in zip(prices, qty))))
+            return totals
+        f_grid, a_grid = np.meshgrid(np.asarray(floors, dtype=float), np.asarray(areas, dtype=float), indexing='ij')
+        per_quality = []
+        for q in qualities:
+            qty = materials(takeoff_batch(a_grid, f_grid, rooms=rooms, wall_length=wall_length,
+                                          quality=q))
+            per_quality.append(sum(p * x for p, x in zip(prices, qty)))
+        base = np.stack(per_quality)                                    # (qualities, floors, areas)
+        grid = np.asarray(mults, dtype=float)[:, :, None, None] * base[None]
+        return np.maximum(grid, 0).ravel()
@@ -0,0 +1,111 @@
+"""
+Bounded-memory handling of blueprint uploads.
+
+Werkzeug already spools multipart file parts to a temporary file once they
+grow past a small threshold. `read_upload` walks that stream in fixed-size
+chunks, sniffing the image signature from the first bytes, hashing
+incrementally and enforcing the size limit, then rewinds it so Pillow can
+open it in place without another in-memory copy.
+"""
+import hashlib
+import shutil
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"BM", "bmp"),
+)
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+class Upload:
+    __slots__ = ("stream", "size", "sha256", "kind")
+
+    def __init__(self, stream, size, sha256, kind):
+        self.stream = stream
+        self.size = size
+        self.sha256 = sha256
+        self.kind = kind
+
+def sniff_image(header):
+    for signature, kind in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return kind
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except AttributeError:
+        return False
+
+def stream_sha256(stream, chunk_size=CHUNK_SIZE):
+    """Hex digest of a seekable stream, read in chunks; leaves it rewound."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def read_upload(stream, max_bytes, chunk_size=CHUNK_SIZE, sha256=None):
+    """
+    Validates an uploaded image stream chunk by chunk. Returns an Upload whose
+    `stream` is positioned at 0 and ready for PIL.Image.open. Raises
+    UploadError (413 oversize, 415 not an image, 400 empty). A `sha256`
+    already computed for the stream (stream_sha256) is reused: only the
+    header is read and the size comes from seeking to the end.
+    """
+    if not _seekable(stream):
+        # Copy into a spooled buffer first: RAM up to SPOOL_MAX_MEMORY, disk beyond
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        shutil.copyfileobj(stream, spool, chunk_size)
+        stream = spool
+        sha256 = None
+    stream.seek(0)
+
+    if sha256 is not None:
+        kind = sniff_image(stream.read(16))
+        size = stream.seek(0, 2)
+        stream.seek(0)
+        if size == 0:
+            raise UploadError("Blueprint file is empty", 400)
+        if kind is None:
+            raise UploadError("Blueprint must be a PNG, JPEG, GIF, TIFF, BMP or WebP image", 415)
+        if size > max_bytes:
+            raise UploadError(f"Blueprint exceeds the {max_bytes // (1024 * 1024)} MB limit", 413)
+        return Upload(stream, size, sha256, kind)
+
+    digest = hashlib.sha256()
+    size = 0
+    kind = None
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if size == 0:
+            kind = sniff_image(chunk[:16])
+            if kind is None:
+                raise UploadError("Blueprint must be a PNG, JPEG, GIF, TIFF, BMP or WebP image", 415)
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadError(f"Blueprint exceeds the {max_bytes // (1024 * 1024)} MB limit", 413)
+        digest.update(chunk)
+
+    if size == 0:
+        raise UploadError("Blueprint file is empty", 400)
+    stream.seek(0)
+    return Upload(stream, size, digest.hexdigest(), kind)
@@ -3,8 +3,6 @@ import threading
 from flask import render_template, current_app
 from flask_mail import Message
 # from app import mail  # Moved to local imports to avoid circular dependency
-from fpdf import FPDF
-from io import BytesIO
 
 def send_async_email(app, msg):
     from . import mail # Local import
@@ -35,6 +33,7 @@ def generate_pdf(data):
     """
     Generates a professional PDF report using FPDF2 (pure Python).
     """
+    from fpdf import FPDF  # Deferred: only needed once a report is rendered
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Helvetica", size=12)
@@ -123,9 +122,4 @@ def generate_pdf(data):
     pdf.set_text_color(128, 128, 128)
     pdf.cell(0, 10, "Generated by Civil Estimator AI", align="C")
 
-    # Output to BytesIO
-    buffer = BytesIO()
-    pdf_output = pdf.output()
-    buffer.write(pdf_output)
-    buffer.seek(0)
-    return buffer.getvalue()
+    return bytes(pdf.output())
@@ -0,0 +1,12 @@
+import sys
+import os
+
+# Add the project directory to the sys.path
+project_home = os.path.dirname(os.path.abspath(__file__))
+if project_home not in sys.path:
+    sys.path.insert(0, project_home)
+
+# ASGI entry point: `uvicorn asgi:application`. The data API endpoints run
+# natively async, everything else is served by the Flask app.
+from app.asgi import create_asgi_app
+application = create_asgi_app()
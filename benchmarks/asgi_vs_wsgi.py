@@ -0,0 +1,171 @@
+"""
+Connections-per-worker comparison: gunicorn (sync WSGI, gthread) vs uvicorn
+(asgi.py) with ONE worker each.
+
+Each simulated client uploads a blueprint over a slow link (the body is sent
+in chunks with a pause between them), which is where a WSGI worker thread
+sits idle waiting on I/O. For every concurrency level the script reports
+wall time and latency percentiles, plus the largest level each server
+handled with p99 within --sla x the single-connection latency.
+
+    python benchmarks/asgi_vs_wsgi.py --levels 1,8,16,32 --threads 4
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, environment
+from loadtest import Client, _free_port, multipart, percentile
+from smtp_sink import SMTPSink
+
+def noisy_blueprint(megapixels):
+    """An incompressible scan, so the body is larger than the socket buffers."""
+    import io
+    from PIL import Image
+    side = int((megapixels * 1_000_000) ** 0.5)
+    buf = io.BytesIO()
+    Image.effect_noise((side, side), 64).save(buf, format='PNG')
+    return buf.getvalue()
+
+def start(cmd, env, port):
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit(f"{cmd[2]} exited during startup")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{cmd[2]} did not start")
+
+def slow_upload(port, token, body, content_type, chunks, pause):
+    """Sends one multipart estimate in `chunks` pieces; returns (status, seconds)."""
+    t0 = time.perf_counter()
+    with socket.create_connection(('127.0.0.1', port), timeout=120) as sock:
+        head = (f"POST /api/data/estimate HTTP/1.1\r\nHost: localhost\r\n"
+                f"Authorization: Bearer {token}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode()
+        sock.sendall(head)
+        step = max(1, len(body) // chunks)
+        for offset in range(0, len(body), step):
+            sock.sendall(body[offset:offset + step])
+            time.sleep(pause)
+        response = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            response += data
+    status = int(response.split(b" ", 2)[1]) if response else 0
+    return status, time.perf_counter() - t0
+
+def run_level(port, token, body, content_type, concurrency, chunks, pause):
+    results = []
+    lock = threading.Lock()
+
+    def client():
+        try:
+            outcome = slow_upload(port, token, body, content_type, chunks, pause)
+        except OSError:
+            outcome = (0, float('nan'))
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    latencies = sorted(s * 1000 for status, s in results if status == 201)
+    return {
+        "concurrency": concurrency,
+        "wall_s": round(wall, 2),
+        "ok": len(latencies),
+        "errors": concurrency - len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+def bench_server(name, cmd, env, port, levels, body, content_type, chunks, pause, sla):
+    proc = start(cmd, env, port)
+    try:
+        client = Client(f"http://127.0.0.1:{port}")
+        email = f"asgi-bench-{name}@example.com"
+        status, data = client.json('POST', '/api/auth/register',
+                                   {"username": f"ab{name}"[:20], "email": email, "password": "bench-password"})
+        if status != 201:
+            status, data = client.json('POST', '/api/auth/login', {"email": email, "password": "bench-password"})
+        token = json.loads(data)['access_token']
+
+        rows = [run_level(port, token, body, content_type, c, chunks, pause) for c in levels]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    single = rows[0]['p99_ms'] or 1.0
+    within = [r['concurrency'] for r in rows if r['errors'] == 0 and r['p99_ms'] <= single * sla]
+    return {"server": name, "levels": rows, "connections_within_sla": max(within) if within else 0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare connections per worker: WSGI vs ASGI.")
+    parser.add_argument('--levels', default='1,8,16,32')
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn gthread threads")
+    parser.add_argument('--chunks', type=int, default=10, help="pieces each upload is split into")
+    parser.add_argument('--pause', type=float, default=0.2, help="seconds between upload pieces")
+    parser.add_argument('--blueprint-mp', type=float, default=8.0)
+    parser.add_argument('--sla', type=float, default=2.0, help="allowed p99 vs single-connection p99")
+    parser.add_argument('--json', dest='json_out')
+    args = parser.parse_args(argv)
+    levels = [int(x) for x in args.levels.split(',')]
+
+    sink = SMTPSink().start()
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(os.environ, **sink.mail_env())
+    env.update({"DATABASE_URL": f"sqlite:///{db_path}", "JWT_SECRET_KEY": "asgi-benchmark-secret-key-0123456789",
+                "RATELIMIT_ENABLED": "false"})
+
+    body, content_type = multipart({"city": "Chennai", "quality": "standard", "floors": "2"},
+                                   {"blueprint": ("plan.png", noisy_blueprint(args.blueprint_mp), "image/png")})
+    reports = []
+    try:
+        port = _free_port()
+        reports.append(bench_server(
+            "wsgi", [sys.executable, '-m', 'gunicorn', 'wsgi:application', '--bind', f'127.0.0.1:{port}',
+                     '--workers', '1', '--threads', str(args.threads), '--timeout', '120'],
+            env, port, levels, body, content_type, args.chunks, args.pause, args.sla))
+        port = _free_port()
+        reports.append(bench_server(
+            "asgi", [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+                     '--workers', '1', '--log-level', 'warning'],
+            env, port, levels, body, content_type, args.chunks, args.pause, args.sla))
+    finally:
+        sink.stop()
+
+    print(f"Upload of {len(body) / 1024 / 1024:.1f} MiB in {args.chunks} chunks, {args.pause * 1000:.0f}ms apart; one worker each")
+    print(f"{'server':<8}{'conns':>7}{'wall s':>9}{'ok':>6}{'err':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for report in reports:
+        for row in report['levels']:
+            print(f"{report['server']:<8}{row['concurrency']:>7}{row['wall_s']:>9.2f}{row['ok']:>6}"
+                  f"{row['errors']:>6}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    for report in reports:
+        print(f"{report['server']}: {report['connections_within_sla']} concurrent connections within "
+              f"{args.sla}x single-connection p99")
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({"environment": environment(), "reports": reports}, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
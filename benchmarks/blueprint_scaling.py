@@ -0,0 +1,65 @@
+"""
+Tiled blueprint extraction: scaling with worker count.
+
+Measures extract_tiled_features() on a large single-sheet scan and on a
+multi-page TIFF for 1..N workers (default: up to the CPU count) and prints
+the speedup over one worker. Tile decoding and measuring runs in Pillow's C
+code with the GIL released, so the speedup tracks the number of cores.
+
+    python benchmarks/blueprint_scaling.py --megapixels 64 --pages 4 --json scaling.json
+"""
+import argparse
+import io
+import json
+import os
+import sys
+
+from common import environment, make_blueprint_image, measure
+
+def multipage_tiff(pages, megapixels):
+    from PIL import Image
+    frames = [Image.open(io.BytesIO(make_blueprint_image(megapixels))) for _ in range(pages)]
+    buf = io.BytesIO()
+    frames[0].save(buf, format='TIFF', save_all=True, append_images=frames[1:])
+    return buf.getvalue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=64, help="size of the single-sheet scan")
+    parser.add_argument('--pages', type=int, default=4, help="pages in the multi-page TIFF")
+    parser.add_argument('--page-megapixels', type=float, default=16)
+    parser.add_argument('--tile-px', type=int, default=2048)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', dest='json_out', help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    from app.blueprint_tiles import TileOptions, extract_tiled_features
+    inputs = {
+        f"sheet {args.megapixels:g}MP PNG": make_blueprint_image(args.megapixels),
+        f"{args.pages}x{args.page_megapixels:g}MP TIFF": multipage_tiff(args.pages, args.page_megapixels),
+    }
+    workers = sorted({1, *[w for w in (2, 4, 8, 16, 32) if w < args.max_workers], args.max_workers})
+
+    print(f"{os.cpu_count()} CPUs\n")
+    print(f"{'input':<22}{'workers':>8}{'median ms':>11}{'speedup':>9}")
+    results = {}
+    for label, data in inputs.items():
+        rows = []
+        for n in workers:
+            options = TileOptions(tile_px=args.tile_px, workers=n)
+            stats = measure(lambda: extract_tiled_features(data, options), repeat=args.repeat)
+            base = rows[0]["median_ms"] if rows else stats["median_ms"]
+            rows.append({"workers": n, "median_ms": stats["median_ms"],
+                         "speedup": round(base / stats["median_ms"], 2)})
+            print(f"{label:<22}{n:>8}{stats['median_ms']:>11.1f}{rows[-1]['speedup']:>8.2f}x")
+        results[label] = rows
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({"environment": environment(), "tile_px": args.tile_px, "results": results},
+                      f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
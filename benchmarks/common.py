@@ -0,0 +1,159 @@
+"""Shared helpers for the benchmark scripts (app setup, seeding, timing, reporting)."""
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from config import Config  # noqa: E402
+
+class BenchConfig(Config):
+    TESTING = True
+    MAIL_SUPPRESS_SEND = True
+    JWT_SECRET_KEY = 'benchmark-jwt-secret-key-of-sufficient-length'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL', 'sqlite://')
+    RATELIMIT_ENABLED = False
+
+def make_app(config_class=BenchConfig):
+    from app import create_app
+    return create_app(config_class)
+
+def register(client, username='bench', password='bench-password'):
+    resp = client.post('/api/auth/register', json={
+        "username": username, "email": f"{username}@example.com", "password": password})
+    if resp.status_code != 201:
+        resp = client.post('/api/auth/login', json={"email": f"{username}@example.com", "password": password})
+    body = resp.get_json()
+    return body['user']['id'], {"Authorization": f"Bearer {body['access_token']}"}
+
+CITIES = ["Chennai", "Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Pune", "Coimbatore"]
+QUALITIES = ["economical", "standard", "premium"]
+
+def synthetic_prediction(i, user_id, created_at=None):
+    """One Prediction row as a dict, shaped like what estimate() stores."""
+    city = CITIES[i % len(CITIES)]
+    quality = QUALITIES[i % len(QUALITIES)]
+    area = 600 + (i * 37) % 4000
+    floors = 1 + i % 4
+    qty = {"bricks_count": area * 8, "cement_bags": int(area * 0.4), "steel_kg": area * 4,
+           "paint_liters": int(area * 0.18), "worker_days": int(area * 0.12)}
+    breakdown = {"bricks": area * 52.0, "cement": area * 152.0, "steel": area * 312.0,
+                 "paint": area * 46.8, "labor": area * 120.0}
+    total = sum(breakdown.values()) * floors
+    inputs = {"city": city, "quality": quality, "floors": floors, "carpet_ratio": 0.72,
+              "is_commercial": False, "area_sqft_estimate": float(area),
+              "rooms_estimate": 2 + i % 6, "wall_length_ft": 80.0 + i % 200}
+    return {
+        "user_id": user_id,
+        "inputs": json.dumps(inputs),
+        "quantities": json.dumps(qty),
+        "cost_breakdown": json.dumps(breakdown),
+        "total_cost": total,
+        "predicted_2026_cost": total * 1.07,
+        "created_at": created_at or datetime.utcnow() - timedelta(minutes=i),
+    }
+
+def seed_predictions(app, user_id, count, batch_size=5000, start=0):
+    """Bulk-inserts `count` synthetic predictions for `user_id`."""
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Prediction
+    with app.app_context():
+        for offset in range(start, start + count, batch_size):
+            stop = min(offset + batch_size, start + count)
+            rows = [synthetic_prediction(i, user_id) for i in range(offset, stop)]
+            db.session.execute(insert(Prediction), rows)
+        db.session.commit()
+
+def make_blueprint_image(megapixels, fmt='PNG'):
+    """Encodes a synthetic floor plan of roughly `megapixels` MP."""
+    from PIL import Image, ImageDraw
+    side = int((megapixels * 1_000_000) ** 0.5)
+    img = Image.new('L', (side, side), 255)
+    draw = ImageDraw.Draw(img)
+    step = max(side // 8, 1)
+    width = max(side // 500, 1)
+    for x in range(0, side, step):
+        draw.line([(x, 0), (x, side)], fill=0, width=width)
+        draw.line([(0, x), (side, x)], fill=0, width=width)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+def measure(fn, repeat=5, number=1, warmup=1):
+    """Runs fn `number` times per sample, `repeat` samples; returns per-call stats in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) * 1000.0 / number)
+    samples.sort()
+    p95_index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+    return {
+        "median_ms": round(statistics.median(samples), 6),
+        "min_ms": round(samples[0], 6),
+        "mean_ms": round(statistics.fmean(samples), 6),
+        "p95_ms": round(samples[p95_index], 6),
+        "repeat": repeat,
+        "number": number,
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+    }
+
+def write_results(path, results, extra=None):
+    payload = {"environment": environment(), "results": results}
+    if extra:
+        payload.update(extra)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+def compare_to_baseline(results, baseline_path, tolerance=0.25, min_delta_ms=0.0005):
+    """
+    Compares medians against a previous results file. Returns a list of
+    (name, baseline_ms, current_ms, ratio) for every case that got slower
+    by more than `tolerance` (and by more than `min_delta_ms` in absolute terms).
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f).get('results', {})
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        before, now = base['median_ms'], stats['median_ms']
+        if now > before * (1 + tolerance) and now - before > min_delta_ms:
+            regressions.append((name, before, now, now / before if before else float('inf')))
+    return regressions
+
+def print_results(results, baseline=None):
+    print(f"{'case':<44}{'median ms':>12}{'p95 ms':>12}{'baseline':>12}")
+    print('-' * 80)
+    for name, stats in results.items():
+        base = baseline.get(name, {}).get('median_ms') if baseline else None
+        base_txt = f"{base:>12.4f}" if base is not None else f"{'-':>12}"
+        print(f"{name:<44}{stats['median_ms']:>12.4f}{stats['p95_ms']:>12.4f}{base_txt}")
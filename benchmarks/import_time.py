@@ -0,0 +1,103 @@
+"""
+Cold-start regression benchmark.
+
+Runs `python -X importtime` on the app factory in a fresh interpreter, parses
+the report into a table of the slowest top-level packages and fails when the
+total import time exceeds the budget or when a lazily-loaded module (FPDF,
+Pillow) sneaks back into the startup path.
+
+    python benchmarks/import_time.py --budget-ms 1500 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_CODE = "from app import create_app; create_app()"
+LAZY_MODULES = ["fpdf", "PIL"]
+
+def run_importtime(code=STARTUP_CODE):
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{proc.stderr[-2000:]}")
+    return proc.stderr
+
+def parse_importtime(report):
+    """Returns a list of (module, self_us, cumulative_us, depth) tuples."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+def summarize(rows, top=15):
+    total_us = sum(r[1] for r in rows)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        pkg = name.split('.')[0]
+        packages[pkg] = packages.get(pkg, 0) + self_us
+    ranked = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000.0, 1),
+        "modules": len(rows),
+        "packages": [{"package": p, "self_ms": round(us / 1000.0, 1)} for p, us in ranked],
+        "loaded": sorted({r[0].split('.')[0] for r in rows}),
+    }
+
+def print_table(summary):
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    print('-' * 50)
+    for row in summary['packages']:
+        share = row['self_ms'] / summary['total_ms'] * 100 if summary['total_ms'] else 0
+        print(f"{row['package']:<32}{row['self_ms']:>10.1f}{share:>7.1f}%")
+    print('-' * 50)
+    print(f"{'TOTAL (' + str(summary['modules']) + ' modules)':<32}{summary['total_ms']:>10.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1500.0,
+                        help="fail when total import time exceeds this")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--runs', type=int, default=3,
+                        help="best-of-N to smooth out filesystem noise")
+    parser.add_argument('--json', dest='json_out', help="write the summary to this file")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(args.runs):
+        summary = summarize(parse_importtime(run_importtime()), top=args.top)
+        if best is None or summary['total_ms'] < best['total_ms']:
+            best = summary
+
+    print_table(best)
+    failures = []
+    if best['total_ms'] > args.budget_ms:
+        failures.append(f"cold start {best['total_ms']}ms exceeds budget {args.budget_ms}ms")
+    for mod in LAZY_MODULES:
+        if mod in best['loaded']:
+            failures.append(f"{mod} is imported at startup but should be lazy")
+
+    if args.json_out:
+        best['budget_ms'] = args.budget_ms
+        best['failures'] = failures
+        with open(args.json_out, 'w') as f:
+            json.dump(best, f, indent=2)
+
+    for msg in failures:
+        print(f"❌ {msg}")
+    if failures:
+        return 1
+    print(f"✅ Within cold-start budget ({args.budget_ms}ms)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Load-testing harness for sizing gunicorn workers/threads.
+
+1. Seed synthetic users and predictions straight through the models into
+   DATABASE_URL (default: loadtest.db in the temp directory):
+
+    python benchmarks/loadtest.py seed --users 200 --predictions 50000
+
+2. Replay a login/estimate/dashboard/result mix at a target rate, either
+   against a running server or against one spawned here under gunicorn with
+   mail routed to a local SMTP sink (no network needed):
+
+    python benchmarks/loadtest.py run --spawn --workers 2 --threads 4 \\
+        --rps 40 --duration 60 --mix login=1,estimate=2,dashboard=5,result=2
+
+The driver is open-loop: requests are scheduled at fixed intervals and
+latency is measured from the scheduled time, so a saturated server shows up
+as growing latency instead of silently lowering the offered load.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+# The seeder and the spawned gunicorn must share a database; common.py would
+# otherwise default DATABASE_URL to an in-memory one only this process sees.
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'loadtest.db')}"
+
+from common import ROOT, environment, make_blueprint_image, synthetic_prediction
+from smtp_sink import SMTPSink
+
+PASSWORD = "load-test-password"
+
+# ---------------------------------------------------------------- seeding
+
+def seed(users, predictions, batch_size=5000):
+    """Bulk-creates `users` accounts and `predictions` rows in DATABASE_URL."""
+    from sqlalchemy import insert
+    from app import create_app, db, bcrypt
+    from app.models import User, Prediction
+
+    app = create_app()
+    with app.app_context():
+        hashed = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+        first_new = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        t0 = time.perf_counter()
+        rows = [{"username": f"load{first_new + i}"[:20], "email": f"load{first_new + i}@example.com",
+                 "password": hashed} for i in range(users)]
+        for offset in range(0, len(rows), batch_size):
+            db.session.execute(insert(User), rows[offset:offset + batch_size])
+        db.session.commit()
+        user_ids = [uid for (uid,) in db.session.query(User.id).filter(User.id >= first_new)]
+
+        for offset in range(0, predictions, batch_size):
+            stop = min(offset + batch_size, predictions)
+            batch = [synthetic_prediction(i, user_ids[i % len(user_ids)]) for i in range(offset, stop)]
+            db.session.execute(insert(Prediction), batch)
+        db.session.commit()
+        elapsed = time.perf_counter() - t0
+    print(f"Seeded {len(user_ids)} users and {predictions} predictions in {elapsed:.1f}s into "
+          f"{os.environ['DATABASE_URL']} (password '{PASSWORD}', emails load<N>@example.com from N={first_new})")
+    return first_new, len(user_ids)
+
+# ---------------------------------------------------------------- HTTP client
+
+class Client:
+    """Keep-alive HTTP client, one per worker thread."""
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conn = cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        for attempt in range(2):
+            if self.conn is None:
+                self._connect()
+            try:
+                self.conn.request(method, self.prefix + path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                return resp.status, data
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def json(self, method, path, payload=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        return self.request(method, path, body, headers)
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    chunks = []
+    for name, value in fields.items():
+        chunks.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data, mimetype) in files.items():
+        chunks.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                      f'Content-Type: {mimetype}\r\n\r\n'.encode())
+        chunks.append(data)
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return b"".join(chunks), f"multipart/form-data; boundary={boundary}"
+
+# ---------------------------------------------------------------- scenario
+
+class Session:
+    def __init__(self, email, token, prediction_ids):
+        self.email = email
+        self.token = token
+        self.prediction_ids = prediction_ids
+
+class Scenario:
+    CITIES = ["Chennai", "Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Pune"]
+    QUALITIES = ["basic", "standard", "premium"]
+
+    def __init__(self, users, blueprint, upload_ratio):
+        self.users = users
+        self.blueprint = blueprint
+        self.upload_ratio = upload_ratio
+        self.sessions = []
+        self._lock = threading.Lock()
+
+    def login_all(self, client):
+        for email in self.users:
+            status, body = client.json('POST', '/api/auth/login', {"email": email, "password": PASSWORD})
+            if status != 200:
+                continue
+            token = json.loads(body)['access_token']
+            status, body = client.json('GET', '/api/data/dashboard', token=token)
+            ids = [e['id'] for e in json.loads(body).get('estimations', [])[:200]] if status == 200 else []
+            self.sessions.append(Session(email, token, ids))
+        if not self.sessions:
+            raise SystemExit("No seeded user could log in; run `loadtest.py seed` against the same database first")
+
+    def login(self, client, rng):
+        email = rng.choice(self.users)
+        return client.json('POST', '/api/auth/login', {"email": email, "password": PASSWORD})
+
+    def dashboard(self, client, rng):
+        return client.json('GET', '/api/data/dashboard', token=rng.choice(self.sessions).token)
+
+    def result(self, client, rng):
+        session = rng.choice(self.sessions)
+        if not session.prediction_ids:
+            return self.dashboard(client, rng)
+        return client.json('GET', f'/api/data/result/{rng.choice(session.prediction_ids)}', token=session.token)
+
+    def estimate(self, client, rng):
+        session = rng.choice(self.sessions)
+        fields = {"city": rng.choice(self.CITIES), "quality": rng.choice(self.QUALITIES),
+                  "floors": str(rng.randint(1, 4))}
+        if self.blueprint and rng.random() < self.upload_ratio:
+            body, content_type = multipart(fields, {"blueprint": ("plan.png", self.blueprint, "image/png")})
+            status, data = client.request('POST', '/api/data/estimate', body,
+                                          {"Content-Type": content_type, "Authorization": f"Bearer {session.token}"})
+        else:
+            fields["area_sqft"] = rng.randint(600, 4000)
+            status, data = client.json('POST', '/api/data/estimate', fields, token=session.token)
+        if status == 201:
+            with self._lock:
+                session.prediction_ids.append(json.loads(data)['id'])
+        return status, data
+
+# ---------------------------------------------------------------- driver
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_load(base_url, scenario, mix, rps, duration, concurrency, seed_value=0):
+    """Open-loop replay of `mix` at `rps` for `duration` seconds."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    schedule = queue.Queue()
+    samples = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    lock = threading.Lock()
+
+    def worker(index):
+        client = Client(base_url)
+        rng = random.Random(seed_value * 1000 + index)
+        while True:
+            item = schedule.get()
+            if item is None:
+                return
+            due, op = item
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                status, _ = getattr(scenario, op)(client, rng)
+                ok = status < 400
+            except Exception:
+                ok = False
+            latency = (time.perf_counter() - due) * 1000.0
+            with lock:
+                samples[op].append(latency)
+                if not ok:
+                    errors[op] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    rng = random.Random(seed_value)
+    interval = 1.0 / rps
+    start = time.perf_counter()
+    total = int(rps * duration)
+    for i in range(total):
+        schedule.put((start + i * interval, rng.choices(names, weights)[0]))
+    for _ in threads:
+        schedule.put(None)
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    report = {"offered_rps": rps, "duration_s": round(elapsed, 2), "operations": {}}
+    completed = 0
+    for op in names:
+        values = sorted(samples[op])
+        completed += len(values)
+        report["operations"][op] = {
+            "count": len(values), "errors": errors[op],
+            "p50_ms": round(percentile(values, 50), 2), "p90_ms": round(percentile(values, 90), 2),
+            "p99_ms": round(percentile(values, 99), 2), "max_ms": round(values[-1], 2) if values else 0.0,
+        }
+    report["throughput_rps"] = round(completed / elapsed, 2) if elapsed else 0.0
+    report["error_rate"] = round(sum(errors.values()) / completed, 4) if completed else 0.0
+    return report
+
+def print_report(report):
+    print(f"\nOffered {report['offered_rps']} rps, achieved {report['throughput_rps']} rps "
+          f"over {report['duration_s']}s, error rate {report['error_rate'] * 100:.2f}%")
+    print(f"{'operation':<12}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, s in report["operations"].items():
+        print(f"{op:<12}{s['count']:>8}{s['errors']:>8}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}"
+              f"{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    if 'mail' in report:
+        print(f"SMTP sink received {report['mail']['messages']} messages")
+
+# ---------------------------------------------------------------- server spawning
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def spawn_server(env, workers, threads, port):
+    cmd = [sys.executable, '-m', 'gunicorn', 'wsgi:application', '--bind', f'127.0.0.1:{port}',
+           '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("gunicorn exited during startup")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("gunicorn did not start within 30s")
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('login', 'estimate', 'dashboard', 'result'):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed data and replay realistic traffic.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_seed = sub.add_parser('seed', help="bulk-create users and predictions in DATABASE_URL")
+    p_seed.add_argument('--users', type=int, default=100)
+    p_seed.add_argument('--predictions', type=int, default=10000)
+
+    p_run = sub.add_parser('run', help="replay a traffic mix at a target rate")
+    p_run.add_argument('--url', default='http://127.0.0.1:5000')
+    p_run.add_argument('--spawn', action='store_true',
+                       help="start gunicorn here, with mail going to a local SMTP sink")
+    p_run.add_argument('--workers', type=int, default=2, help="gunicorn workers (with --spawn)")
+    p_run.add_argument('--threads', type=int, default=4, help="gunicorn threads (with --spawn)")
+    p_run.add_argument('--seed-users', type=int, default=0,
+                       help="seed this many users first (with --spawn)")
+    p_run.add_argument('--seed-predictions', type=int, default=0)
+    p_run.add_argument('--first-user', type=int, default=1, help="first load<N> account to use")
+    p_run.add_argument('--users', type=int, default=20, help="how many seeded accounts to log in")
+    p_run.add_argument('--rps', type=float, default=20)
+    p_run.add_argument('--duration', type=float, default=30)
+    p_run.add_argument('--concurrency', type=int, default=32, help="client threads")
+    p_run.add_argument('--mix', default='login=1,estimate=2,dashboard=5,result=2')
+    p_run.add_argument('--blueprint-mp', type=float, default=1.0, help="uploaded blueprint size (0 = none)")
+    p_run.add_argument('--upload-ratio', type=float, default=0.5, help="share of estimates with a blueprint")
+    p_run.add_argument('--json', dest='json_out')
+    args = parser.parse_args(argv)
+
+    if args.command == 'seed':
+        seed(args.users, args.predictions)
+        return 0
+
+    sink = proc = None
+    base_url = args.url
+    first_user = args.first_user
+    try:
+        if args.spawn:
+            sink = SMTPSink().start()
+            env = dict(os.environ, **sink.mail_env())
+            env["DATABASE_URL"] = os.environ['DATABASE_URL']  # the database seed() writes to
+            env["RATELIMIT_ENABLED"] = "false"
+            os.environ.update(sink.mail_env())
+            if args.seed_users:
+                first_user, _ = seed(args.seed_users, args.seed_predictions)
+            port = _free_port()
+            proc = spawn_server(env, args.workers, args.threads, port)
+            base_url = f"http://127.0.0.1:{port}"
+
+        users = [f"load{first_user + i}@example.com" for i in range(args.users)]
+        blueprint = make_blueprint_image(args.blueprint_mp) if args.blueprint_mp > 0 else None
+        scenario = Scenario(users, blueprint, args.upload_ratio)
+        scenario.login_all(Client(base_url))
+
+        report = run_load(base_url, scenario, parse_mix(args.mix), args.rps, args.duration, args.concurrency)
+        report["environment"] = environment()
+        report["server"] = {"url": base_url, "workers": args.workers if args.spawn else None,
+                            "threads": args.threads if args.spawn else None}
+        if sink:
+            time.sleep(1)  # let the app's mail threads drain
+            report["mail"] = {"messages": sink.messages, "bytes": sink.bytes}
+        print_report(report)
+        if args.json_out:
+            with open(args.json_out, 'w') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if sink:
+            sink.stop()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
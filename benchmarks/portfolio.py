@@ -0,0 +1,98 @@
+"""
+Portfolio PDF benchmark: pages/sec of app/portfolio.py vs generate_pdf() in a loop.
+
+Seeds synthetic predictions in an in-memory database, reads them back as
+export rows (as /api/data/portfolio does), and renders them once as a
+streamed portfolio (written to a temporary file) and once through
+generate_pdf() per estimate.
+
+    python benchmarks/portfolio.py --estimates 500 --json portfolio.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import environment, make_app, register, seed_predictions
+
+def report_data(row):
+    """generate_pdf() input for one export row."""
+    return {
+        'user': {'name': 'bench', 'email': 'bench@example.com'},
+        'date': row['created_at'][:16].replace('T', ' '), 'id': row['id'],
+        'inputs': {k: row[k] for k in ('city', 'quality', 'floors', 'area_sqft_estimate')},
+        'quantities': {k: row[k] for k in ('bricks_count', 'cement_bags', 'steel_kg', 'paint_liters',
+                                           'worker_days')},
+        'breakdown': {k: row[f'cost_{k}'] for k in ('bricks', 'cement', 'steel', 'paint', 'labor')},
+        'total': row['total_cost'], 'predicted_2026': row['predicted_2026'],
+    }
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+def peak_alloc(fn):
+    """Peak traced allocation of a separate (untimed) run; tracemalloc slows Python code down a lot."""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--estimates', type=int, default=500)
+    parser.add_argument('--json', dest='json_out', help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    with app.test_client() as client:
+        user_id, _ = register(client)
+    seed_predictions(app, user_id, args.estimates)
+
+    from app import export
+    from app.portfolio import write_portfolio
+    from app.utils import generate_pdf
+    with app.app_context():
+        rows = list(export.iter_rows(user_id=user_id))
+
+    def portfolio():
+        with tempfile.TemporaryFile() as f:
+            return write_portfolio(iter(rows), f, owner={"name": "bench", "email": "bench@example.com"})
+
+    def loop():
+        return sum(len(generate_pdf(report_data(row))) for row in rows)
+
+    generate_pdf(report_data(rows[0]))  # import FPDF outside the timing
+    stats, p_seconds = timed(portfolio)
+    loop_bytes, l_seconds = timed(loop)
+    p_peak = peak_alloc(portfolio)
+    l_peak = peak_alloc(lambda: generate_pdf(report_data(rows[0])))
+
+    results = {
+        "portfolio": {"pages": stats.pages, "seconds": round(p_seconds, 3),
+                      "pages_per_sec": round(stats.pages / p_seconds, 1), "bytes": stats.bytes,
+                      "peak_alloc_mb": round(p_peak / 1e6, 2)},
+        "generate_pdf_loop": {"pages": len(rows), "seconds": round(l_seconds, 3),
+                              "pages_per_sec": round(len(rows) / l_seconds, 1), "bytes": loop_bytes,
+                              "peak_alloc_mb": round(l_peak / 1e6, 2)},
+    }
+    # peak MB: whole portfolio vs a single generate_pdf() page
+    print(f"{'renderer':<20}{'pages':>7}{'seconds':>9}{'pages/s':>10}{'MB out':>8}{'peak MB':>9}")
+    for name, r in results.items():
+        print(f"{name:<20}{r['pages']:>7}{r['seconds']:>9.2f}{r['pages_per_sec']:>10.1f}"
+              f"{r['bytes'] / 1e6:>8.1f}{r['peak_alloc_mb']:>9.2f}")
+    speedup = results["portfolio"]["pages_per_sec"] / results["generate_pdf_loop"]["pages_per_sec"]
+    print(f"\nportfolio renders {speedup:.0f}x more pages/sec")
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({"environment": environment(), "estimates": args.estimates, "results": results},
+                      f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
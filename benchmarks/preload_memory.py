@@ -0,0 +1,162 @@
+"""
+Memory per gunicorn worker and first-request latency, lazy vs preloaded.
+
+Starts gunicorn (gunicorn.conf.py) twice on a temporary SQLite database,
+once with PRELOAD=false (every worker loads models, FPDF and Pillow on its
+first requests) and once with PRELOAD=true (warmed in the master, heap
+frozen before the fork). Each run waits for /api/ready, sends the same
+estimates (with PDF report, mail going to a local SMTP sink), then reads
+/proc/<pid>/smaps_rollup of every worker: RSS, PSS (RSS with shared pages
+split between the processes sharing them) and USS (private pages).
+Linux only.
+
+    python benchmarks/preload_memory.py --workers 4 --requests 40 --json preload.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, environment
+from loadtest import Client, _free_port
+from smtp_sink import SMTPSink
+
+def smaps(pid):
+    """{'rss', 'pss', 'uss'} in kB for one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            if ppid == pid:
+                found.append(int(entry))
+    return found
+
+def wait_ready(base_url, proc, timeout=60):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if proc.poll() is not None:
+            raise SystemExit("gunicorn exited during startup")
+        try:
+            status, _ = Client(base_url, timeout=2).request('GET', '/api/ready')
+            if status == 200:
+                return time.perf_counter() - t0
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit(f"server not ready within {timeout}s")
+
+def send_estimates(base_url, token, count, concurrency):
+    """Latencies (ms) of `count` estimates, each on a fresh connection so they spread over the workers."""
+    latencies, lock = [], threading.Lock()
+    todo = list(range(count))
+
+    def worker():
+        while True:
+            with lock:
+                if not todo:
+                    return
+                i = todo.pop()
+            t0 = time.perf_counter()
+            fields = {"city": "Chennai", "quality": "standard", "floors": str(1 + i % 3), "area_sqft": 900 + i}
+            status, _ = Client(base_url).json('POST', '/api/data/estimate', fields, token=token)
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000 if status == 201 else None)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(l for l in latencies if l is not None)
+
+def run(mode, args, env):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(env, PRELOAD='true' if mode == 'preload' else 'false')
+    cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application',
+           '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), '--log-level', 'warning']
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        ready_s = wait_ready(base_url, proc)
+        client = Client(base_url)
+        email = f"{mode}-{int(t0)}@example.com"
+        status, body = client.json('POST', '/api/auth/register',
+                                   {"username": mode, "email": email, "password": "bench-password"})
+        if status != 201:
+            raise SystemExit(f"register failed: {status} {body[:200]!r}")
+        latencies = send_estimates(base_url, json.loads(body)['access_token'], args.requests, args.workers)
+        time.sleep(0.5)  # let the mail threads finish
+
+        workers = [smaps(pid) for pid in children(proc.pid)]
+        master = smaps(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    n = max(len(workers), 1)
+    return {
+        "ready_s": round(ready_s, 2),
+        "workers": len(workers),
+        "worker_rss_mb": round(sum(w["rss"] for w in workers) / n / 1024, 1),
+        "worker_pss_mb": round(sum(w["pss"] for w in workers) / n / 1024, 1),
+        "worker_uss_mb": round(sum(w["uss"] for w in workers) / n / 1024, 1),
+        "total_pss_mb": round((master["pss"] + sum(w["pss"] for w in workers)) / 1024, 1),
+        "estimate_max_ms": round(latencies[-1], 1) if latencies else None,
+        "estimate_p50_ms": round(latencies[len(latencies) // 2], 1) if latencies else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=40, help="estimates sent per run")
+    parser.add_argument('--json', dest='json_out', help="write the results to this file")
+    args = parser.parse_args(argv)
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        raise SystemExit("needs Linux /proc/<pid>/smaps_rollup")
+
+    workdir = tempfile.mkdtemp(prefix='preload-bench-')
+    sink = SMTPSink().start()
+    env = dict(os.environ, **sink.mail_env())
+    env.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", SCHEMA_MARKER_DIR=workdir,
+               JWT_SECRET_KEY='benchmark-jwt-secret-key-of-sufficient-length',
+               RATELIMIT_ENABLED='false', PROFILING_ENABLED='false')
+    results = {}
+    try:
+        print(f"{'mode':<9}{'ready s':>8}{'RSS/wkr':>9}{'PSS/wkr':>9}{'USS/wkr':>9}{'PSS all':>9}"
+              f"{'max ms':>8}{'p50 ms':>8}")
+        for mode in ('lazy', 'preload'):
+            r = results[mode] = run(mode, args, env)
+            print(f"{mode:<9}{r['ready_s']:>8.2f}{r['worker_rss_mb']:>8.1f}M{r['worker_pss_mb']:>8.1f}M"
+                  f"{r['worker_uss_mb']:>8.1f}M{r['total_pss_mb']:>8.1f}M{r['estimate_max_ms']:>8.0f}"
+                  f"{r['estimate_p50_ms']:>8.0f}")
+    finally:
+        sink.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({"environment": environment(), "workers": args.workers, "requests": args.requests,
+                       "results": results}, f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Benchmark suite for the estimation, persistence and reporting hot paths.
+
+Runs every case in-process (Flask test client, in-memory SQLite, mail
+suppressed), prints a table and writes machine-readable JSON. With
+--baseline, any case whose median got slower than the tolerance allows
+makes the script exit non-zero.
+
+    python benchmarks/run.py --json bench_output.json
+    python benchmarks/run.py --quick --baseline bench_output.json --tolerance 0.3
+"""
+import argparse
+import json
+import sys
+
+from common import (BenchConfig, compare_to_baseline, make_app, make_blueprint_image,
+                    measure, print_results, register, seed_predictions, write_results)
+
+SAMPLE_INPUT = {"city": "Chennai", "quality": "standard", "area_sqft": 1200, "no_of_floors": 2}
+SAMPLE_QTY = {"bricks_count": 9600, "cement_bags": 480, "steel_kg": 4800,
+              "paint_liters": 216, "worker_days": 144}
+
+CASES = []
+
+def case(name, quick=True):
+    def register_case(fn):
+        CASES.append((name, fn, quick))
+        return fn
+    return register_case
+
+@case("cost_model.compute_cost_breakdown")
+def bench_breakdown(ctx):
+    from app.cost_model import compute_cost_breakdown, load_unit_costs
+    u_costs = load_unit_costs()
+    return measure(lambda: compute_cost_breakdown(SAMPLE_QTY, "Mumbai", "premium", u_costs),
+                   repeat=7, number=2000)
+
+@case("cost_model.predict")
+def bench_predict(ctx):
+    from app.cost_model import CostEstimatorModel
+    model = CostEstimatorModel()
+    return measure(lambda: model.predict(SAMPLE_INPUT), repeat=7, number=2000)
+
+@case("cost_model.predict_total_cost")
+def bench_predict_total(ctx):
+    from app.cost_model import CostEstimatorModel
+    model = CostEstimatorModel()
+    return measure(lambda: model.predict_total_cost(SAMPLE_INPUT), repeat=7, number=200)
+
+@case("blueprint.extract_features[0.5MP]")
+def bench_blueprint_small(ctx):
+    from app.blueprint_features import extract_blueprint_features
+    image = make_blueprint_image(0.5)
+    return measure(lambda: extract_blueprint_features(image), repeat=7, number=50)
+
+@case("blueprint.extract_features[100MP]", quick=False)
+def bench_blueprint_huge(ctx):
+    from app.blueprint_features import extract_blueprint_features
+    image = make_blueprint_image(100)
+    return measure(lambda: extract_blueprint_features(image), repeat=5, number=5)
+
+@case("utils.generate_pdf")
+def bench_pdf(ctx):
+    from app.utils import generate_pdf
+    data = {
+        'user': {'name': 'bench', 'email': 'bench@example.com'},
+        'date': '2026-01-01 10:00', 'id': 1,
+        'inputs': {'city': 'Chennai', 'quality': 'standard', 'floors': 2, 'area_sqft_estimate': 1200},
+        'quantities': SAMPLE_QTY,
+        'breakdown': {'bricks': 62400.0, 'cement': 182400.0, 'steel': 374400.0, 'paint': 56160.0, 'labor': 144000.0},
+        'total': 1638720.0, 'predicted_2026': 1638720.0,
+    }
+    return measure(lambda: generate_pdf(data), repeat=5, number=5)
+
+@case("portfolio.render[100 estimates]")
+def bench_portfolio(ctx):
+    import io
+    from app.portfolio import write_portfolio
+    row = {"id": 1, "created_at": "2026-01-01T10:00:00", "city": "Chennai", "quality": "standard", "floors": 2,
+           "area_sqft_estimate": 1200.0, "rooms_estimate": 5, "wall_length_ft": 140.0, **SAMPLE_QTY,
+           "cost_bricks": 62400.0, "cost_cement": 182400.0, "cost_steel": 374400.0, "cost_paint": 56160.0,
+           "cost_labor": 144000.0, "total_cost": 1638720.0, "predicted_2026": 1753430.4}
+    rows = [dict(row, id=i) for i in range(1, 101)]
+    return measure(lambda: write_portfolio(iter(rows), io.BytesIO()), repeat=5, number=2)
+
+class StdlibJSONConfig(BenchConfig):
+    JSON_PROVIDER = 'stdlib'
+
+def _dashboard_case(rows, config_class=BenchConfig):
+    def bench(ctx):
+        app = make_app(config_class)
+        client = app.test_client()
+        user_id, headers = register(client, f"dash{rows}")
+        seed_predictions(app, user_id, rows)
+
+        def call():
+            resp = client.get('/api/data/dashboard', headers=headers)
+            assert resp.status_code == 200
+        return measure(call, repeat=5 if rows < 100_000 else 3, number=1)
+    return bench
+
+case("api.dashboard[10 rows]")(_dashboard_case(10))
+case("api.dashboard[10k rows]")(_dashboard_case(10_000))
+case("api.dashboard[100k rows]", quick=False)(_dashboard_case(100_000))
+case("api.dashboard[10k rows, stdlib json]")(_dashboard_case(10_000, StdlibJSONConfig))
+
+@case("api.dashboard[10k archived rows]")
+def bench_dashboard_archived(ctx):
+    import tempfile
+    from datetime import datetime
+    from app.archive import archive
+
+    class ArchiveConfig(BenchConfig):
+        ARCHIVE_DIR = tempfile.mkdtemp(prefix='bench-archive-')
+
+    app = make_app(ArchiveConfig)
+    client = app.test_client()
+    user_id, headers = register(client, "archived")
+    seed_predictions(app, user_id, 10_000)
+    with app.app_context():
+        archive(datetime.utcnow(), app=app)
+
+    def call():
+        resp = client.get('/api/data/dashboard', headers=headers)
+        assert resp.status_code == 200 and resp.get_json()['count'] == 10_000
+    return measure(call, repeat=5, number=1)
+
+class NoResultCacheConfig(BenchConfig):
+    RESULT_CACHE_SIZE = 0
+
+def _result_case(config_class, revalidate=False):
+    def bench(ctx):
+        app = make_app(config_class)
+        client = app.test_client()
+        user_id, headers = register(client, "result")
+        seed_predictions(app, user_id, 1)
+        expected = 200
+        if revalidate:
+            headers = dict(headers, **{"If-None-Match": client.get('/api/data/result/1', headers=headers).headers['ETag']})
+            expected = 304
+
+        def call():
+            resp = client.get('/api/data/result/1', headers=headers)
+            assert resp.status_code == expected
+        return measure(call, repeat=7, number=50)
+    return bench
+
+case("api.result")(_result_case(BenchConfig))
+case("api.result[uncached]")(_result_case(NoResultCacheConfig))
+case("api.result[304 revalidate]")(_result_case(BenchConfig, revalidate=True))
+case("api.result[stdlib json]")(_result_case(StdlibJSONConfig))
+
+@case("api.estimate[json]")
+def bench_estimate(ctx):
+    client = ctx['client']
+    payload = {"city": "Chennai", "quality": "premium", "floors": 2, "area_sqft": 1500}
+
+    def call():
+        resp = client.post('/api/data/estimate', json=payload, headers=ctx['headers'])
+        assert resp.status_code == 201, resp.get_data(as_text=True)
+    return measure(call, repeat=5, number=3)
+
+@case("api.estimate[blueprint 2MP]")
+def bench_estimate_upload(ctx):
+    client = ctx['client']
+    image = make_blueprint_image(2)
+
+    def call():
+        import io
+        resp = client.post('/api/data/estimate', headers=ctx['headers'],
+                           data={"city": "Pune", "quality": "standard", "floors": "2",
+                                 "blueprint": (io.BytesIO(image), "plan.png")},
+                           content_type='multipart/form-data')
+        assert resp.status_code == 201, resp.get_data(as_text=True)
+    return measure(call, repeat=5, number=2)
+
+@case("api.sweep[100k cells]")
+def bench_sweep(ctx):
+    client = ctx['client']
+    payload = {"city": "*", "quality": ["basic", "standard", "premium"],
+               "floors": {"start": 1, "stop": 5}, "area_sqft": {"start": 500, "stop": 7190, "step": 10}}
+
+    def call():
+        resp = client.post('/api/data/sweep', json=payload, headers=ctx['headers'])
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+    return measure(call, repeat=5, number=3)
+
+@case("takeoff.predict")
+def bench_takeoff_predict(ctx):
+    from app.takeoff import TakeoffModel
+    model = TakeoffModel()
+    item = dict(SAMPLE_INPUT, rooms=5, wall_length_ft=140.0, carpet_ratio=0.72)
+    return measure(lambda: model.predict_total_cost(item), repeat=7, number=2000)
+
+@case("takeoff.batch[10k buildings]")
+def bench_takeoff_batch(ctx):
+    import numpy as np
+    from app.takeoff import materials, takeoff_batch
+    rng = np.random.default_rng(7)
+    n = 10_000
+    area, floors = rng.uniform(400, 5000, n), rng.integers(1, 5, n)
+    rooms, quality = rng.integers(1, 10, n), rng.choice(["economical", "standard", "premium"], n)
+    return measure(lambda: materials(takeoff_batch(area, floors, rooms, quality=quality)), repeat=7, number=5)
+
+@case("ratelimit.check")
+def bench_ratelimit(ctx):
+    from app.ratelimit import RateLimiter
+    limiter = RateLimiter({"data_api.estimate": {"user": "1000000/second", "ip": "1000000/second"}})
+    identities = {"user": "42", "ip": "10.0.0.1"}
+    return measure(lambda: limiter.check("data_api.estimate", identities), repeat=7, number=5000)
+
+def _similarity_case(rows):
+    def bench(ctx):
+        import random
+        from app.similarity import SimilarityIndex
+        from common import CITIES, QUALITIES
+        rng = random.Random(7)
+        index = SimilarityIndex()
+        for start in range(0, rows, 100_000):
+            index.add([("historical", i, None, rng.choice(CITIES), rng.choice(QUALITIES), rng.randint(1, 4),
+                        rng.uniform(400, 4000), rng.randint(1, 10), rng.uniform(5e5, 9e6))
+                       for i in range(start, min(rows, start + 100_000))])
+        return measure(lambda: index.query("Chennai", "standard", 2, 1200, 5, k=10), repeat=7, number=20)
+    return bench
+
+case("similarity.query[100k rows]")(_similarity_case(100_000))
+case("similarity.query[1M rows]", quick=False)(_similarity_case(1_000_000))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the estimator benchmark suite.")
+    parser.add_argument('--quick', action='store_true', help="skip the 100MP / 100k-row cases")
+    parser.add_argument('-k', '--filter', default='', help="only run cases containing this text")
+    parser.add_argument('--json', dest='json_out', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="previous results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown vs baseline median (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    app = make_app(BenchConfig)
+    client = app.test_client()
+    _, headers = register(client)
+    ctx = {"app": app, "client": client, "headers": headers}
+
+    results = {}
+    for name, fn, quick in CASES:
+        if args.filter and args.filter not in name:
+            continue
+        if args.quick and not quick:
+            continue
+        print(f"… {name}", file=sys.stderr)
+        with app.app_context():
+            results[name] = fn(ctx)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+    print_results(results, baseline)
+
+    if args.json_out:
+        write_results(args.json_out, results, {"tolerance": args.tolerance})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        for name, before, now, ratio in regressions:
+            print(f"❌ {name}: {before:.3f}ms -> {now:.3f}ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
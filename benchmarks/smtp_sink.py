@@ -0,0 +1,109 @@
+"""
+Minimal local SMTP server that accepts and discards mail.
+
+Point the app at it (MAIL_SERVER=127.0.0.1, MAIL_PORT=<port>,
+MAIL_USE_TLS=false) so load tests exercise the real Flask-Mail send path
+without touching the network.
+
+    python benchmarks/smtp_sink.py --port 8025
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        self._reply("220 localhost smtp-sink ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self._reply("250-localhost")
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 SIZE 52428800")
+            elif verb == 'HELO':
+                self._reply("250 localhost")
+            elif verb == 'AUTH':
+                self._reply("235 Authentication successful")
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self._reply("250 OK")
+            elif verb == 'DATA':
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    size += len(line)
+                sink.record(size)
+                self._reply("250 OK queued")
+            elif verb == 'QUIT':
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SMTPSink:
+    """Runs the sink on a background thread and counts delivered messages."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, size):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def mail_env(self):
+        """Environment variables that route the app's outgoing mail here."""
+        host, port = self.address
+        return {"MAIL_SERVER": host, "MAIL_PORT": str(port), "MAIL_USE_TLS": "false",
+                "MAIL_USERNAME": "", "MAIL_PASSWORD": "",
+                "MAIL_DEFAULT_SENDER": "loadtest@localhost"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+    sink = SMTPSink(args.host, args.port).start()
+    print(f"SMTP sink listening on {args.host}:{sink.address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"  {sink.messages} messages, {sink.bytes / 1024:.0f} KiB")
+    except KeyboardInterrupt:
+        sink.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Prediction storage benchmark: JSON Text columns vs the compact `details` format.
+
+Seeds a synthetic prediction table in a temporary SQLite file, measures the
+on-disk size (after VACUUM) and full-scan throughput (read + decode every
+row, as export and the similarity index do), migrates it with
+compact_rows() and measures again. With zstandard installed, --zstd adds a
+dictionary-compressed pass.
+
+    python benchmarks/storage.py --rows 1000000 --json storage.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from common import BenchConfig, environment, make_app, register, seed_predictions
+
+def file_size(engine, path):
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    return os.path.getsize(path)
+
+def scan(app, repeat=3):
+    """Best-of-N rows/sec for reading and decoding every prediction."""
+    from app import db
+    from app.compact import decode_columns
+    from app.models import Prediction as P
+    best = 0.0
+    with app.app_context():
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            n = 0
+            q = db.session.query(P.inputs, P.quantities, P.cost_breakdown, P.details)
+            for row in q.yield_per(5000):
+                decode_columns(*row)
+                n += 1
+            best = max(best, n / (time.perf_counter() - t0))
+            db.session.rollback()
+    return best
+
+def report(label, size, rows_per_sec, baseline_size=None):
+    saved = f"  ({1 - size / baseline_size:.0%} smaller)" if baseline_size else ""
+    print(f"{label:<14}{size / 1e6:>10.1f} MB{rows_per_sec:>14,.0f} rows/sec{saved}")
+    return {"bytes": size, "scan_rows_per_sec": round(rows_per_sec)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--zstd', action='store_true', help="also measure zstd dictionary compression")
+    parser.add_argument('--json', dest='json_out', help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='storage-bench-')
+    path = os.path.join(workdir, 'bench.db')
+
+    class StorageConfig(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SCHEMA_MARKER_DIR = workdir
+        COMPACT_DICT_DIR = os.path.join(workdir, 'compact')
+
+    try:
+        app = make_app(StorageConfig)
+        from app import compact, db
+        with app.test_client() as client:
+            user_id, _ = register(client)
+        t0 = time.perf_counter()
+        seed_predictions(app, user_id, args.rows)
+        print(f"Seeded {args.rows:,} rows in {time.perf_counter() - t0:.1f}s\n")
+
+        results = {}
+        with app.app_context():
+            json_size = file_size(db.engine, path)
+        results["json"] = report("json", json_size, scan(app))
+
+        with app.app_context():
+            stats = compact.compact_rows()
+            compact_size = file_size(db.engine, path)
+        print(f"  migration: {stats.summary()}")
+        results["compact"] = report("compact", compact_size, scan(app), json_size)
+        results["compact"]["migration"] = stats.summary()
+
+        if args.zstd:
+            with app.app_context():
+                compact.expand_rows()
+                dict_id = compact.train_dictionary(compact.sample_blobs(), app=app)
+                compact.compact_rows(compressor=compact.Compressor(dict_id))
+                zstd_size = file_size(db.engine, path)
+            results["compact+zstd"] = report("compact+zstd", zstd_size, scan(app), json_size)
+
+        if args.json_out:
+            with open(args.json_out, 'w') as f:
+                json.dump({"environment": environment(), "rows": args.rows, "results": results},
+                          f, indent=2, sort_keys=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
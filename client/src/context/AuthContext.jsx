@@ -1,4 +1,4 @@
-import { createContext, useState, useEffect, useContext } from 'react';
+import { createContext, useState, useEffect, useContext, useMemo } from 'react';
 import axios from 'axios';
 
 const AuthContext = createContext();
@@ -12,16 +12,20 @@ export const AuthProvider = ({ children }) => {
     const [token, setToken] = useState(localStorage.getItem('token'));
     const [loading, setLoading] = useState(true);
 
-    const api = axios.create({
-        baseURL: '/api',
-        headers: {
-            'Content-Type': 'application/json'
+    // One client per token: pages list `api` in effect dependencies, so a new
+    // instance on every render would re-run their requests in a loop
+    const api = useMemo(() => {
+        const instance = axios.create({
+            baseURL: '/api',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        });
+        if (token) {
+            instance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
         }
-    });
-
-    if (token) {
-        api.defaults.headers.common['Authorization'] = `Bearer ${token}`;
-    }
+        return instance;
+    }, [token]);
 
     const logout = () => {
         localStorage.removeItem('token');
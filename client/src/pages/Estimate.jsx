@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
@@ -20,6 +20,27 @@ const Estimate = () => {
         is_commercial: false
     });
     const [blueprint, setBlueprint] = useState(null);
+    const [catalog, setCatalog] = useState(null);
+
+    // Pricing catalog for instant previews (cached by the browser, see /api/data/catalog).
+    // `api` is memoized per token in AuthProvider, so this runs once per login.
+    useEffect(() => {
+        api.get('/data/catalog').then(res => setCatalog(res.data)).catch(() => setCatalog(null));
+    }, [api]);
+
+    const previewTotal = () => {
+        if (!catalog || !catalog.linear || blueprint) return null;
+        // Same lookup as PricingTables.rate() on the server (app/pricing.py)
+        const name = formData.quality.toLowerCase();
+        const quality = catalog.quality_aliases[name] || name;
+        const rate = quality in catalog.default_rates
+            ? (catalog.rates[formData.city] || catalog.default_rates)[quality]
+            : catalog.other_quality_rates[formData.city] ?? catalog.other_quality_rates['*'];
+        const area = parseFloat(formData.area_sqft) || 900;
+        const floors = parseInt(formData.floors, 10) || 0;
+        return area * floors * rate;
+    };
+    const preview = previewTotal();
 
     const handleChange = (e) => {
         const { name, value, type, checked } = e.target;
@@ -130,6 +151,15 @@ const Estimate = () => {
                                 </div>
                             </div>
 
+                            {preview !== null && (
+                                <div className="mt-4 text-white">
+                                    Preview: <span className="fw-bold">Rs. {Math.round(preview).toLocaleString()}</span>
+                                    <small className="text-muted ms-2">
+                                        (2026: Rs. {Math.round(preview * catalog.forecast_2026_factor).toLocaleString()})
+                                    </small>
+                                </div>
+                            )}
+
                             <button type="submit" className="btn btn-primary w-100 py-3 mt-4 fw-bold shadow-lg" disabled={loading}>
                                 {loading ? 'Calculating...' : 'Generate Estimate'}
                             </button>
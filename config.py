@@ -9,7 +9,87 @@ class Config:
     else:
          SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'site.db')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Schema creation: runs once per database, then a marker file short-circuits it.
+    # Set DB_AUTO_CREATE=false and use `flask init-db` for an explicit migrate step.
+    DB_AUTO_CREATE = os.environ.get('DB_AUTO_CREATE', 'true').lower() in ['true', 'on', '1']
+    SCHEMA_MARKER_DIR = os.environ.get('SCHEMA_MARKER_DIR') or ('/tmp' if os.environ.get('VERCEL') else None)
     
+    # Static SPA assets: files up to this size are served from memory
+    STATIC_INLINE_MAX_BYTES = int(os.environ.get('STATIC_INLINE_MAX_BYTES', 1024 * 1024))
+
+    # Per-stage timings, Server-Timing headers and the Prometheus /metrics endpoint
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ['true', 'on', '1']
+
+    # Admin-triggered cProfile/tracemalloc captures (see /api/admin/profiles)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() in ['true', 'on', '1']
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or ('/tmp/profiles' if os.environ.get('VERCEL') else None)
+
+    # Rejected rows from historical CSV imports (see app/ingest.py)
+    IMPORT_REJECTS_DIR = os.environ.get('IMPORT_REJECTS_DIR') or ('/tmp/imports' if os.environ.get('VERCEL') else None)
+
+    # Versioned calibration artifacts loaded by the estimator (see app/calibration.py)
+    CALIBRATION_DIR = os.environ.get('CALIBRATION_DIR')
+
+    # Largest city x quality x floors x area grid accepted by /api/data/sweep
+    SWEEP_MAX_CELLS = int(os.environ.get('SWEEP_MAX_CELLS', 250000))
+
+    # Idempotency-Key: how long responses are kept, and how long a duplicate waits for the original
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+    IDEMPOTENCY_WAIT_SECONDS = int(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 30))
+
+    # Number of reverse proxies in front of the app (Render: 1). Their X-Forwarded-For/-Proto
+    # entries are trusted via werkzeug's ProxyFix; 0 uses the socket peer address.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+
+    # Token-bucket rate limits per endpoint and scope ("user" = JWT identity, "ip" = client address).
+    # RATELIMIT_STORAGE_URL (sqlite:///path, redis://host:6379/0) shares the buckets between workers.
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL')
+    RATE_LIMITS = {
+        "auth_api.login": {"ip": "10/minute"},
+        "auth_api.register": {"ip": "5/minute"},
+        "data_api.estimate": {"user": "20/minute", "ip": "120/minute"},
+        "data_api.sweep": {"user": "60/minute"},
+    }
+
+    # "auto" uses orjson for API responses when installed, "stdlib" forces Flask's json
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # "compact" stores new predictions' inputs/quantities/breakdown in the binary
+    # `details` column (app/compact.py); `flask compact-predictions` migrates old rows
+    PREDICTION_STORAGE = os.environ.get('PREDICTION_STORAGE', 'json')
+    COMPACT_DICT_DIR = os.environ.get('COMPACT_DICT_DIR')  # zstd dictionaries; default instance/compact
+
+    # `flask archive-predictions` moves older predictions to instance/archive/ (app/archive.py)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR')
+
+    REPORTS_DIR = os.environ.get('REPORTS_DIR')  # cached PDFs for /result/<id>/report; default instance/reports
+
+    # "area" (per-sqft factors, CostEstimatorModel) or "takeoff" (element takeoff, app/takeoff.py)
+    QUANTITY_MODEL = os.environ.get('QUANTITY_MODEL', 'area')
+
+    # Tiled blueprint measurement for multi-page / very large scans (app/blueprint_tiles.py)
+    BLUEPRINT_TILED = os.environ.get('BLUEPRINT_TILED', 'false').lower() in ['true', 'on', '1']
+    BLUEPRINT_TILE_PX = int(os.environ.get('BLUEPRINT_TILE_PX', 2048))
+    BLUEPRINT_TILE_OVERLAP = int(os.environ.get('BLUEPRINT_TILE_OVERLAP', 16))
+    BLUEPRINT_TILE_WORKERS = int(os.environ.get('BLUEPRINT_TILE_WORKERS', 0))  # 0 = one per CPU
+    BLUEPRINT_TILE_MIN_PIXELS = int(os.environ.get('BLUEPRINT_TILE_MIN_PIXELS', 16_000_000))
+    BLUEPRINT_MEMORY_BUDGET_MB = int(os.environ.get('BLUEPRINT_MEMORY_BUDGET_MB', 256))
+
+    # Build models, pricing, fonts and the asset manifest at startup (app/preload.py): "true" before
+    # create_app() returns (gunicorn.conf.py sets it), "background" in a thread while serving
+    PRELOAD = os.environ.get('PRELOAD', 'false').lower()
+
+    CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 86400))  # seconds, unversioned /api/data/catalog
+
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 1024))  # GET /result/<id> LRU entries, 0 = off
+
+    # Upload limits: whole request (rejected by Werkzeug before parsing) and blueprint file
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 32 * 1024 * 1024))
+    BLUEPRINT_MAX_BYTES = int(os.environ.get('BLUEPRINT_MAX_BYTES', 25 * 1024 * 1024))
+
     # 2026 Prediction Config
     INFLATION_RATE = 0.07 # 7% growth per year
 
@@ -0,0 +1,23 @@
+"""
+gunicorn settings for preloaded, copy-on-write friendly workers (see app/preload.py).
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+The app is imported and warmed once in the master (preload_app), then the
+heap is frozen right before the workers are forked, so every worker starts
+warm and shares the read-only pages with the master.
+"""
+import os
+
+os.environ.setdefault('PRELOAD', 'true')
+
+preload_app = os.environ.get('PRELOAD', 'true').lower() in ['true', 'on', '1']
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before the first fork
+    if preload_app:
+        from app.preload import freeze
+        freeze()
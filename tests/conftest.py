@@ -0,0 +1,86 @@
+"""
+Shared fixtures: a fresh app per test on an in-memory SQLite database, with
+every instance directory (profiles, archive, calibration, reports, ...)
+under the test's tmp_path and the module-level caches reset afterwards.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+
+# Scripts run against a live server (python tests/health_check.py), not pytest
+collect_ignore = ["health_check.py", "inspect_db.py", "verify_output.py"]
+
+class TestConfig(Config):
+    TESTING = True
+    MAIL_SUPPRESS_SEND = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    JWT_SECRET_KEY = 'test-jwt-secret-key-of-sufficient-length'
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URL = None
+    PRELOAD = False
+    METRICS_ENABLED = False
+    PREDICTION_STORAGE = 'json'
+    QUANTITY_MODEL = 'area'
+    BLUEPRINT_TILED = False
+
+def reset_caches():
+    from app import archive, routes
+    from app.api import data
+    data._QTY_MODEL = data._TOTAL_COST_MODEL = data._UNIT_COSTS = data._PRICING = data._CATALOG = None
+    routes._QTY_MODEL = routes._TOTAL_COST_MODEL = routes._UNIT_COSTS = None
+    archive._months.clear()
+
+@pytest.fixture
+def make_app(tmp_path):
+    """create_app() with TestConfig plus `overrides`; call it again for a second app."""
+    from app import create_app
+
+    def make(**overrides):
+        dirs = {name: str(tmp_path / name.lower()) for name in (
+            'SCHEMA_MARKER_DIR', 'PROFILE_DIR', 'IMPORT_REJECTS_DIR', 'CALIBRATION_DIR', 'ARCHIVE_DIR',
+            'REPORTS_DIR', 'COMPACT_DICT_DIR')}
+        config = type('TestConfig', (TestConfig,), {**dirs, **overrides})
+        reset_caches()
+        return create_app(config)
+
+    yield make
+    reset_caches()
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def register(client, username='tester', password='test-password'):
+    """Registers (or logs in) a user; returns (user id, auth headers)."""
+    resp = client.post('/api/auth/register', json={
+        "username": username, "email": f"{username}@example.com", "password": password})
+    if resp.status_code != 201:
+        resp = client.post('/api/auth/login', json={"email": f"{username}@example.com", "password": password})
+    body = resp.get_json()
+    return body['user']['id'], {"Authorization": f"Bearer {body['access_token']}"}
+
+def make_admin(app, user_id):
+    from app import db
+    from app.models import User
+    with app.app_context():
+        db.session.get(User, user_id).is_admin = True
+        db.session.commit()
+
+@pytest.fixture
+def user(client):
+    return register(client)
+
+@pytest.fixture
+def headers(user):
+    return user[1]
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT, TestConfig
+
+def test_create_app_does_not_import_fpdf_or_pillow():
+    code = ("import sys; from app import create_app; from conftest import TestConfig; "
+            "create_app(TestConfig); print(sorted(m for m in ('fpdf', 'PIL') if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]))
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                         check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+
+def test_schema_created_once_per_database(tmp_path):
+    from app import create_app
+    from app.schema import ensure_schema
+
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'site.db'}"
+        SCHEMA_MARKER_DIR = str(tmp_path)
+
+    app = create_app(FileConfig)
+    assert (tmp_path / 'site.db').exists()
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith('.schema-')]
+    assert ensure_schema(app) is False
+
+    (tmp_path / 'site.db').unlink()  # a marker without its database does not count
+    assert ensure_schema(app) is True
+
+def test_memory_database_gets_tables(app):
+    from app import db
+    with app.app_context():
+        assert 'prediction' in db.inspect(db.engine).get_table_names()
+
+def test_register_and_dashboard(client, headers):
+    resp = client.get('/api/data/dashboard', headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()["count"] == 0
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app import archive as archive_mod, db
+from app.archive import ArchiveError, archive, load_manifest
+from app.models import Prediction
+
+OLD = datetime(2024, 3, 10)
+CUTOFF = datetime(2025, 1, 1)
+
+def estimate(client, headers, city="Pune", created_at=OLD):
+    pred_id = client.post('/api/data/estimate', json={"city": city, "area_sqft": 1200}, headers=headers).get_json()["id"]
+    Prediction.query.filter_by(id=pred_id).update({"created_at": created_at})
+    db.session.commit()
+    return pred_id
+
+def make_legacy(app):
+    """Recreates the prediction table the way older releases did, without AUTOINCREMENT."""
+    with app.app_context():
+        sql = db.session.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'prediction'")).scalar()
+        assert 'AUTOINCREMENT' in sql
+        db.session.execute(db.text("DROP TABLE prediction"))
+        db.session.execute(db.text(sql.replace('AUTOINCREMENT', '')))
+        db.session.commit()
+
+def dashboard_ids(client, headers):
+    return [e["id"] for e in client.get('/api/data/dashboard', headers=headers).get_json()["estimations"]]
+
+def test_archived_rows_stay_readable(app, client, headers):
+    with app.app_context():
+        old = [estimate(client, headers) for _ in range(2)]
+        live = estimate(client, headers, created_at=datetime.utcnow())
+        stats = archive(CUTOFF, app=app)
+        assert (stats.rows, stats.months) == (2, {"2024-03"})
+        assert Prediction.query.count() == 1
+    assert sorted(dashboard_ids(client, headers)) == old + [live]
+    resp = client.get(f'/api/data/result/{old[0]}', headers=headers)
+    assert resp.status_code == 200 and resp.get_json()["inputs"]["city"] == "Pune"
+    assert client.patch(f'/api/data/result/{old[0]}', json={"floors": 3}, headers=headers).status_code == 409
+
+def test_ids_are_not_reused_after_archiving(app, client, headers):
+    with app.app_context():
+        old = [estimate(client, headers) for _ in range(3)]
+        assert archive(CUTOFF, app=app).rows == 3
+        assert estimate(client, headers, created_at=datetime.utcnow()) > max(old)
+
+def test_legacy_tables_keep_their_newest_row(app, client, headers):
+    make_legacy(app)
+    with app.app_context():
+        old = [estimate(client, headers) for _ in range(3)]
+        assert archive(CUTOFF, app=app).rows == 2
+        assert [p.id for p in Prediction.query.all()] == [old[2]]
+        new = estimate(client, headers, created_at=datetime.utcnow())
+        assert new > max(old)
+        # once a newer row exists the held-back one is archived too
+        assert archive(CUTOFF, app=app).rows == 1
+    assert sorted(dashboard_ids(client, headers)) == old + [new]
+
+def test_interrupted_run_leftovers_are_removed(app, client, headers):
+    with app.app_context():
+        ids = [estimate(client, headers) for _ in range(2)]
+        rows = [dict(r._mapping) for r in db.session.execute(Prediction.__table__.select())]
+        archive(CUTOFF, app=app)
+        # As if the previous run died after writing the month file but before deleting
+        db.session.execute(Prediction.__table__.insert(), rows)
+        db.session.commit()
+        assert archive(CUTOFF, app=app).rows == 2
+        assert Prediction.query.count() == 0
+        assert load_manifest(archive_mod.archive_dir(app))["months"]["2024-03"]["rows"] == 2
+    assert sorted(dashboard_ids(client, headers)) == ids
+
+def test_reused_id_with_other_contents_is_an_error(app, client, headers):
+    make_legacy(app)
+    with app.app_context():
+        ids = [estimate(client, headers) for _ in range(3)]
+        archive(CUTOFF, app=app)
+        # e.g. a database restored from a backup taken before the archive run
+        row = dict(db.session.execute(Prediction.__table__.select().where(Prediction.id == ids[2])).one()._mapping)
+        db.session.execute(Prediction.__table__.insert(), [{**row, "id": ids[0], "total_cost": 1.0}])
+        estimate(client, headers, created_at=datetime.utcnow())
+        db.session.commit()
+        with pytest.raises(ArchiveError, match=str(ids[0])):
+            archive(CUTOFF, app=app)
+        # Nothing was lost: the reused row is still live and the archived copy untouched
+        assert Prediction.query.filter_by(id=ids[0]).one().total_cost == 1.0
+        assert archive_mod.find(ids[0]).total_cost != 1.0
+        assert load_manifest(archive_mod.archive_dir(app))["months"]["2024-03"]["rows"] == 2
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from conftest import register
+
+from app.asgi import AsyncDataAPI
+
+async def call(asgi, method, path, body=b'', headers=None):
+    """Runs one request through the ASGI app; returns (status, headers, body)."""
+    headers = dict(headers or {})
+    if body:
+        headers.setdefault('Content-Type', 'application/json')
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'client': ('127.0.0.1', 5000),
+             'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()]}
+    sent = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi(scope, receive, send)
+    start = sent[0]
+    return (start['status'], {k.decode(): v.decode() for k, v in start['headers']},
+            b''.join(m.get('body', b'') for m in sent[1:]))
+
+@pytest.fixture
+def asgi(app):
+    api = AsyncDataAPI(app, db_workers=2, cpu_workers=2)
+    yield api
+    api.db_pool.shutdown()
+    api.cpu_pool.shutdown()
+
+def test_estimate_dashboard_and_result(asgi, client, headers):
+    async def flow():
+        status, _, body = await call(asgi, 'POST', '/api/data/estimate',
+                                     json.dumps({"city": "Pune", "area_sqft": 1100}).encode(), headers)
+        assert status == 201, body
+        pred_id = json.loads(body)["id"]
+        status, _, body = await call(asgi, 'GET', '/api/data/dashboard', headers=headers)
+        assert status == 200 and json.loads(body)["count"] == 1
+        status, resp_headers, body = await call(asgi, 'GET', f'/api/data/result/{pred_id}', headers=headers)
+        assert status == 200 and json.loads(body)["inputs"]["city"] == "Pune"
+        status, _, body = await call(asgi, 'GET', f'/api/data/result/{pred_id}',
+                                     headers={**headers, 'If-None-Match': resp_headers['etag']})
+        assert status == 304 and body == b''
+    asyncio.run(flow())
+
+def test_estimate_rejects_non_object_json(asgi, headers):
+    status, _, _ = asyncio.run(call(asgi, 'POST', '/api/data/estimate', b'[1, 2]', headers))
+    assert status == 400
+
+def test_estimate_rejects_wrong_field_types(asgi, headers):
+    status, _, body = asyncio.run(call(asgi, 'POST', '/api/data/estimate', b'{"quality": 5}', headers))
+    assert status == 400 and b'quality' in body
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3", ""])
+def test_bad_content_length_is_rejected(asgi, headers, length):
+    status, _, body = asyncio.run(call(asgi, 'POST', '/api/data/estimate', b'{"city": "Pune"}',
+                                       {**headers, 'Content-Length': length}))
+    assert status == 400 and b'Content-Length' in body
+
+def test_refresh_tokens_are_rejected(app, asgi, user):
+    from flask_jwt_extended import create_refresh_token
+    with app.app_context():
+        token = create_refresh_token(identity=str(user[0]))
+    status, _, body = asyncio.run(call(asgi, 'GET', '/api/data/dashboard',
+                                       headers={'Authorization': f'Bearer {token}'}))
+    assert status == 401 and b'refresh' in body
+    assert asyncio.run(call(asgi, 'GET', '/api/data/dashboard'))[0] == 401
+
+def test_estimate_does_not_block_the_event_loop(asgi, headers, monkeypatch):
+    import app.asgi as asgi_module
+    real = asgi_module.run_estimate
+
+    def slow_estimate(*args, **kwargs):
+        time.sleep(0.3)  # stands in for CPU-bound model work
+        return real(*args, **kwargs)
+    monkeypatch.setattr(asgi_module, 'run_estimate', slow_estimate)
+
+    async def flow():
+        ticks = 0
+        task = asyncio.create_task(call(asgi, 'POST', '/api/data/estimate', b'{"area_sqft": 900}', headers))
+        while not task.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert (await task)[0] == 201
+        return ticks
+    assert asyncio.run(flow()) >= 15
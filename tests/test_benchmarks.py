@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+BENCH = os.path.join(ROOT, 'benchmarks')
+sys.path.insert(0, BENCH)
+
+from common import compare_to_baseline, measure  # noqa: E402
+
+def test_measure_reports_per_call_stats():
+    calls = []
+    stats = measure(lambda: calls.append(1), repeat=4, number=3, warmup=2)
+    assert len(calls) == 2 + 4 * 3
+    assert stats["min_ms"] <= stats["median_ms"] <= stats["p95_ms"]
+    assert (stats["repeat"], stats["number"]) == (4, 3)
+
+def test_compare_to_baseline_flags_only_real_slowdowns(tmp_path):
+    baseline = tmp_path / 'base.json'
+    baseline.write_text(json.dumps({"results": {
+        "slower": {"median_ms": 1.0}, "noise": {"median_ms": 0.0001}, "faster": {"median_ms": 2.0}}}))
+    current = {"slower": {"median_ms": 1.5}, "noise": {"median_ms": 0.0003}, "faster": {"median_ms": 1.0},
+               "new": {"median_ms": 9.0}}
+    assert [r[0] for r in compare_to_baseline(current, str(baseline), tolerance=0.25)] == ["slower"]
+
+def _run(*args):
+    return subprocess.run([sys.executable, os.path.join(BENCH, 'run.py'), '--quick', '-k', 'compute_cost_breakdown',
+                           *args], cwd=ROOT, capture_output=True, text=True)
+
+def test_run_writes_json_and_fails_on_regression(tmp_path):
+    out = tmp_path / 'bench.json'
+    proc = _run('--json', str(out))
+    assert proc.returncode == 0, proc.stderr
+    results = json.loads(out.read_text())["results"]
+    assert list(results) == ["cost_model.compute_cost_breakdown"]
+
+    results["cost_model.compute_cost_breakdown"]["median_ms"] = 1e-9
+    out.write_text(json.dumps({"results": results}))
+    assert _run('--baseline', str(out)).returncode == 1
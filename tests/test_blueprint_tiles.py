@@ -0,0 +1,137 @@
+import io
+import logging
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageDraw
+
+from conftest import register
+
+from app.blueprint_features import extract_blueprint_features
+from app import blueprint_tiles
+from app.blueprint_tiles import (DECODE_BYTES_PER_PX, TileOptions, _open_page, _PageReader, extract_tiled_features,
+                                 measure_tile, tile_boxes)
+
+def plan(width=900, height=700, rooms=True):
+    """A white page with an outer wall and (optionally) a cross of partitions, 4 px strokes."""
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((50, 40, width - 60, height - 50), outline=0, width=4)
+    if rooms:
+        draw.line((width // 2, 40, width // 2, height - 50), fill=0, width=4)
+        draw.line((50, height // 2, width - 60, height // 2), fill=0, width=4)
+    return img
+
+def encode(pages, fmt='TIFF'):
+    buf = io.BytesIO()
+    pages[0].save(buf, format=fmt, save_all=len(pages) > 1, append_images=pages[1:])
+    return buf.getvalue()
+
+def measure(page, tile_px, overlap=8):
+    stats = [measure_tile(page, box, core) for box, core in tile_boxes(*page.size, tile_px, overlap)]
+    boxes = [s[3] for s in stats if s[3]]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    return sum(s[0] for s in stats), sum(s[1] for s in stats), sum(s[2] for s in stats), bbox
+
+def test_tile_cores_partition_the_page():
+    boxes = tile_boxes(1000, 530, 256, 16)
+    assert len(boxes) == 4 * 3
+    assert sum((c[2] - c[0]) * (c[3] - c[1]) for _, c in boxes) == 1000 * 530
+    for box, core in boxes:
+        assert box[0] <= core[0] and box[1] <= core[1] and box[2] >= core[2] and box[3] >= core[3]
+
+@pytest.mark.parametrize("tile_px", [64, 100, 333])
+def test_tiling_does_not_change_the_measurement(tile_px):
+    page = plan()
+    assert measure(page, tile_px) == measure(page, 4096)
+
+def test_partitions_add_rooms():
+    options = TileOptions(tile_px=256, workers=2)
+    with_rooms, stats = extract_tiled_features(encode([plan(), plan()]), options)
+    empty, _ = extract_tiled_features(encode([plan(rooms=False)]), options)
+    assert stats["pages"] == 2 and stats["tiles"] == 2 * 4 * 3
+    assert with_rooms["rooms_estimate"] > empty["rooms_estimate"]
+    assert with_rooms["area_sqft_estimate"] == empty["area_sqft_estimate"] == 756.0
+    assert 60 <= with_rooms["wall_length_ft"] <= 1000
+
+def test_progress_and_a_tight_memory_budget():
+    seen = []
+    options = TileOptions(tile_px=200, workers=3, memory_budget_mb=0.1, progress=lambda d, t: seen.append((d, t)))
+    # every page is larger than the whole budget; they run one at a time instead of deadlocking
+    features, stats = extract_tiled_features(io.BytesIO(encode([plan(), plan(600, 500), plan()])), options)
+    assert seen[-1][0] == seen[-1][1] == stats["tiles"]
+    assert features["area_sqft_estimate"] == 756.0  # the largest page
+
+def test_memory_budget_bounds_pages_in_flight(monkeypatch):
+    budgets, during_tiles = [], []
+
+    class Recording(blueprint_tiles._Budget):
+        def __init__(self, limit):
+            super().__init__(limit)
+            self.peak_used = self.peak_leases = 0
+            budgets.append(self)
+
+        def __call__(self, nbytes):
+            lease = super().__call__(nbytes)
+            budget = self
+
+            class _Lease:
+                def __enter__(self):
+                    lease.__enter__()
+                    with budget.cond:
+                        budget.peak_used = max(budget.peak_used, budget.used)
+                        budget.peak_leases = max(budget.peak_leases, budget.leases)
+
+                def __exit__(self, *exc):
+                    lease.__exit__(*exc)
+            return _Lease()
+
+    def measuring(page, box, core):
+        during_tiles.append(budgets[0].used)
+        return measure_tile(page, box, core)
+
+    monkeypatch.setattr(blueprint_tiles, '_Budget', Recording)
+    monkeypatch.setattr(blueprint_tiles, 'measure_tile', measuring)
+    page_bytes = 900 * 700 * DECODE_BYTES_PER_PX
+    options = TileOptions(tile_px=200, workers=6, memory_budget_mb=2.5 * page_bytes / (1024 * 1024))
+    _, stats = extract_tiled_features(encode([plan()] * 6), options)
+    assert stats["pages"] == 6
+    budget = budgets[0]
+    assert budget.peak_leases <= 2 and budget.peak_used <= budget.limit
+    # Every tile is measured while its page still holds the lease
+    assert len(during_tiles) == stats["tiles"] and min(during_tiles) >= page_bytes
+    assert budget.used == budget.leases == 0
+
+def test_pages_are_read_from_the_stream_in_place():
+    class NoFullRead(io.BytesIO):
+        def read(self, size=-1):
+            assert size is not None and size >= 0, "the whole upload was read into memory"
+            return super().read(size)
+
+    data = encode([plan(), plan(600, 500)])
+    assert extract_tiled_features(NoFullRead(data), TileOptions(tile_px=256)) == \
+        extract_tiled_features(data, TileOptions(tile_px=256))
+
+def test_large_jpeg_pages_are_decoded_at_reduced_scale():
+    data = encode([plan(1600, 1200).convert('RGB')], fmt='JPEG')
+    options = TileOptions(memory_budget_mb=1)
+    img, scale, nbytes = _open_page(_PageReader(io.BytesIO(data), blueprint_tiles.threading.Lock()), 0, options)
+    assert scale > 1 and img.convert('L').size[0] < 1600
+    assert nbytes < 1600 * 1200 * DECODE_BYTES_PER_PX
+
+def test_single_frame_scans_keep_the_header_path():
+    data = encode([plan()], fmt='PNG')
+    assert extract_blueprint_features(data, tiled=TileOptions()) == extract_blueprint_features(data)
+    assert extract_blueprint_features(data, tiled=TileOptions(min_pixels=1)) != extract_blueprint_features(data)
+
+def test_multi_page_upload(make_app, caplog):
+    app = make_app(BLUEPRINT_TILED=True, BLUEPRINT_TILE_PX=256)
+    client = app.test_client()
+    _, headers = register(client)
+    caplog.set_level(logging.DEBUG, logger=app.logger.name)
+    resp = client.post('/api/data/estimate', headers=headers, content_type='multipart/form-data', data={
+        "city": "Pune", "blueprint": (io.BytesIO(encode([plan(), plan()])), "plan.tiff")})
+    assert resp.status_code == 201
+    assert resp.get_json()["quantities"]
+    assert "Blueprint tiles: 24/24" in caplog.text
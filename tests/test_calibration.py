@@ -0,0 +1,82 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from conftest import ROOT
+
+from app.calibration import calibrate, load_current
+from app.cost_model import CostEstimatorModel, compute_cost_breakdown, load_unit_costs
+from app.estimation import parse_estimate_params, run_estimate
+from app.ingest import import_csv
+
+DATASET = os.path.join(ROOT, 'app', 'data', 'building_cost_dataset.csv')
+
+@pytest.fixture
+def calibrated(app):
+    with app.app_context():
+        with open(DATASET, newline='') as f:
+            import_csv(f, load_unit_costs())
+        artifact, rows = calibrate(load_unit_costs())
+    assert rows > 0
+    return artifact
+
+def total(model, city, quality, area=1000, floors=1):
+    return model.predict_total_cost({"city": city, "quality": quality, "area_sqft": area, "no_of_floors": floors})[0]
+
+def test_unfitted_pairs_keep_city_and_quality_multipliers(calibrated):
+    model = CostEstimatorModel(calibrated)
+    fitted = [k for k, g in calibrated["groups"].items() if g["factors"] and k != "*"]
+    assert "Mumbai|premium" not in fitted and "Jaipur|basic" not in fitted
+
+    mumbai, jaipur, coimbatore = (total(model, "Mumbai", "premium"), total(model, "Jaipur", "economical"),
+                                  total(model, "Coimbatore", "standard"))
+    assert len({round(mumbai), round(jaipur), round(coimbatore)}) == 3
+    u = load_unit_costs()
+    # Same (global) quantities, so the ratio is exactly the static multipliers'
+    expected = (u["city_multiplier"]["Mumbai"] * u["quality_multiplier"]["premium"]) / (
+        u["city_multiplier"]["Jaipur"] * u["quality_multiplier"]["basic"])
+    assert mumbai / jaipur == pytest.approx(expected)
+
+def test_fitted_pair_uses_its_multiplier(calibrated):
+    model = CostEstimatorModel(calibrated)
+    key = next(k for k, g in calibrated["groups"].items() if g["factors"] and k != "*")
+    city, quality = key.split("|")
+    group = calibrated["groups"][key]
+    qty = {"bricks_count": 1000 * group["factors"]["bricks"], "cement_bags": 1000 * group["factors"]["cement"],
+           "steel_kg": 1000 * group["factors"]["steel"], "paint_liters": 1000 * group["factors"]["paint"],
+           "worker_days": 1000 * group["factors"]["labor"]}
+    expected = compute_cost_breakdown(qty, city, quality, load_unit_costs(), multiplier=group["multiplier"])["total"]
+    assert total(model, city, quality) == pytest.approx(expected)
+
+@pytest.mark.parametrize("city,quality", [("Chennai", "standard"), ("Mumbai", "premium"), ("Pune", "basic")])
+def test_breakdown_adds_up_to_total(calibrated, city, quality):
+    model = CostEstimatorModel(calibrated)
+    params = parse_estimate_params({"city": city, "quality": quality, "floors": 1, "area_sqft": 1500},
+                                   {"area_sqft_estimate": 900, "rooms_estimate": 4, "wall_length_ft": 100})
+    result = run_estimate(params, model, model, load_unit_costs(), 0.07)
+    # quantities are rounded to whole units before pricing
+    assert sum(result["breakdown"].values()) == pytest.approx(result["total"], rel=1e-3)
+
+def test_incremental_refit_matches_full_refit(app, calibrated):
+    extra = ("city,quality,floors,area_sqft,bricks_count,cement_bags,steel_kg,paint_liters,worker_days,total_cost\n"
+             "Chennai,standard,1,1000,9000,420,4100,190,130,2100000\n"
+             "Chennai,standard,2,1200,10000,500,5000,220,150,5200000\n"
+             "Chennai,standard,1,800,nan,300,3000,150,100,1500000\n")
+    with app.app_context():
+        import_csv(io.StringIO(extra), load_unit_costs())
+        incremental, rows = calibrate(load_unit_costs())
+        assert (incremental["version"], rows) == (calibrated["version"] + 1, 2)
+        assert load_current()["version"] == incremental["version"]
+        full, _ = calibrate(load_unit_costs(), full=True)
+    assert full["last_record_id"] == incremental["last_record_id"]
+    for key, group in full["groups"].items():
+        assert group["n"] == incremental["groups"][key]["n"]
+        assert group["multiplier"] == pytest.approx(incremental["groups"][key]["multiplier"])
+
+def test_calibrate_without_new_rows_writes_nothing(app, calibrated):
+    with app.app_context():
+        artifact, rows = calibrate(load_unit_costs())
+    assert rows == 0 and artifact["version"] == calibrated["version"]
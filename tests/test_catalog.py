@@ -0,0 +1,62 @@
+import pytest
+
+from app.api import data
+from app.cost_model import CostEstimatorModel
+
+COMBOS = [("Mumbai", "premium"), ("Mumbai", "high-end"), ("Mumbai", "Luxury"), ("Jaipur", "basic"),
+          ("Atlantis", "standard"), ("Atlantis", "luxury"), ("Surat", "basic")]
+
+def preview(catalog, city, quality, area, floors):
+    """previewTotal() of client/src/pages/Estimate.jsx."""
+    name = quality.lower()
+    quality = catalog["quality_aliases"].get(name, name)
+    if quality in catalog["default_rates"]:
+        rate = catalog["rates"].get(city, catalog["default_rates"])[quality]
+    else:
+        rate = catalog["other_quality_rates"].get(city, catalog["other_quality_rates"]["*"])
+    return area * floors * rate
+
+def calibration():
+    return {"version": 3, "groups": {
+        "*": {"factors": {"bricks": 8.5, "cement": 0.42, "steel": 4.2, "paint": 0.2, "labor": 0.13},
+              "multiplier": 1.3},
+        "Surat|basic": {"factors": {"bricks": 7, "cement": 0.35, "steel": 3.5, "paint": 0.15, "labor": 0.1},
+                        "multiplier": 0.9},
+        "Mumbai|high-end": {"factors": {"bricks": 9, "cement": 0.5, "steel": 5, "paint": 0.25, "labor": 0.15},
+                            "multiplier": 1.6},
+    }}
+
+@pytest.mark.parametrize("calibrated", [False, True])
+def test_preview_matches_the_estimate(client, headers, monkeypatch, calibrated):
+    if calibrated:
+        model = CostEstimatorModel(calibration())
+        monkeypatch.setattr(data, '_QTY_MODEL', model)
+        monkeypatch.setattr(data, '_TOTAL_COST_MODEL', model)
+    catalog = client.get('/api/data/catalog').get_json()
+    assert catalog["linear"] is True
+    for city, quality in COMBOS:
+        est = client.post('/api/data/estimate', json={"city": city, "quality": quality, "floors": 3,
+                                                      "area_sqft": 1250}, headers=headers).get_json()
+        assert preview(catalog, city, quality, 1250, 3) == pytest.approx(est["total_cost"]), (city, quality)
+        assert est["catalog_version"] == catalog["version"]
+        if calibrated:
+            # the breakdown is priced with the same (calibrated) multiplier as the total;
+            # it covers one floor, the total all of them (cost_model.predict_total_cost)
+            assert sum(est["breakdown"].values()) * 3 == pytest.approx(est["total_cost"], rel=2e-3)
+
+def test_calibrated_groups_in_the_catalog(client, monkeypatch):
+    model = CostEstimatorModel(calibration())
+    monkeypatch.setattr(data, '_QTY_MODEL', model)
+    monkeypatch.setattr(data, '_TOTAL_COST_MODEL', model)
+    groups = client.get('/api/data/catalog').get_json()["calibrated_groups"]
+    assert groups["Surat|basic"]["multiplier"] == 0.9
+    assert groups["*"]["multiplier"] is None  # the global fit only lends its factors
+
+def test_catalog_caching(client):
+    resp = client.get('/api/data/catalog')
+    version = resp.get_json()["version"]
+    assert resp.headers["ETag"] == f'"{version}"'
+    assert "max-age=86400" in resp.headers["Cache-Control"]
+    assert client.get('/api/data/catalog', headers={"If-None-Match": f'"{version}"'}).status_code == 304
+    pinned = client.get('/api/data/catalog', query_string={"v": version})
+    assert "immutable" in pinned.headers["Cache-Control"]
@@ -0,0 +1,78 @@
+import pytest
+
+from app import compact
+from app.compact import CompactError, pack_details, unpack_details
+
+INPUTS = {"city": "Pune", "quality": "economical", "floors": 2, "carpet_ratio": 0.72, "is_commercial": False,
+          "area_sqft_estimate": 1200, "rooms_estimate": 4, "wall_length_ft": 180.5}
+QTY = {"bricks_count": 9600, "cement_bags": 480, "steel_kg": 4800, "paint_liters": 216, "worker_days": 144}
+COSTS = {"bricks": 57408.0, "cement": 167808.0, "steel": 344448.0, "paint": 51667.2, "labor": 132480.0}
+
+def test_estimator_rows_use_the_fixed_layout():
+    blob = pack_details(INPUTS, QTY, COSTS)
+    assert blob[2:3] == b'F' and len(blob) == 3 + compact._FIXED.size
+    inputs, qty, costs = unpack_details(blob)
+    assert (inputs, qty, costs) == (INPUTS, QTY, COSTS)
+    # ints stay ints and floats stay floats
+    assert type(inputs["area_sqft_estimate"]) is int and type(inputs["wall_length_ft"]) is float
+
+@pytest.mark.parametrize("inputs", [
+    {**INPUTS, "city": "Thiruvananthapuram"},
+    {**INPUTS, "source": "import", "tags": ["a", {"b": 1}]},
+    {**INPUTS, "floors": 70000, "is_commercial": None},
+    {"city": "Pune"},
+])
+def test_other_rows_round_trip_through_the_generic_layout(inputs):
+    blob = pack_details(inputs, {**QTY, "sand_cft": 2.5}, COSTS)
+    assert blob[2:3] == b'G'
+    assert unpack_details(blob) == (inputs, {**QTY, "sand_cft": 2.5}, COSTS)
+
+def test_garbage_is_rejected():
+    with pytest.raises(CompactError):
+        unpack_details(b'{"city": "Pune"}')
+
+def test_compact_storage_end_to_end(make_app):
+    from conftest import register
+    app = make_app(PREDICTION_STORAGE='compact')
+    client = app.test_client()
+    _, headers = register(client)
+    created = client.post('/api/data/estimate', json={"city": "Pune", "area_sqft": 1200}, headers=headers)
+    pred_id = created.get_json()["id"]
+    from app.models import Prediction
+    with app.app_context():
+        row = Prediction.query.get(pred_id)
+        assert row.details is not None and row.inputs == ''
+        assert row.inputs_data["city"] == "Pune"
+    result = client.get(f'/api/data/result/{pred_id}', headers=headers).get_json()
+    assert result["breakdown"] == created.get_json()["breakdown"]
+    assert client.get('/api/data/dashboard', headers=headers).status_code == 200
+
+def test_migration_round_trip(app, client, headers):
+    from app import db
+    from app.models import Prediction
+    ids = [client.post('/api/data/estimate', json={"city": c, "area_sqft": 1000}, headers=headers).get_json()["id"]
+           for c in ("Pune", "Delhi", "Goa")]
+    with app.app_context():
+        before = {p.id: (p.inputs_data, p.quantities_data, p.breakdown_data) for p in Prediction.query.all()}
+        stats = compact.compact_rows(batch_size=2)
+        assert (stats.rows, stats.skipped) == (3, 0) and stats.compact_bytes < stats.json_bytes
+        db.session.expire_all()
+        assert all(p.details is not None and p.inputs == '' for p in Prediction.query.all())
+        assert {p.id: (p.inputs_data, p.quantities_data, p.breakdown_data) for p in Prediction.query.all()} == before
+        assert compact.compact_rows().rows == 0  # nothing left to migrate
+
+        assert compact.expand_rows(batch_size=2).rows == 3
+        db.session.expire_all()
+        assert all(p.details is None for p in Prediction.query.all())
+        assert {p.id: (p.inputs_data, p.quantities_data, p.breakdown_data) for p in Prediction.query.all()} == before
+    assert sorted(before) == ids
+
+def test_zstd_dictionary_compression(app, client, headers):
+    pytest.importorskip("zstandard")
+    for area in range(1000, 1100, 5):
+        client.post('/api/data/estimate', json={"city": "Pune", "area_sqft": area}, headers=headers)
+    with app.app_context():
+        compressor = compact.Compressor(compact.train_dictionary(compact.sample_blobs(), size=4096))
+        blob = compressor.compress(pack_details(INPUTS, QTY, COSTS))
+        assert blob[1] & compact.FLAG_ZSTD
+        assert unpack_details(blob) == (INPUTS, QTY, COSTS)
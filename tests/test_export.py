@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from conftest import make_admin, register
+
+from app import export
+
+def add_predictions(app, user_id, cities, created_at=None):
+    from app import db
+    from app.models import Prediction
+    with app.app_context():
+        for i, city in enumerate(cities):
+            result = {"inputs": {"city": city, "quality": "standard", "floors": 1, "is_commercial": i % 2 == 0,
+                                 "area_sqft_estimate": 1000.0 + i},
+                      "quantities": {"bricks_count": 8000}, "breakdown": {"bricks": 52000.0},
+                      "total": 100000.0 + i, "predicted_2026": 107000.0 + i}
+            db.session.add(Prediction.from_result(result, user_id=user_id, created_at=created_at or datetime.utcnow()))
+        db.session.commit()
+
+@pytest.fixture
+def admin(app, client):
+    user_id, headers = register(client, 'admin')
+    make_admin(app, user_id)
+    return user_id, headers
+
+def test_city_prefilter_escapes_like_wildcards(app, user):
+    add_predictions(app, user[0], ["A_B", "AxB", "C%D", "C-long-D", "Chennai"])
+    with app.app_context():
+        assert export.export_query(city="A_B").count() == 1
+        assert export.export_query(city="C%D").count() == 1
+        assert [r["city"] for r in export.iter_rows(city="AxB")] == ["AxB"]
+
+def test_csv_and_ndjson_exports(app, client, admin):
+    add_predictions(app, admin[0], ["Pune", "Delhi"], created_at=datetime(2025, 3, 1))
+    add_predictions(app, admin[0], ["Pune"], created_at=datetime(2025, 5, 1))
+
+    resp = client.get('/api/admin/export?format=csv&city=Pune', headers=admin[1])
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert resp.status_code == 200 and [r["city"] for r in rows] == ["Pune", "Pune"]
+    assert list(rows[0]) == export.COLUMNS
+
+    resp = client.get('/api/admin/export?format=ndjson&end=2025-03-01', headers=admin[1])
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert sorted(r["city"] for r in lines) == ["Delhi", "Pune"]
+
+    assert client.get('/api/admin/export?start=yesterday', headers=admin[1]).status_code == 400
+    assert client.get('/api/admin/export?format=xml', headers=admin[1]).status_code == 400
+    assert client.get('/api/admin/export', headers=register(client, 'plain')[1]).status_code == 403
+
+def test_parquet_columns_keep_is_commercial_boolean():
+    rows = [dict.fromkeys(export.COLUMNS), dict.fromkeys(export.COLUMNS), dict.fromkeys(export.COLUMNS)]
+    rows[0]["is_commercial"], rows[1]["is_commercial"], rows[2]["is_commercial"] = True, None, "false"
+    assert export.parquet_columns(rows)["is_commercial"] == [True, None, False]
+
+def test_parquet_export(app, tmp_path, user):
+    pq = pytest.importorskip("pyarrow.parquet")
+    add_predictions(app, user[0], ["Pune", "Delhi"])
+    with app.app_context():
+        export.write_parquet(export.iter_rows(), str(tmp_path / 'out.parquet'))
+    table = pq.read_table(str(tmp_path / 'out.parquet'))
+    assert str(table.schema.field("is_commercial").type) == "bool"
+    assert table.column("is_commercial").to_pylist() == [True, False]
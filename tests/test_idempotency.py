@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import register
+
+from app import db
+from app.api import data
+from app.models import IdempotencyRecord, Prediction
+
+BODY = {"city": "Pune", "quality": "standard", "floors": 2, "area_sqft": 1200}
+
+def post(client, headers, key=None, body=BODY):
+    extra = {"Idempotency-Key": key} if key else {}
+    return client.post('/api/data/estimate', json=body, headers={**headers, **extra})
+
+def count(app, model=Prediction):
+    with app.app_context():
+        return model.query.count()
+
+def test_retry_replays_the_stored_response(app, client, headers):
+    first = post(client, headers, "k1")
+    again = post(client, headers, "k1")
+    assert first.status_code == again.status_code == 201
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert again.get_json() == first.get_json()
+    assert count(app) == 1
+
+def test_keys_are_scoped_per_user_and_optional(app, client, headers):
+    _, other = register(client, 'other')
+    assert post(client, headers, "k1").get_json()["id"] != post(client, other, "k1").get_json()["id"]
+    post(client, headers)
+    post(client, headers)
+    assert count(app) == 4
+
+def test_key_reused_for_a_different_request(client, headers):
+    post(client, headers, "k1")
+    resp = post(client, headers, "k1", body={**BODY, "area_sqft": 1300})
+    assert resp.status_code == 422
+
+def test_key_length_is_limited(client, headers):
+    assert post(client, headers, "k" * 256).status_code == 400
+
+def test_pending_expired_and_abandoned_records(app, client, headers, user):
+    post(client, headers, "probe")
+    with app.app_context():
+        record = IdempotencyRecord.query.filter_by(key="probe").one()
+        fingerprint = record.fingerprint
+        now = datetime.utcnow()
+        db.session.add_all([
+            IdempotencyRecord(user_id=user[0], key="running", fingerprint=fingerprint,
+                              created_at=now, expires_at=now + timedelta(days=1)),
+            IdempotencyRecord(user_id=user[0], key="abandoned", fingerprint=fingerprint,
+                              created_at=now - timedelta(minutes=5), expires_at=now + timedelta(days=1)),
+            IdempotencyRecord(user_id=user[0], key="expired", fingerprint="other", status='complete',
+                              response_status=201, response_body="{}",
+                              created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)),
+        ])
+        db.session.commit()
+
+    resp = post(client, headers, "running")
+    assert resp.status_code == 409 and resp.headers["Retry-After"] == "1"
+    assert post(client, headers, "abandoned").status_code == 201
+    assert post(client, headers, "expired").status_code == 201
+    assert count(app) == 3
+
+def test_server_errors_are_not_stored(app, client, headers, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("model exploded")
+    with monkeypatch.context() as m:
+        m.setattr(data, 'run_estimate', broken)
+        assert post(client, headers, "k1").status_code == 500
+    assert count(app, IdempotencyRecord) == 0
+    resp = post(client, headers, "k1")
+    assert resp.status_code == 201 and "Idempotent-Replayed" not in resp.headers
+
+def test_concurrent_duplicates_share_one_computation(make_app, tmp_path, monkeypatch):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'idem.db'}")
+    _, headers = register(app.test_client())
+    sent = []
+    def slow_report(*args, **kwargs):
+        sent.append(1)
+        time.sleep(0.3)
+    monkeypatch.setattr(data, 'send_report', slow_report)
+
+    responses = []
+    def submit():
+        responses.append(post(app.test_client(), headers, "k1"))
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [r.status_code for r in responses] == [201] * 4
+    assert len({r.get_json()["id"] for r in responses}) == 1
+    assert sorted(r.headers.get("Idempotent-Replayed", "") for r in responses) == ["", "true", "true", "true"]
+    assert sent == [1] and count(app) == 1
+
+def test_replays_skip_the_rate_limiter(make_app):
+    app = make_app(RATELIMIT_ENABLED=True, RATE_LIMITS={"data_api.estimate": {"user": "1/minute"}})
+    client = app.test_client()
+    _, headers = register(client)
+    assert post(client, headers, "k1").status_code == 201
+    replay = post(client, headers, "k1")
+    assert replay.status_code == 201 and replay.headers["Idempotent-Replayed"] == "true"
+    # A limited request is not stored, so retrying the key later still runs it
+    assert post(client, headers, "k2").status_code == 429
+    with app.app_context():
+        assert IdempotencyRecord.query.filter_by(key="k2").count() == 0
+
+def test_uploads_are_hashed_once(client, headers, monkeypatch):
+    import hashlib
+    import io
+    from types import SimpleNamespace
+    from app import idempotency, uploads
+    from test_uploads import png_bytes
+    passes = []
+    def counting(stream):
+        passes.append(1)
+        digest = hashlib.sha256(stream.read()).hexdigest()
+        stream.seek(0)
+        return digest
+    monkeypatch.setattr(idempotency, 'stream_sha256', counting)
+    monkeypatch.setattr(uploads, 'hashlib', SimpleNamespace(sha256=lambda: pytest.fail("hashed the upload again")))
+
+    resp = client.post('/api/data/estimate', content_type='multipart/form-data',
+                       headers={**headers, "Idempotency-Key": "k1"},
+                       data={"city": "Pune", "blueprint": (io.BytesIO(png_bytes()), 'plan.png')})
+    assert resp.status_code == 201 and passes == [1]
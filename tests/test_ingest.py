@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from conftest import make_admin, register
+
+from app.cost_model import load_unit_costs
+from app.ingest import Vocabulary, import_csv, normalize
+
+HEADER = "city,quality,floors,rooms,area_sqft,total_cost\n"
+
+@pytest.fixture
+def vocab():
+    return Vocabulary(load_unit_costs())
+
+def row(**overrides):
+    values = {"city": "Chennai", "quality": "standard", "floors": "2", "rooms": "4", "area_sqft": "900",
+              "total_cost": "2500000"}
+    values.update(overrides)
+    return values
+
+def test_normalize_aliases(vocab):
+    assert normalize(row(city=" bangalore ", quality="Economical"), vocab)["city"] == "Bengaluru"
+    assert normalize(row(quality="economy"), vocab)["quality"] == "basic"
+    assert normalize(row(quality="High-End"), vocab)["quality"] == "high-end"  # not merged into premium
+    assert normalize(row(quality="premium"), vocab)["quality"] == "premium"
+
+@pytest.mark.parametrize("field,value", [
+    ("total_cost", "nan"), ("total_cost", "inf"), ("area_sqft", "-Infinity"), ("floors", "inf"),
+    ("floors", "nan"), ("floors", "0"), ("total_cost", "abc"), ("city", "Atlantis"), ("quality", "gold"),
+    ("floors", "2.5"), ("rooms", "3.7"),
+])
+def test_normalize_rejects(vocab, field, value):
+    with pytest.raises(ValueError):
+        normalize(row(**{field: value}), vocab)
+
+def test_normalize_accepts_whole_numbers_written_as_floats(vocab):
+    values = normalize(row(floors="2.0", rooms="4"), vocab)
+    assert (values["floors"], values["rooms"]) == (2, 4)
+
+def test_import_csv_inserts_good_rows_and_writes_rejects(app, tmp_path):
+    from app.models import HistoricalRecord
+    text = io.StringIO(HEADER + "Chennai,standard,2,4,900,2500000\n"
+                                "Mumbai,high-end,3,6,2000,NaN\n"
+                                "Pune,premium,1,3,700,1900000\n")
+    with app.app_context():
+        stats, reject_path = import_csv(text, load_unit_costs(), source="t.csv", batch_size=1)
+        assert (stats.rows, stats.inserted, stats.rejected) == (3, 2, 1)
+        assert sorted(r.city for r in HistoricalRecord.query) == ["Chennai", "Pune"]
+    rejects = open(reject_path).read().splitlines()
+    assert rejects[1].startswith("3,total_cost is not a number")
+
+def test_import_csv_requires_columns(app):
+    with app.app_context(), pytest.raises(ValueError):
+        import_csv(io.StringIO("city,quality\nChennai,standard\n"), load_unit_costs())
+
+def test_import_endpoint(app, client):
+    user_id, headers = register(client, 'admin')
+    make_admin(app, user_id)
+    data = {"file": (io.BytesIO((HEADER + "Delhi,high-end,2,4,1000,3000000\n").encode()), 'h.csv')}
+    resp = client.post('/api/admin/import', data=data, headers=headers, content_type='multipart/form-data')
+    assert resp.status_code == 201 and resp.get_json()["inserted"] == 1
+    assert resp.get_json()["rejects_file"] is None
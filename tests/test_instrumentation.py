@@ -0,0 +1,39 @@
+from conftest import register
+
+from app.instrumentation import Histogram
+
+def test_histogram_render_is_cumulative():
+    h = Histogram("demo_seconds", "Demo.", ("endpoint",), buckets=(0.1, 1.0))
+    h.observe(0.05, "a")
+    h.observe(0.5, "a")
+    h.observe(5, "a")
+    text = h.render()
+    assert 'demo_seconds_bucket{endpoint="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{endpoint="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{endpoint="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{endpoint="a"} 3' in text
+
+def test_server_timing_and_metrics(make_app):
+    app = make_app(METRICS_ENABLED=True)
+    client = app.test_client()
+    _, headers = register(client)
+    resp = client.post('/api/data/estimate', json={"city": "Chennai", "area_sqft": 1000}, headers=headers)
+    assert resp.status_code == 201
+    timing = resp.headers['Server-Timing']
+    for stage in ('predict', 'breakdown', 'total_cost', 'db_commit', 'db;', 'total;'):
+        assert stage in timing
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="data_api.estimate",method="POST",status="201"}' in text
+    assert 'request_stage_duration_seconds_count{endpoint="data_api.estimate",stage="predict"}' in text
+
+def test_metrics_disabled_by_default(client):
+    assert b'http_request_duration_seconds' not in client.get('/metrics').get_data()
+    assert 'Server-Timing' not in client.get('/api/auth/me').headers
+
+def test_estimates_do_not_print_user_details(client, capsys):
+    _, headers = register(client)
+    capsys.readouterr()
+    assert client.post('/api/data/estimate', json={"city": "Pune"}, headers=headers).status_code == 201
+    out = capsys.readouterr().out
+    assert "tester@example.com" not in out and "Estimate call" not in out
@@ -0,0 +1,50 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import json_provider
+
+PAYLOAD = {"b": 1.5, "a": [1, None, True], "when": datetime(2026, 3, 1, 12, 30), "price": Decimal("12.50"),
+           "name": "Kolkata – ₹"}
+
+def test_auto_uses_orjson(make_app):
+    pytest.importorskip("orjson")
+    assert isinstance(make_app().json, json_provider.OrjsonProvider)
+    assert not isinstance(make_app(JSON_PROVIDER='stdlib').json, json_provider.OrjsonProvider)
+
+def test_responses_match_flask_default(make_app):
+    fast, stdlib = make_app(), make_app(JSON_PROVIDER='stdlib')
+    with fast.app_context():
+        fast_body = fast.json.response(PAYLOAD).get_data()
+        assert fast.json.loads(fast.json.dumps(PAYLOAD)) == fast.json.loads(fast_body)
+    with stdlib.app_context():
+        stdlib_body = stdlib.json.response(PAYLOAD).get_data()
+    # Same keys in the same order, same HTTP dates, trailing newline; only whitespace may differ
+    assert fast_body.endswith(b"\n")
+    assert stdlib.json.loads(fast_body) == stdlib.json.loads(stdlib_body)
+    assert fast.json.loads(fast_body)["when"] == "Sun, 01 Mar 2026 12:30:00 GMT"
+    assert list(fast.json.loads(fast_body)) == sorted(PAYLOAD)
+
+def test_dumps_kwargs_fall_back_to_stdlib(app):
+    with app.app_context():
+        assert app.json.dumps({"b": 1, "a": 2}, indent=2) == '{\n  "a": 2,\n  "b": 1\n}'
+
+def test_numpy_values_serialize(app):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("orjson")
+    with app.app_context():
+        assert app.json.loads(app.json.dumps({"x": np.float64(2.5), "v": np.arange(3)})) == {"x": 2.5, "v": [0, 1, 2]}
+    assert json_provider.loads(json_provider.dumps({"v": np.arange(2)})) == {"v": [0, 1]}
+
+def test_column_helpers_round_trip():
+    value = {"city": "Pune", "area": 1200.5, "rooms": 4, "tags": ["a", "ü"]}
+    text = json_provider.dumps(value)
+    assert " " not in text.replace("Pune", "")
+    assert json_provider.loads(text) == value
+
+def test_api_response_through_orjson(client, headers):
+    resp = client.post('/api/data/estimate', json={"city": "Pune", "area_sqft": 1200}, headers=headers)
+    assert resp.status_code == 201 and resp.mimetype == 'application/json'
+    assert resp.get_data().endswith(b"\n")
+    assert set(resp.get_json()["breakdown"]) == {"bricks", "cement", "steel", "paint", "labor"}
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+def test_spawned_run_sees_seeded_data(tmp_path):
+    """The README command: seed, spawn gunicorn on the same database, replay a mix."""
+    env = {k: v for k, v in os.environ.items() if k != 'DATABASE_URL'}
+    env.update(TMPDIR=str(tmp_path), SCHEMA_MARKER_DIR=str(tmp_path), PRELOAD='false')
+    report_path = tmp_path / 'report.json'
+    proc = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'loadtest.py'), 'run', '--spawn', '--workers', '1',
+         '--threads', '2', '--seed-users', '3', '--seed-predictions', '30', '--users', '3', '--rps', '10',
+         '--duration', '2', '--blueprint-mp', '0', '--mix', 'login=1,estimate=1,dashboard=1,result=1',
+         '--json', str(report_path)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert (tmp_path / 'loadtest.db').exists()
+
+    report = json.loads(report_path.read_text())
+    assert sum(op["count"] for op in report["operations"].values()) > 0
+    assert sum(op["errors"] for op in report["operations"].values()) == 0
+    assert report["mail"]["messages"] >= report["operations"].get("estimate", {}).get("count", 0) > 0
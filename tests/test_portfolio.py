@@ -0,0 +1,68 @@
+import re
+from datetime import datetime
+
+from conftest import register
+
+from app.portfolio import ROWS_PER_SUMMARY_PAGE, PortfolioStats, iter_portfolio
+
+def rows(n):
+    return [{"id": i, "created_at": datetime(2026, 1, 1 + i % 28), "city": "Pune", "quality": "standard",
+             "floors": 2, "area_sqft_estimate": 1000 + i, "total_cost": 1000.0 * i, "predicted_2026": 1070.0 * i}
+            for i in range(1, n + 1)]
+
+def check_pdf(data):
+    """Header, trailer and a cross-reference table whose offsets point at their objects."""
+    assert data.startswith(b'%PDF-') and data.rstrip().endswith(b'%%EOF')
+    start = int(re.search(rb'startxref\s+(\d+)', data).group(1))
+    assert data[start:start + 4] == b'xref'
+    first, count = map(int, re.match(rb'xref\s+(\d+) (\d+)', data[start:]).groups())
+    entries = re.findall(rb'(\d{10}) \d{5} n', data[start:])
+    assert len(entries) == count - 1
+    for num, offset in enumerate(entries, start=first + 1):
+        assert data[int(offset):].startswith(f"{num} 0 obj".encode())
+    return len(re.findall(rb'/Type\s*/Page\b', data))
+
+def test_document_structure_and_stats():
+    stats = PortfolioStats()
+    data = b''.join(iter_portfolio(rows(ROWS_PER_SUMMARY_PAGE + 5), owner={"name": "a", "email": "a@x"},
+                                   stats=stats, compress=False))
+    assert check_pdf(data) == ROWS_PER_SUMMARY_PAGE + 5 + 2
+    assert (stats.estimates, stats.pages, stats.bytes) == (ROWS_PER_SUMMARY_PAGE + 5, ROWS_PER_SUMMARY_PAGE + 7,
+                                                           len(data))
+    assert b'Pune' in data and b'a@x' in data
+
+def test_empty_portfolio_still_has_a_summary_page():
+    assert check_pdf(b''.join(iter_portfolio([]))) == 1
+
+def test_text_is_escaped():
+    row = dict(rows(1)[0], city="Weird (city) \\ name")
+    data = b''.join(iter_portfolio([row], compress=False))
+    check_pdf(data)
+    assert b'Weird \\(city\\) \\\\ name' in data
+
+def test_portfolio_endpoint(client, headers):
+    ids = [client.post('/api/data/estimate', json={"city": c, "area_sqft": 1000}, headers=headers).get_json()["id"]
+           for c in ("Pune", "Delhi", "Goa")]
+    _, other = register(client, 'other')
+    client.post('/api/data/estimate', json={"city": "Mumbai"}, headers=other)
+
+    resp = client.get('/api/data/portfolio', headers=headers)
+    assert resp.status_code == 200 and resp.mimetype == 'application/pdf'
+    assert 'portfolio-' in resp.headers['Content-Disposition']
+    assert check_pdf(resp.get_data()) == 3 + 1
+
+    picked = client.get('/api/data/portfolio', query_string={"ids": f"{ids[0]},{ids[2]}"}, headers=headers)
+    assert check_pdf(picked.get_data()) == 2 + 1
+    assert client.get('/api/data/portfolio', query_string={"start": "2999-01-01"},
+                      headers=headers).status_code == 200
+
+def test_portfolio_rejects_bad_filters(client, headers):
+    for args in ({"ids": "1,x"}, {"start": "yesterday"}):
+        assert client.get('/api/data/portfolio', query_string=args, headers=headers).status_code == 400
+
+def test_portfolio_summary_goes_to_the_debug_log(app, client, headers, caplog, capsys):
+    client.post('/api/data/estimate', json={"city": "Pune"}, headers=headers)
+    with caplog.at_level('DEBUG', logger=app.logger.name):
+        client.get('/api/data/portfolio', headers=headers).get_data()
+    assert any(r.getMessage().startswith("Portfolio: 1 estimates") for r in caplog.records)
+    assert "Portfolio:" not in capsys.readouterr().out
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from conftest import register
+
+from app import preload
+
+def ready(app):
+    resp = app.test_client().get('/api/ready')
+    return resp.status_code, resp.get_json()
+
+def test_ready_without_preload(app):
+    status, body = ready(app)
+    assert status == 200 and body["ready"] and not body["warm"]
+
+def test_preload_warms_before_create_app_returns(make_app):
+    app = make_app(PRELOAD='true')
+    status, body = ready(app)
+    assert status == 200 and body["warm"] and not body["warming"]
+    assert set(body["steps"]) == {name for name, _ in preload.STEPS}
+    assert "error" not in body["steps"]["models"]
+    # the in-memory database was not disposed with the pool
+    assert register(app.test_client())[0] == 1
+
+def test_background_preload_reports_progress(make_app, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(preload, 'STEPS', preload.STEPS + (("gate", lambda app: release.wait(5)),))
+    app = make_app(PRELOAD='background')
+    status, body = ready(app)
+    assert status == 503 and body["warming"] and not body["ready"]
+    # the app serves requests meanwhile
+    assert app.test_client().get('/api/data/catalog').status_code == 200
+    release.set()
+    for _ in range(100):
+        status, body = ready(app)
+        if status == 200:
+            break
+        time.sleep(0.05)
+    assert status == 200 and body["warm"] and body["steps"]["gate"]["detail"] is True
+
+def test_failed_steps_are_reported(make_app, monkeypatch):
+    def broken(app):
+        raise RuntimeError("no fonts")
+    monkeypatch.setattr(preload, 'STEPS', (("models", preload._models), ("report", broken)))
+    status, body = ready(make_app(PRELOAD='true'))
+    assert status == 503 and not body["ready"] and body["warm"]
+    assert body["failed"] == ["report"] and body["steps"]["report"] == {"error": "no fonts"}
+    assert "error" not in body["steps"]["models"]
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from conftest import make_admin, register
+
+from app.profiling import StackSampler, format_collapsed
+
+@pytest.fixture
+def admin(app, client):
+    user_id, headers = register(client, 'admin')
+    make_admin(app, user_id)
+    return headers
+
+def _busy(seconds):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        sum(range(1000))
+
+def test_stack_sampler_collapses_stacks():
+    import threading
+    sampler = StackSampler(threading.get_ident(), interval=0.001)
+    sampler.start()
+    _busy(0.05)
+    text = format_collapsed(sampler.finish())
+    assert any('test_profiling.py:_busy' in line for line in text.splitlines())
+    stack, count = text.splitlines()[0].rsplit(' ', 1)
+    assert int(count) >= 1 and ';' in stack
+
+@pytest.mark.parametrize("mode,suffix", [("cpu", ".prof"), ("sample", ".collapsed"), ("memory", ".mem.txt")])
+def test_profile_single_request(client, admin, mode, suffix):
+    resp = client.get('/api/data/dashboard', headers={**admin, 'X-Profile': mode})
+    name = resp.headers['X-Profile-Id']
+    assert name.endswith(suffix)
+    listed = client.get('/api/admin/profiles', headers=admin).get_json()["profiles"]
+    assert name in [p["name"] for p in listed]
+    assert client.get(f'/api/admin/profiles/{name}', headers=admin).status_code == 200
+
+def test_profile_flag_ignored_for_non_admins(client, admin):
+    _, headers = register(client, 'plain')
+    assert 'X-Profile-Id' not in client.get('/api/data/dashboard', headers={**headers, 'X-Profile': 'cpu'}).headers
+
+def test_profile_text_summary_validates_sort(client, admin):
+    name = client.get('/api/data/dashboard', headers={**admin, 'X-Profile': 'cpu'}).headers['X-Profile-Id']
+    resp = client.get(f'/api/admin/profiles/{name}?format=text&sort=tottime', headers=admin)
+    assert resp.status_code == 200 and b'function calls' in resp.data
+    assert client.get(f'/api/admin/profiles/{name}?format=text&sort=bogus', headers=admin).status_code == 400
+
+def test_profile_window(client, admin):
+    assert client.post('/api/admin/profile/window', json={"mode": "sample", "seconds": 5},
+                       headers=admin).get_json()["active"]
+    _, headers = register(client, 'plain')
+    assert client.get('/api/data/dashboard', headers=headers).headers['X-Profile-Id'].endswith('.collapsed')
+    client.post('/api/admin/profile/window', json={"seconds": 0}, headers=admin)
+    assert client.post('/api/admin/profile/window', json={"mode": "gpu"}, headers=admin).status_code == 400
+
+def test_memory_hotspots(client, admin):
+    resp = client.post('/api/admin/profile/memory', json={"city": "Mumbai", "area_sqft": 1500}, headers=admin)
+    assert resp.status_code == 200
+    assert set(resp.get_json()) == {"estimate", "pdf"}
+
+@pytest.mark.parametrize("body", [{"area_sqft": "big"}, {"floors": "two"}, {"quality": 5}, [1, 2]])
+def test_memory_hotspots_rejects_bad_input(client, admin, body):
+    assert client.post('/api/admin/profile/memory', json=body, headers=admin).status_code == 400
+
+def test_profiling_endpoints_require_admin(client, headers):
+    assert client.get('/api/admin/profiles', headers=headers).status_code == 403
+    assert client.post('/api/admin/profile/memory', json={}, headers=headers).status_code == 403
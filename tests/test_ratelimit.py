@@ -0,0 +1,90 @@
+import pytest
+
+from app import ratelimit
+from app.ratelimit import MemoryStore, RateLimiter, SQLiteStore, forwarded_client, parse_limit
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def burst(limiter, endpoint, identities, n=100):
+    """How many of n back-to-back requests are admitted."""
+    return sum(1 for _ in range(n) if limiter.check(endpoint, identities) == 0)
+
+def test_parse_limit():
+    assert parse_limit("20/minute") == (20, 20 / 60)
+    assert parse_limit("5/hours") == (5, 5 / 3600)
+    with pytest.raises(ValueError):
+        parse_limit("5/fortnight")
+
+def test_bucket_empties_and_refills():
+    clock = Clock()
+    limiter = RateLimiter({"ep": {"user": "6/minute"}}, clock=clock)
+    assert burst(limiter, "ep", {"user": 1}) == 6
+    assert limiter.check("ep", {"user": 1}) == pytest.approx(10)
+    assert burst(limiter, "ep", {"user": 2}) == 6  # separate bucket
+    clock.now += 20
+    assert burst(limiter, "ep", {"user": 1}) == 2
+
+def test_rejected_requests_spend_nothing():
+    clock = Clock()
+    limiter = RateLimiter({"ep": {"user": "2/minute", "ip": "3/minute"}}, clock=clock)
+    assert burst(limiter, "ep", {"user": "a", "ip": "10.0.0.1"}) == 2
+    # The per-user rejections above did not drain the shared IP bucket
+    assert burst(limiter, "ep", {"user": "b", "ip": "10.0.0.1"}) == 1
+
+@pytest.mark.parametrize("make_store", [lambda tmp: MemoryStore(), lambda tmp: SQLiteStore(str(tmp / "rl.db"))])
+def test_workers_share_the_store(tmp_path, make_store):
+    clock, store = Clock(), make_store(tmp_path)
+    workers = [RateLimiter({"ep": {"user": "20/minute"}}, store, lease_fraction=0.25, clock=clock) for _ in range(3)]
+    assert sum(burst(w, "ep", {"user": 1}) for w in workers) == 20
+
+def test_leases_expire():
+    clock, store = Clock(), MemoryStore()
+    worker = RateLimiter({"ep": {"user": "10/minute"}}, store, lease_fraction=0.5, clock=clock)
+    assert worker.check("ep", {"user": 1}) == 0  # leases 5, keeps 4
+    clock.now += 120
+    # The stale lease is dropped: a full window allows the capacity, not capacity + 4
+    assert burst(worker, "ep", {"user": 1}) == 10
+
+@pytest.mark.parametrize("store", [None, MemoryStore()])
+def test_idle_buckets_are_pruned(monkeypatch, store):
+    monkeypatch.setattr(ratelimit, 'PRUNE_AT', 10)
+    clock = Clock()
+    limiter = RateLimiter({"ep": {"user": "10/minute"}}, store, clock=clock)
+    for user in range(10):
+        limiter.check("ep", {"user": user})
+    clock.now += 600
+    limiter.check("ep", {"user": "new"})
+    assert len(limiter.buckets) == 1
+
+def test_forwarded_client():
+    assert forwarded_client("10.0.0.2", "6.6.6.6, 1.2.3.4", 1) == "1.2.3.4"
+    assert forwarded_client("10.0.0.2", "6.6.6.6, 1.2.3.4, 10.0.0.9", 2) == "1.2.3.4"
+    assert forwarded_client("10.0.0.2", "1.2.3.4", 2) == "10.0.0.2"
+    assert forwarded_client("10.0.0.2", "1.2.3.4", 0) == "10.0.0.2"
+
+def login(client, forwarded):
+    return client.post('/api/auth/login', json={"email": "x@example.com", "password": "nope"},
+                       headers={"X-Forwarded-For": forwarded})
+
+def test_limits_apply_per_proxied_client(make_app):
+    app = make_app(RATELIMIT_ENABLED=True, PROXY_FIX_X_FOR=1, RATE_LIMITS={"auth_api.login": {"ip": "2/minute"}})
+    client = app.test_client()
+    # The client controls everything left of the last entry; spoofing it does not buy a new bucket
+    codes = [login(client, f"{spoof}, 1.2.3.4").status_code for spoof in ("a", "b", "c")]
+    assert codes == [401, 401, 429]
+    resp = login(client, "c, 1.2.3.4")
+    assert resp.status_code == 429 and int(resp.headers["Retry-After"]) >= 1
+    assert login(client, "5.6.7.8").status_code == 401
+
+def test_estimate_is_limited_per_user(make_app):
+    from conftest import register
+    app = make_app(RATELIMIT_ENABLED=True, RATE_LIMITS={"data_api.estimate": {"user": "2/minute"}})
+    client = app.test_client()
+    _, headers = register(client)
+    codes = [client.post('/api/data/estimate', json={"city": "Pune"}, headers=headers).status_code for _ in range(3)]
+    assert codes == [201, 201, 429]
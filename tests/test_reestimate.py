@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import register
+
+def estimate(client, headers, **fields):
+    resp = client.post('/api/data/estimate', json={"city": "Pune", "area_sqft": 1200, **fields}, headers=headers)
+    assert resp.status_code == 201
+    return resp.get_json()
+
+def patch(client, headers, pred_id, changes):
+    return client.patch(f'/api/data/result/{pred_id}', json=changes, headers=headers)
+
+def test_patch_matches_a_fresh_estimate(client, headers):
+    pred_id = estimate(client, headers)["id"]
+    resp = patch(client, headers, pred_id, {"area_sqft": 1500, "quality": "premium"})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    fresh = estimate(client, headers, area_sqft=1500, quality="premium")
+    assert body["total_cost"] == pytest.approx(fresh["total_cost"])
+    assert body["breakdown"] == pytest.approx(fresh["breakdown"])
+    assert body["quantities"] == fresh["quantities"]
+    assert body["recomputed"] == ["features", "quantities", "breakdown", "total", "forecast", "report"]
+    assert client.get(f'/api/data/result/{pred_id}', headers=headers).get_json()["total_cost"] == body["total_cost"]
+
+def test_patch_recomputes_only_downstream_stages(client, headers):
+    created = estimate(client, headers)
+    resp = patch(client, headers, created["id"], {"is_commercial": True})
+    assert resp.get_json()["recomputed"] == ["report"]
+    assert resp.get_json()["total_cost"] == created["total_cost"]
+    assert patch(client, headers, created["id"], {"city": "Pune"}).get_json()["recomputed"] == []
+
+def test_revision_guards_concurrent_edits(client, headers):
+    pred_id = estimate(client, headers)["id"]
+    assert patch(client, headers, pred_id, {"floors": 3, "revision": 1}).status_code == 200
+    stale = patch(client, headers, pred_id, {"floors": 4, "revision": 1})
+    assert stale.status_code == 409 and stale.get_json()["revision"] == 2
+    assert patch(client, headers, pred_id, {"floors": 4, "revision": 2}).status_code == 200
+
+@pytest.mark.parametrize("changes", [
+    {"quality": 5}, {"city": ["Pune"]}, {"city": None}, {"floors": "two"}, {"floors": True},
+    {"area_sqft": "nan"}, {"rooms": {"n": 3}}, {"is_commercial": [1]}, {"total_cost": 1}, {},
+])
+def test_malformed_changes_are_rejected(client, headers, changes):
+    pred_id = estimate(client, headers)["id"]
+    resp = patch(client, headers, pred_id, changes)
+    assert resp.status_code == 400, resp.get_json()
+    assert client.get(f'/api/data/result/{pred_id}', headers=headers).get_json()["inputs"]["city"] == "Pune"
+
+def test_non_object_body_is_rejected(client, headers):
+    pred_id = estimate(client, headers)["id"]
+    assert patch(client, headers, pred_id, ["floors", 3]).status_code == 400
+
+def test_ownership(client, headers):
+    pred_id = estimate(client, headers)["id"]
+    _, other = register(client, 'other')
+    assert patch(client, other, pred_id, {"floors": 3}).status_code == 403
+    assert patch(client, headers, pred_id + 100, {"floors": 3}).status_code == 404
+
+@pytest.mark.parametrize("fields", [{"quality": 5}, {"city": 7}, {"floors": [2]}, {"area_sqft": "inf"}])
+def test_estimate_rejects_wrong_types(client, headers, fields):
+    resp = client.post('/api/data/estimate', json={"city": "Pune", **fields}, headers=headers)
+    assert resp.status_code == 400 and resp.get_json()["msg"].startswith("Invalid input")
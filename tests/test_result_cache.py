@@ -0,0 +1,47 @@
+from conftest import register
+
+def estimate(client, headers, **fields):
+    resp = client.post('/api/data/estimate', json={"city": "Pune", "area_sqft": 1200, **fields}, headers=headers)
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+def stats(app):
+    from app import result_cache
+    with app.app_context():
+        return result_cache.stats()
+
+def test_etag_revalidation_and_patch_invalidation(app, client, headers):
+    pred_id = estimate(client, headers)
+    first = client.get(f'/api/data/result/{pred_id}', headers=headers)
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+    again = client.get(f'/api/data/result/{pred_id}', headers={**headers, "If-None-Match": first.headers['ETag']})
+    assert again.status_code == 304
+    assert stats(app)["hits"] == 1
+
+    assert client.patch(f'/api/data/result/{pred_id}', json={"area_sqft": 1500}, headers=headers).status_code == 200
+    edited = client.get(f'/api/data/result/{pred_id}', headers=headers)
+    assert edited.headers['ETag'] != first.headers['ETag']
+    assert edited.get_json()["total_cost"] != first.get_json()["total_cost"]
+
+def test_other_users_never_get_a_cached_body(client, headers):
+    pred_id = estimate(client, headers)
+    assert client.get(f'/api/data/result/{pred_id}', headers=headers).status_code == 200
+    _, other = register(client, 'someone-else')
+    resp = client.get(f'/api/data/result/{pred_id}', headers=other)
+    assert resp.status_code == 403 and "total_cost" not in resp.get_json()
+
+def test_apps_do_not_share_entries(make_app):
+    first, second = make_app(), make_app()
+    first_client, second_client = first.test_client(), second.test_client()
+    _, owner = register(first_client, 'owner')
+    pred_id = estimate(first_client, owner, area_sqft=2000)
+    assert first_client.get(f'/api/data/result/{pred_id}', headers=owner).status_code == 200
+
+    # Same ids, different database: the second app must read its own row
+    _, intruder = register(second_client, 'intruder')
+    _, victim = register(second_client, 'owner')
+    assert estimate(second_client, victim, floors=2) == pred_id
+    assert second_client.get(f'/api/data/result/{pred_id}', headers=intruder).status_code == 403
+    resp = second_client.get(f'/api/data/result/{pred_id}', headers=victim)
+    assert resp.status_code == 200 and resp.get_json()["inputs"]["floors"] == 2
+    assert stats(first)["entries"] == 1 and stats(second)["entries"] == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import register
+
+from app import similarity
+from app.similarity import SimilarityIndex
+
+def estimate(client, headers, **fields):
+    resp = client.post('/api/data/estimate', json=fields, headers=headers)
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+def similar(client, headers, pred_id, **args):
+    resp = client.get(f'/api/data/similar/{pred_id}', query_string=args, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()["similar"]
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_index_query_and_tombstones(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(similarity, 'np', None)
+    index = SimilarityIndex()
+    index.add([("historical", i, None, "Pune", "standard", 2, 1000 + 100 * i, 4, 1e6 + i) for i in range(10)])
+    hits = index.query("Pune", "standard", 2, 1210, 4, k=3)
+    assert [h["ref_id"] for h in hits] == [2, 3, 1]
+    assert index.remove("historical", 2)
+    assert [h["ref_id"] for h in index.query("Pune", "standard", 2, 1210, 4, k=3)] == [3, 1, 4]
+    # re-adding a row replaces its old entry
+    index.add([("historical", 1, None, "Delhi", "standard", 2, 1100, 4, 1e6)])
+    assert 1 not in [h["ref_id"] for h in index.query("Pune", "standard", 2, 1210, 4, k=10)]
+    assert len(index) == 9
+
+def test_similar_endpoint_and_anonymized_neighbours(client, headers):
+    mine = [estimate(client, headers, city="Pune", area_sqft=a) for a in (1000, 1100, 2000)]
+    _, other = register(client, 'other')
+    theirs = estimate(client, other, city="Pune", area_sqft=1050)
+    hits = similar(client, headers, mine[0], k=5)
+    assert [h["id"] for h in hits] == [None, mine[1], mine[2]]  # the other user's estimate is anonymous
+    assert hits[0]["area_sqft"] == 1050
+    assert client.get(f'/api/data/similar/{theirs}', headers=headers).status_code == 403
+
+def test_edits_move_rows_between_partitions(client, headers):
+    pune = [estimate(client, headers, city="Pune", area_sqft=a) for a in (1000, 1100)]
+    delhi = estimate(client, headers, city="Delhi", area_sqft=1500)
+    assert [h["id"] for h in similar(client, headers, pune[0])] == [pune[1]]
+
+    resp = client.patch(f'/api/data/result/{pune[1]}', json={"city": "Delhi", "area_sqft": 1400}, headers=headers)
+    assert resp.status_code == 200
+    assert similar(client, headers, pune[0]) == []
+    hits = similar(client, headers, delhi)
+    assert [(h["id"], h["area_sqft"]) for h in hits] == [(pune[1], 1400)]
+    assert hits[0]["total_cost"] == resp.get_json()["total_cost"]
+
+def test_rows_removed_elsewhere_are_evicted(app, client, headers):
+    from app import db
+    from app.models import Prediction
+    ids = [estimate(client, headers, city="Pune", area_sqft=a) for a in (1000, 1100, 1200)]
+    assert len(similar(client, headers, ids[0])) == 2
+    with app.app_context():  # e.g. archived by `flask archive-predictions` in another process
+        Prediction.query.filter_by(id=ids[1]).delete()
+        db.session.commit()
+    assert [h["id"] for h in similar(client, headers, ids[0])] == [ids[2]]
+    assert len(app.extensions['similarity_index']) == 2
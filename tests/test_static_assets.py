@@ -0,0 +1,52 @@
+import gzip
+
+import pytest
+
+from app.static_assets import (IMMUTABLE_CACHE, REVALIDATE_CACHE, StaticManifest, compress_assets,
+                               serve_asset)
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text('<html>' + 'x' * 4000 + '</html>')
+    (tmp_path / 'assets' / 'index-abc123.js').write_text('console.log(1);' * 200)
+    (tmp_path / 'assets' / 'big.bin').write_bytes(b'\0' * 5000)
+    return tmp_path
+
+def test_manifest_indexes_files_and_cache_policy(dist):
+    manifest = StaticManifest(str(dist), inline_max_bytes=4096)
+    assert len(manifest) == 3
+    assert manifest.get('assets/index-abc123.js').cache_control == IMMUTABLE_CACHE
+    assert manifest.get('index.html').cache_control == REVALIDATE_CACHE
+    assert manifest.get('assets/big.bin').data is None  # over the inline limit: streamed from disk
+    assert manifest.get('missing.js') is None
+
+def test_precompressed_variant_and_conditional_get(app, dist):
+    written = compress_assets(str(dist))
+    assert str(dist / 'assets' / 'index-abc123.js.gz') in written
+    assert not any(p.endswith('big.bin.gz') for p in written)  # not a text asset
+    manifest = StaticManifest(str(dist))
+    asset = manifest.get('assets/index-abc123.js')
+    assert set(asset.variants) >= {'gzip'}
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        resp = serve_asset(asset)
+        assert resp.content_encoding == 'gzip'
+        assert gzip.decompress(resp.get_data()) == (dist / 'assets' / 'index-abc123.js').read_bytes()
+        etag = resp.get_etag()[0]
+        assert 'Accept-Encoding' in resp.vary
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'}):
+        assert serve_asset(asset).status_code == 304
+
+    with app.test_request_context():
+        resp = serve_asset(asset)
+        assert resp.content_encoding is None
+        assert resp.get_etag()[0] != etag
+
+def test_large_asset_is_streamed(app, dist):
+    asset = StaticManifest(str(dist), inline_max_bytes=1024).get('assets/big.bin')
+    with app.test_request_context():
+        resp = serve_asset(asset)
+        resp.direct_passthrough = False
+        assert resp.get_data() == b'\0' * 5000
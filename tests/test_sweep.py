@@ -0,0 +1,75 @@
+import pytest
+
+from conftest import register
+
+from app.cost_model import CostEstimatorModel, load_unit_costs
+from app.estimation import parse_estimate_params
+from app.pricing import compile_pricing, expand
+
+CELLS = [("Mumbai", "high-end"), ("Mumbai", "luxury"), ("Mumbai", "basic"), ("Pune", "Premium"),
+         ("Atlantis", "standard"), ("Atlantis", "luxury")]
+
+def estimator_total(model, city, quality, area, floors):
+    params = parse_estimate_params({"city": city, "quality": quality, "floors": floors}, {})
+    return model.predict_total_cost({"city": params["city"], "quality": params["quality"],
+                                     "area_sqft": area, "no_of_floors": floors})[0]
+
+def calibration():
+    return {"version": 1, "groups": {
+        "*": {"factors": {"bricks": 8.5, "cement": 0.42, "steel": 4.2, "paint": 0.2, "labor": 0.13}},
+        "Mumbai|high-end": {"factors": {"bricks": 9, "cement": 0.5, "steel": 5, "paint": 0.25, "labor": 0.15},
+                            "multiplier": 1.6},
+        "Surat|basic": {"factors": {"bricks": 7, "cement": 0.35, "steel": 3.5, "paint": 0.15, "labor": 0.1},
+                        "multiplier": 0.9},
+    }}
+
+@pytest.mark.parametrize("calibrated", [False, True])
+def test_tables_match_the_estimator(calibrated):
+    model = CostEstimatorModel(calibration() if calibrated else None)
+    tables = compile_pricing(model, load_unit_costs())
+    for city, quality in CELLS + ([("Surat", "basic"), ("Surat", "premium")] if calibrated else []):
+        expected = estimator_total(model, city, quality, 1250, 3)
+        assert tables.rate(city, quality.lower()) * 1250 * 3 == pytest.approx(expected), (city, quality)
+
+def test_sweep_endpoint_matches_estimates(client, headers):
+    resp = client.post('/api/data/sweep', headers=headers, json={
+        "city": ["Mumbai", "Atlantis"], "quality": ["high-end", "basic"], "floors": 2, "area_sqft": [1000, 1500]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    totals = iter(body["total_cost"])
+    for city in body["city"]:
+        for quality in body["quality"]:
+            for area in body["area_sqft"]:
+                est = client.post('/api/data/estimate', headers=headers, json={
+                    "city": city, "quality": quality, "floors": 2, "area_sqft": area})
+                assert next(totals) == pytest.approx(est.get_json()["total_cost"], abs=0.01)
+
+@pytest.mark.parametrize("body", [[1, 2], "Mumbai", {"quality": 5}, {"quality": [None]},
+                                  {"city": [1]}, {"floors": {"start": 2}}])
+def test_malformed_sweeps_are_rejected(client, headers, body):
+    resp = client.post('/api/data/sweep', headers=headers, json=body)
+    assert resp.status_code == 400
+    assert resp.get_json()["msg"].startswith("Invalid sweep")
+
+def test_expand_rejects_non_finite_values():
+    with pytest.raises(ValueError, match="finite"):
+        expand({"start": 0, "stop": float("inf")}, float, "area_sqft")
+    with pytest.raises(ValueError, match="finite"):
+        expand([10 ** 400], float, "area_sqft")
+
+@pytest.mark.parametrize("provider", ["auto", "stdlib"])
+@pytest.mark.parametrize("body", ['{"area_sqft": {"start": 0, "stop": 1e309}}', '{"area_sqft": [NaN]}',
+                                  '{"floors": {"start": 1, "stop": 1e309}}',
+                                  '{"area_sqft": {"start": 0, "stop": 10, "step": 1e309}}'])
+def test_non_finite_sweeps_are_rejected(make_app, provider, body):
+    client = make_app(JSON_PROVIDER=provider).test_client()
+    _, headers = register(client)
+    resp = client.post('/api/data/sweep', headers={**headers, "Content-Type": "application/json"}, data=body)
+    assert resp.status_code == 400
+    assert resp.get_json()["msg"].startswith("Invalid sweep")
+
+def test_malformed_json_body_is_rejected(client, headers):
+    resp = client.post('/api/data/sweep', headers={**headers, "Content-Type": "application/json"}, data='{"city": ')
+    assert resp.status_code == 400 and "malformed" in resp.get_json()["msg"]
+    empty = client.post('/api/data/sweep', headers={**headers, "Content-Type": "application/json"}, data='')
+    assert empty.status_code == 200
@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import register
+
+from app import takeoff
+from app.cost_model import load_unit_costs
+from app.takeoff import TakeoffModel, materials, takeoff_batch
+
+def item(area=1200, floors=2, quality="standard", city="Pune", **extra):
+    return {"city": city, "quality": quality, "area_sqft": area, "no_of_floors": floors, **extra}
+
+def total(model, **kwargs):
+    return model.predict_total_cost(item(**kwargs))[0]
+
+def test_quantities_and_bom():
+    model = TakeoffModel()
+    bom = model.bom(item())
+    assert set(bom) == {"walls", "slabs", "surfaces", "labor"}
+    assert all(v > 0 for v in model.predict(item())[0])
+    # without wall_length the external run is the square plate's perimeter
+    assert bom["walls"]["external_ft"] == pytest.approx(2 * 4 * 1200 ** 0.5)
+    assert model.bom(item(wall_length_ft=200))["walls"]["external_ft"] == pytest.approx(400)
+
+def test_total_is_not_linear():
+    model = TakeoffModel()
+    # footings are paid once
+    assert total(model, floors=2) < 2 * total(model, floors=1)
+    # walls grow with the plate's side: four times the area is less than four times the cost
+    assert total(model, area=4000) < 4 * total(model, area=1000)
+    bricks = lambda area: model.predict(item(area=area))[0][0]
+    assert bricks(4000) < 4 * bricks(1000)
+
+def test_quality_and_aliases():
+    model = TakeoffModel()
+    assert total(model, quality="economical") < total(model) < total(model, quality="premium")
+    assert total(model, quality="basic") == total(model, quality="economical")
+    assert total(model, quality="luxury") == total(model)  # unknown: standard finishes and multiplier
+
+def test_batch_matches_single_estimates():
+    np = pytest.importorskip("numpy")
+    model = TakeoffModel()
+    areas, floors = np.array([800.0, 1200.0, 2500.0]), np.array([1.0, 2.0, 4.0])
+    batch = materials(takeoff_batch(areas, floors, quality=np.array(["basic", "standard", "premium"])))
+    for i, q in enumerate(["basic", "standard", "premium"]):
+        single = model.predict(item(area=areas[i], floors=floors[i], quality=q))[0]
+        assert [b[i] for b in batch] == pytest.approx(single)
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_grid_totals_match_predict_total_cost(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(takeoff, 'np', None)
+    model = TakeoffModel(unit_costs=load_unit_costs())
+    cities, qualities, floors, areas = ["Mumbai", "Atlantis"], ["basic", "high-end"], [1, 3], [900.0, 1500.0]
+    for rooms, wall in ((None, None), (5, 120)):
+        grid = list(model.grid_totals(cities, qualities, floors, areas, rooms=rooms, wall_length=wall))
+        expected = [total(model, city=c, quality=q, floors=f, area=a, rooms=rooms, wall_length_ft=wall)
+                    for c in cities for q in qualities for f in floors for a in areas]
+        assert grid == pytest.approx(expected)
+
+def test_takeoff_estimates_end_to_end(make_app):
+    app = make_app(QUANTITY_MODEL='takeoff')
+    client = app.test_client()
+    _, headers = register(client)
+    resp = client.post('/api/data/estimate', json={"city": "Mumbai", "quality": "premium", "floors": 3,
+                                                   "area_sqft": 1400, "rooms": 6}, headers=headers)
+    assert resp.status_code == 201
+    body = resp.get_json()
+    assert sum(body["breakdown"].values()) == pytest.approx(body["total_cost"], rel=1e-3)
+
+    catalog = client.get('/api/data/catalog').get_json()
+    assert catalog["linear"] is False and catalog["model"] == "takeoff-1"
+    sweep = client.post('/api/data/sweep', json={"city": "Mumbai", "quality": "premium", "floors": 3,
+                                                 "area_sqft": 1400}, headers=headers).get_json()
+    # without a blueprint both use default_features() for rooms and walls
+    plain = client.post('/api/data/estimate', json={"city": "Mumbai", "quality": "premium", "floors": 3,
+                                                    "area_sqft": 1400}, headers=headers).get_json()
+    assert sweep["total_cost"] == [pytest.approx(plain["total_cost"], abs=0.01)]
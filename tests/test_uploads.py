@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+from app.uploads import UploadError, read_upload
+
+def png_bytes(size=(64, 48)):
+    from PIL import Image, ImageDraw
+    img = Image.new('L', size, 255)
+    ImageDraw.Draw(img).rectangle([8, 8, size[0] - 8, size[1] - 8], outline=0, width=2)
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+class NonSeekable(io.RawIOBase):
+    def __init__(self, data):
+        self.inner = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def readinto(self, b):
+        chunk = self.inner.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+def test_read_upload_sniffs_hashes_and_rewinds():
+    data = png_bytes()
+    upload = read_upload(io.BytesIO(data), max_bytes=1024 * 1024, chunk_size=100)
+    assert (upload.kind, upload.size) == ('png', len(data))
+    assert upload.stream.read() == data
+    assert read_upload(NonSeekable(data), max_bytes=1024 * 1024).sha256 == upload.sha256
+    known = read_upload(io.BytesIO(data), max_bytes=1024 * 1024, sha256=upload.sha256)
+    assert (known.kind, known.size, known.sha256, known.stream.tell()) == ('png', len(data), upload.sha256, 0)
+
+@pytest.mark.parametrize("data,max_bytes,status", [
+    (b"", 1024, 400),
+    (b"%PDF-1.7 not an image", 1024, 415),
+    (b"\x89PNG\r\n\x1a\n" + b"\0" * 5000, 1024, 413),
+])
+@pytest.mark.parametrize("sha256", [None, "known"])
+def test_read_upload_errors(data, max_bytes, status, sha256):
+    with pytest.raises(UploadError) as e:
+        read_upload(io.BytesIO(data), max_bytes=max_bytes, sha256=sha256)
+    assert e.value.status == status
+
+def test_estimate_with_blueprint(client, headers):
+    resp = client.post('/api/data/estimate', headers=headers, content_type='multipart/form-data',
+                       data={"city": "Delhi", "blueprint": (io.BytesIO(png_bytes()), 'plan.png')})
+    assert resp.status_code == 201
+
+def test_estimate_rejects_bad_blueprints(make_app):
+    from conftest import register
+    app = make_app(BLUEPRINT_MAX_BYTES=200, MAX_CONTENT_LENGTH=64 * 1024)
+    client = app.test_client()
+    _, headers = register(client)
+
+    def post(payload):
+        return client.post('/api/data/estimate', headers=headers, content_type='multipart/form-data',
+                           data={"blueprint": (io.BytesIO(payload), 'plan.png')})
+    assert post(b"hello").status_code == 415
+    assert post(png_bytes((200, 200))).status_code == 413
+    resp = post(b"\x89PNG\r\n\x1a\n" + b"\0" * 100 * 1024)  # over MAX_CONTENT_LENGTH
+    assert resp.status_code == 413 and "request limit" in resp.get_json()["msg"]